@@ -0,0 +1,194 @@
+"""
+流入制御 - ffmpeg・Gemini API・GCSの同時実行数をリソースごとに制限する
+上限を超えた呼び出しは空きを待ち、待ちが上限に達しているリソースがある間は新しいジョブを受け付けない
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+from metrics import Gauge, Histogram
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# リソース名 → (同時実行数の環境変数, 既定値)。既定値は従来の実行数の上限の目安（0で制限なし）
+RESOURCE_DEFAULTS = {
+    # ワーカー数 × 並列圧縮の区間数だけ起動していたため、CPU数の2倍を上限とする
+    "ffmpeg": ("FFMPEG_MAX_CONCURRENCY", 2 * (os.cpu_count() or 1)),
+    "gemini_upload": ("GEMINI_UPLOAD_MAX_CONCURRENCY", 4),
+    # ワーカー数（2）× セグメントの同時解析数（4）
+    "gemini_generate": ("GEMINI_GENERATE_MAX_CONCURRENCY", 8),
+    "gcs_download": ("GCS_DOWNLOAD_MAX_CONCURRENCY", 4),
+}
+
+# 保持時間の実績がない場合に使う、1回の処理の目安（秒）
+DEFAULT_HOLD_SECONDS = 30.0
+
+RESOURCE_WAIT_SECONDS = Histogram(
+    "resource_wait_seconds",
+    "リソースの空きを待った時間（秒）",
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+    labelnames=("resource",)
+)
+RESOURCE_HOLD_SECONDS = Histogram(
+    "resource_hold_seconds",
+    "リソースを使用していた時間（秒）",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200),
+    labelnames=("resource",)
+)
+RESOURCE_IN_USE = Gauge(
+    "resource_in_use",
+    "リソースの使用数",
+    labelnames=("resource",)
+)
+RESOURCE_WAITING = Gauge(
+    "resource_waiting",
+    "リソースの空きを待っている数（待ち行列の長さ）",
+    labelnames=("resource",)
+)
+RESOURCE_LIMIT = Gauge(
+    "resource_limit",
+    "リソースの同時実行数の上限（0は制限なし）",
+    labelnames=("resource",)
+)
+
+
+class ResourceLimiter:
+    """
+    リソースの同時実行数の上限（先着順に空きを割り当てる）
+    asyncio.Semaphoreと違いイベントループに紐付かず、待ち行列の長さと保持時間の実績から待ち時間を見積もれる
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: int):
+        """
+        Args:
+            name: リソース名（メトリクスのラベル）
+            limit: 同時実行数の上限（0以下の場合は制限なし）
+            max_waiting: この数以上が空きを待っている間は飽和とみなす
+        """
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.in_use = 0
+        self._waiters: deque = deque()
+        self._hold_total = 0.0
+        self._hold_count = 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    @property
+    def saturated(self) -> bool:
+        """待ち行列が上限に達しているか"""
+        return self.limit > 0 and self.waiting >= self.max_waiting
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """空きを待ってリソースを使用する（抜けると次の待ちに引き渡す）"""
+        wait_start = time.perf_counter()
+        await self._acquire()
+        hold_start = time.perf_counter()
+        RESOURCE_WAIT_SECONDS.observe(hold_start - wait_start, resource=self.name)
+        try:
+            yield
+        finally:
+            hold_time = time.perf_counter() - hold_start
+            self._hold_total += hold_time
+            self._hold_count += 1
+            RESOURCE_HOLD_SECONDS.observe(hold_time, resource=self.name)
+            self._release()
+
+    async def _acquire(self):
+        if self.limit <= 0 or (self.in_use < self.limit and not self._waiters):
+            self.in_use += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with span("resource.wait", resource=self.name, waiting=len(self._waiters)):
+                await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 空きを引き渡された直後に取り消された場合は次の待ちへ回す
+                self._release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _release(self):
+        # 待ちがあれば使用数を減らさずにそのまま引き渡す（後から来た呼び出しに追い越させない）
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_use -= 1
+
+    def estimate_wait_seconds(self) -> float:
+        """
+        今から空きを待った場合の待ち時間の見積もり
+
+        Returns:
+            秒数（空きがある場合は0）
+        """
+        if self.limit <= 0:
+            return 0.0
+        ahead = self.in_use + self.waiting - self.limit + 1
+        if ahead <= 0:
+            return 0.0
+        average_hold = self._hold_total / self._hold_count if self._hold_count else DEFAULT_HOLD_SECONDS
+        return math.ceil(ahead / self.limit) * average_hold
+
+
+def create_resource_limiters() -> Dict[str, ResourceLimiter]:
+    """
+    環境変数の設定からリソースごとの同時実行数の上限を作成
+
+    {リソース}_MAX_CONCURRENCY: 同時実行数の上限（0で制限なし）
+    RESOURCE_MAX_WAITING: この数以上が空きを待っているリソースがある間は新しいジョブを受け付けない
+
+    Returns:
+        リソース名 → ResourceLimiter
+    """
+    max_waiting = int(os.getenv("RESOURCE_MAX_WAITING", "16"))
+    limiters = {}
+    for name, (env_name, default) in RESOURCE_DEFAULTS.items():
+        limiters[name] = ResourceLimiter(name, int(os.getenv(env_name, str(default))), max_waiting)
+    logger.info(
+        "リソースの同時実行数の上限: "
+        + ", ".join(f"{name}={limiter.limit or '制限なし'}" for name, limiter in limiters.items())
+        + f" (待ち上限={max_waiting})"
+    )
+    return limiters
+
+
+LIMITERS = create_resource_limiters()
+
+RESOURCE_IN_USE.set_function(lambda: {(name,): limiter.in_use for name, limiter in LIMITERS.items()})
+RESOURCE_WAITING.set_function(lambda: {(name,): limiter.waiting for name, limiter in LIMITERS.items()})
+RESOURCE_LIMIT.set_function(lambda: {(name,): limiter.limit for name, limiter in LIMITERS.items()})
+
+
+def resource_slot(name: str):
+    """
+    リソースの空きを待って使用する（async with で使う）
+
+    Args:
+        name: リソース名（ffmpeg / gemini_upload / gemini_generate / gcs_download）
+    """
+    return LIMITERS[name].slot()
+
+
+def saturated_resources() -> List[ResourceLimiter]:
+    """待ち行列が上限に達しているリソース"""
+    return [limiter for limiter in LIMITERS.values() if limiter.saturated]
@@ -7,6 +7,11 @@ const API_BASE_URL = window.location.origin.includes('localhost')
 let selectedFile = null;
 let metadata = {};
 
+// このサイズを超えるファイルはパートに分けて並行アップロード（失敗したパートだけ再送できる）
+const MULTIPART_THRESHOLD = 32 * 1024 * 1024;
+const MULTIPART_CONCURRENCY = 4;
+const MULTIPART_MAX_ATTEMPTS = 3;
+
 // 初期化
 document.addEventListener('DOMContentLoaded', () => {
     // 認証チェック
@@ -182,17 +187,25 @@ async function uploadAudio() {
         uploadBtn.disabled = true;
         progressSection.classList.add('show');
 
-        // ステップ1: 署名付きURLを取得
-        updateProgress(5, '署名付きURLを取得中...');
-        const { upload_url, blob_name } = await generateUploadUrl(selectedFile, token);
-
-        // ステップ2: GCSへ直接アップロード（Cloud Run制限を回避）
-        updateProgress(10, 'GCSへファイルをアップロード中...');
-        await uploadToGCS(upload_url, selectedFile);
+        let blob_name;
+        if (selectedFile.size > MULTIPART_THRESHOLD) {
+            // ステップ1-2: パートに分けてGCSへ並行アップロードし、結合
+            updateProgress(5, '分割アップロードを準備中...');
+            blob_name = await uploadMultipart(selectedFile, token);
+        } else {
+            // ステップ1: 署名付きURLを取得
+            updateProgress(5, '署名付きURLを取得中...');
+            const uploadTarget = await generateUploadUrl(selectedFile, token);
+            blob_name = uploadTarget.blob_name;
+
+            // ステップ2: GCSへ直接アップロード（Cloud Run制限を回避）
+            updateProgress(10, 'GCSへファイルをアップロード中...');
+            await uploadToGCS(uploadTarget.upload_url, selectedFile);
+        }
         updateProgress(30, 'アップロード完了');
 
         // ステップ3: バックエンドで音声解析
-        updateProgress(40, 'AIが音声を解析中...（数分かかる場合があります）');
+        updateProgress(35, '解析ジョブを登録中...');
         const finalResult = await processAudioFromGCS(blob_name, token);
         updateProgress(100, '完了！');
 
@@ -254,7 +267,139 @@ async function uploadToGCS(uploadUrl, file) {
     console.log('GCSアップロード完了');
 }
 
-// バックエンドで音声解析
+// 分割アップロード（パートを並行してPUTし、失敗したパートだけURLを再発行して再送）
+async function uploadMultipart(file, token) {
+    const contentType = file.type || 'audio/mpeg';
+    console.log(`分割アップロード: ${file.name} (${(file.size / (1024 * 1024)).toFixed(2)} MB)`);
+
+    let session = await startMultipartUpload(file, contentType, token, null);
+    for (let attempt = 1; ; attempt++) {
+        await uploadParts(file, session, contentType);
+
+        const blobName = await completeMultipartUpload(file, session, contentType, token);
+        if (blobName) {
+            console.log('分割アップロード完了');
+            return blobName;
+        }
+        if (attempt >= MULTIPART_MAX_ATTEMPTS) {
+            throw new Error('一部のパートをアップロードできませんでした。通信環境を確認して再度お試しください。');
+        }
+        updateProgress(10, '中断したパートのアップロードを再開中...');
+        session = await startMultipartUpload(file, contentType, token, session.upload_id);
+    }
+}
+
+// 分割アップロードの開始・再開（未アップロードのパートの署名付きURLを取得）
+async function startMultipartUpload(file, contentType, token, uploadId) {
+    const formData = new FormData();
+    formData.append('filename', file.name);
+    formData.append('content_type', contentType);
+    formData.append('file_size', file.size);
+    if (uploadId) {
+        formData.append('upload_id', uploadId);
+    }
+
+    const response = await fetch(`${API_BASE_URL}/api/uploads/multipart`, {
+        method: 'POST',
+        headers: {
+            'Authorization': `Bearer ${token}`
+        },
+        body: formData
+    });
+
+    if (!response.ok) {
+        throw new Error(await readErrorMessage(response, '分割アップロードの開始に失敗しました'));
+    }
+
+    return await response.json();
+}
+
+// パートを並行してアップロード（失敗したパートは結合時に検出して再送する）
+async function uploadParts(file, session, contentType) {
+    const queue = [...session.parts];
+    let done = session.uploaded_parts.length;
+
+    async function worker() {
+        while (queue.length > 0) {
+            const part = queue.shift();
+            const start = (part.part_number - 1) * session.part_size;
+            const body = file.slice(start, Math.min(start + session.part_size, file.size));
+            try {
+                const response = await fetch(part.upload_url, {
+                    method: 'PUT',
+                    headers: {
+                        'Content-Type': contentType
+                    },
+                    body: body
+                });
+                if (!response.ok) {
+                    console.warn(`パート${part.part_number}のアップロードに失敗 (ステータス: ${response.status})`);
+                    continue;
+                }
+            } catch (error) {
+                console.warn(`パート${part.part_number}のアップロードに失敗: ${error.message}`);
+                continue;
+            }
+            done++;
+            updateProgress(10 + Math.round(20 * done / session.part_count), `GCSへファイルをアップロード中... (${done}/${session.part_count})`);
+        }
+    }
+
+    await Promise.all(Array.from({ length: MULTIPART_CONCURRENCY }, worker));
+}
+
+// パートの結合（未アップロードのパートがある場合はnull）
+async function completeMultipartUpload(file, session, contentType, token) {
+    const formData = new FormData();
+    formData.append('upload_id', session.upload_id);
+    formData.append('filename', file.name);
+    formData.append('content_type', contentType);
+    formData.append('part_count', session.part_count);
+
+    const response = await fetch(`${API_BASE_URL}/api/uploads/multipart/complete`, {
+        method: 'POST',
+        headers: {
+            'Authorization': `Bearer ${token}`
+        },
+        body: formData
+    });
+
+    if (response.status === 409) {
+        const error = await response.json();
+        console.warn('未アップロードのパート:', error.detail.missing_parts);
+        return null;
+    }
+    if (!response.ok) {
+        throw new Error(await readErrorMessage(response, 'アップロードしたファイルの結合に失敗しました'));
+    }
+
+    return (await response.json()).blob_name;
+}
+
+// ジョブのステージ表示
+const JOB_STAGE_MESSAGES = {
+    queued: '処理待ち中...',
+    download: '音声ファイルを取得中...',
+    stream: '音声ファイルを取得しながら圧縮中...',
+    compress: '音声ファイルを圧縮中...',
+    trim: '無音部分を除去中...',
+    split: '長時間の音声を分割中...',
+    analyze: 'AIが音声を解析中...（数分かかる場合があります）',
+    cleanup: '仕上げ中...'
+};
+
+const JOB_STAGE_PROGRESS = {
+    queued: 35,
+    download: 40,
+    stream: 45,
+    compress: 50,
+    trim: 52,
+    split: 55,
+    analyze: 60,
+    cleanup: 95
+};
+
+// バックエンドで音声解析（ジョブを登録して完了までポーリング）
 async function processAudioFromGCS(blobName, token) {
     console.log(`音声解析開始: ${blobName}`);
 
@@ -267,60 +412,189 @@ async function processAudioFromGCS(blobName, token) {
 
     const startTime = Date.now();
 
-    // タイムアウトを15分に設定（大容量ファイル対応）
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => {
-        console.warn('リクエストがタイムアウトしました（15分経過）');
-        controller.abort();
-    }, 15 * 60 * 1000); // 15分
+    const response = await fetch(`${API_BASE_URL}/api/upload`, {
+        method: 'POST',
+        headers: {
+            'Authorization': `Bearer ${token}`
+        },
+        body: formData
+    });
 
+    if (!response.ok) {
+        throw new Error(await readErrorMessage(response, '音声解析に失敗しました'));
+    }
+
+    const { job_id } = await response.json();
+    console.log(`ジョブ登録: ${job_id}`);
+
+    // 生成中の議事録をServer-Sent Eventsで受信（接続できない場合はポーリング）
     try {
-        const response = await fetch(`${API_BASE_URL}/api/upload`, {
-            method: 'POST',
+        const result = await watchJobEvents(job_id, token);
+        console.log(`処理完了: ${((Date.now() - startTime) / 1000).toFixed(2)}秒`);
+        return result;
+    } catch (error) {
+        if (!error.streamUnavailable) {
+            throw error;
+        }
+        console.warn('イベント配信に接続できないため、ポーリングに切り替えます:', error.message);
+    }
+
+    return await pollJob(job_id, token, startTime);
+}
+
+// ジョブのイベントを受信し、生成中の議事録を表示
+async function watchJobEvents(jobId, token) {
+    const streamUnavailable = (message) => Object.assign(new Error(message), { streamUnavailable: true });
+
+    let response;
+    try {
+        response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}/events`, {
             headers: {
-                'Authorization': `Bearer ${token}`
-            },
-            body: formData,
-            signal: controller.signal
+                'Authorization': `Bearer ${token}`,
+                'Accept': 'text/event-stream'
+            }
         });
+    } catch (e) {
+        throw streamUnavailable(e.message);
+    }
 
-        clearTimeout(timeoutId);
+    if (!response.ok || !response.body) {
+        throw streamUnavailable(`ステータス: ${response.status}`);
+    }
 
-        const processingTime = ((Date.now() - startTime) / 1000).toFixed(2);
-        console.log(`処理完了: ${processingTime}秒`);
+    const preview = document.getElementById('streamPreview');
+    preview.textContent = '';
 
-        if (!response.ok) {
-            const contentType = response.headers.get('content-type');
-            let errorMessage = '音声解析に失敗しました';
-
-            if (response.status === 503) {
-                errorMessage = 'サーバーが一時的に利用できません。ファイルサイズが大きい場合は、数分後に再度お試しください。';
-            } else if (response.status === 504) {
-                errorMessage = '処理がタイムアウトしました。ファイルサイズを小さくするか、音声を分割してお試しください。';
-            } else if (contentType && contentType.includes('application/json')) {
-                try {
-                    const error = await response.json();
-                    errorMessage = error.detail || errorMessage;
-                } catch (e) {
-                    console.error('JSONパースエラー:', e);
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        // イベントは空行で区切られる
+        let separator;
+        while ((separator = buffer.indexOf('\n\n')) >= 0) {
+            const block = buffer.slice(0, separator);
+            buffer = buffer.slice(separator + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event: ')) {
+                    event = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice(6);
                 }
-            } else {
-                const text = await response.text();
-                console.error('サーバーエラー:', text);
-                errorMessage = `サーバーエラー (ステータス: ${response.status})`;
             }
+            const payload = data ? JSON.parse(data) : {};
+
+            if (event === 'stage') {
+                updateProgress(
+                    JOB_STAGE_PROGRESS[payload.stage] || 60,
+                    JOB_STAGE_MESSAGES[payload.stage] || 'AIが音声を解析中...'
+                );
+            } else if (event === 'line') {
+                preview.classList.add('show');
+                preview.textContent += convertMarkdownSymbols(payload.text) + '\n';
+                preview.scrollTop = preview.scrollHeight;
+            } else if (event === 'section') {
+                const heading = payload.text.split('\n')[0];
+                updateProgress(80, `「${convertMarkdownSymbols(heading)}」を生成しました`);
+            } else if (event === 'done') {
+                console.log('処理時間:', payload.stage_timings);
+                return payload.result;
+            } else if (event === 'error') {
+                throw new Error(payload.error || '音声解析に失敗しました');
+            }
+        }
+    }
+
+    throw streamUnavailable('イベント配信が途中で切断されました');
+}
+
+// ジョブの状態を完了までポーリング
+async function pollJob(jobId, token, startTime) {
+    // タイムアウトを60分に設定（長時間の打合せ対応）
+    const deadline = startTime + 60 * 60 * 1000;
+
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 3000));
+
+        const statusResponse = await fetch(`${API_BASE_URL}/api/jobs/${jobId}`, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
 
-            throw new Error(errorMessage);
+        if (!statusResponse.ok) {
+            throw new Error(await readErrorMessage(statusResponse, 'ジョブ状態の取得に失敗しました'));
         }
 
-        return await response.json();
-    } catch (error) {
-        clearTimeout(timeoutId);
-        if (error.name === 'AbortError') {
-            throw new Error('処理がタイムアウトしました（15分）。音声ファイルが非常に長い可能性があります。');
+        const job = await statusResponse.json();
+
+        if (job.status === 'completed') {
+            const processingTime = ((Date.now() - startTime) / 1000).toFixed(2);
+            console.log(`処理完了: ${processingTime}秒`, job.stage_timings);
+            return job.result;
         }
-        throw error;
+
+        if (job.status === 'failed') {
+            throw new Error(job.error || '音声解析に失敗しました');
+        }
+
+        updateProgress(
+            JOB_STAGE_PROGRESS[job.stage] || 60,
+            JOB_STAGE_MESSAGES[job.stage] || 'AIが音声を解析中...'
+        );
     }
+
+    throw new Error('処理がタイムアウトしました（60分）。音声ファイルが非常に長い可能性があります。');
+}
+
+// エラーレスポンスからメッセージを取得
+async function readErrorMessage(response, defaultMessage) {
+    const contentType = response.headers.get('content-type');
+
+    if (response.status === 503) {
+        try {
+            const error = await response.json();
+            return error.detail || 'サーバーが一時的に利用できません。数分後に再度お試しください。';
+        } catch (e) {
+            return 'サーバーが一時的に利用できません。数分後に再度お試しください。';
+        }
+    }
+
+    if (response.status === 429) {
+        const retryAfter = parseInt(response.headers.get('retry-after'), 10);
+        const wait = retryAfter > 0
+            ? `（約${retryAfter >= 60 ? Math.ceil(retryAfter / 60) + '分' : retryAfter + '秒'}後に再度お試しください）`
+            : '';
+        try {
+            const error = await response.json();
+            return (error.detail || 'サーバーが混み合っています。') + wait;
+        } catch (e) {
+            return 'サーバーが混み合っています。' + wait;
+        }
+    }
+
+    if (contentType && contentType.includes('application/json')) {
+        try {
+            const error = await response.json();
+            return error.detail || defaultMessage;
+        } catch (e) {
+            console.error('JSONパースエラー:', e);
+        }
+    } else {
+        const text = await response.text();
+        console.error('サーバーエラー:', text);
+    }
+
+    return `${defaultMessage} (ステータス: ${response.status})`;
 }
 
 function updateProgress(percent, message) {
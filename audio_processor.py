@@ -3,14 +3,55 @@
 PyDubまたはffmpegを使用してファイルを圧縮
 """
 import os
+import re
+import json
+import bisect
+import asyncio
 import tempfile
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 import shutil
-import subprocess
+from functools import lru_cache
+
+from admission import resource_slot
+from metrics import Counter, Histogram
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
+# 入力音声の情報と、圧縮の要否の判定結果（passthrough / remux / encode）
+AUDIO_INPUTS = Counter(
+    "audio_inputs_total",
+    "入力音声の数（コーデック・圧縮の要否ごと）",
+    labelnames=("codec", "decision")
+)
+AUDIO_INPUT_DURATION_SECONDS = Histogram(
+    "audio_input_duration_seconds",
+    "入力音声の長さ（秒）",
+    buckets=(60, 300, 600, 1800, 3600, 7200, 14400, 21600)
+)
+AUDIO_INPUT_BITRATE_KBPS = Histogram(
+    "audio_input_bitrate_kbps",
+    "入力音声のビットレート（kbps）",
+    buckets=(16, 24, 32, 48, 64, 96, 128, 192, 256, 320, 768, 1536)
+)
+# 無音除去で除いた長さと、除去前後の圧縮済み音声のサイズ（Geminiへ送る量がどれだけ減ったか）
+AUDIO_SILENCE_REMOVED_SECONDS = Histogram(
+    "audio_silence_removed_seconds",
+    "無音除去で除いた長さ（秒）",
+    buckets=(0, 10, 30, 60, 300, 600, 1200, 1800, 3600, 7200)
+)
+AUDIO_SILENCE_REMOVED_RATIO = Histogram(
+    "audio_silence_removed_ratio",
+    "無音除去で除いた長さの元の長さに対する割合",
+    buckets=(0, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8)
+)
+AUDIO_SILENCE_TRIM_BYTES = Counter(
+    "audio_silence_trim_bytes_total",
+    "無音除去の対象にした圧縮済み音声のサイズ（除去前 before・除去後 after）",
+    labelnames=("state",)
+)
+
 # Python 3.13のaudioop問題への対応
 try:
     from pydub import AudioSegment
@@ -21,7 +62,49 @@ except (ImportError, ModuleNotFoundError) as e:
     logger.warning(f"PyDubが利用できません: {str(e)}. ffmpegでの処理を試みます")
     AudioSegment = None
 
-# ffmpegの利用可能性をチェック
+# PATHにffmpegがない場合に確認するインストール先（Windowsの開発環境向け）
+FFMPEG_FALLBACK_PATHS = [
+    'C:/ffmpeg-8.0.1-essentials_build/bin/ffmpeg.exe',
+    'C:/ffmpeg/bin/ffmpeg.exe',
+    'C:/Program Files/ffmpeg/bin/ffmpeg.exe',
+    'C:/Program Files (x86)/ffmpeg/bin/ffmpeg.exe',
+]
+
+@lru_cache(maxsize=1)
+def find_ffmpeg() -> Optional[str]:
+    """
+    ffmpegのパスを探す（プロセスを起動せずに確認し、結果はプロセス内で使い回す）
+
+    Returns:
+        ffmpegコマンドのパス（見つからない場合はNone）
+    """
+    ffmpeg_path = shutil.which('ffmpeg')
+    if ffmpeg_path:
+        return ffmpeg_path
+    for ffmpeg_path in FFMPEG_FALLBACK_PATHS:
+        if os.path.isfile(ffmpeg_path):
+            return ffmpeg_path
+    return None
+
+@lru_cache(maxsize=1)
+def find_ffprobe() -> Optional[str]:
+    """
+    ffprobeのパスを探す（PATHになければffmpegと同じディレクトリを確認）
+
+    Returns:
+        ffprobeコマンドのパス（見つからない場合はNone）
+    """
+    ffprobe_path = shutil.which('ffprobe')
+    if ffprobe_path:
+        return ffprobe_path
+    ffmpeg_path = find_ffmpeg()
+    if ffmpeg_path:
+        directory, name = os.path.split(ffmpeg_path)
+        ffprobe_path = os.path.join(directory, name.replace('ffmpeg', 'ffprobe'))
+        if os.path.isfile(ffprobe_path):
+            return ffprobe_path
+    return None
+
 def check_ffmpeg_available() -> tuple:
     """
     ffmpegが利用可能かチェック
@@ -29,47 +112,335 @@ def check_ffmpeg_available() -> tuple:
     Returns:
         (利用可能かどうか, ffmpegコマンドのパス)
     """
-    common_paths = [
-        'ffmpeg',
-        'C:/ffmpeg-8.0.1-essentials_build/bin/ffmpeg.exe',
-        'C:/ffmpeg/bin/ffmpeg.exe',
-        'C:/Program Files/ffmpeg/bin/ffmpeg.exe',
-        'C:/Program Files (x86)/ffmpeg/bin/ffmpeg.exe',
-    ]
+    ffmpeg_path = find_ffmpeg()
+    return (ffmpeg_path is not None, ffmpeg_path)
 
-    for ffmpeg_path in common_paths:
-        try:
-            result = subprocess.run(
-                [ffmpeg_path, '-version'],
-                capture_output=True,
-                text=True,
-                timeout=5
+async def run_ffmpeg(cmd: List[str], timeout: float) -> Tuple[int, str]:
+    """
+    ffmpegを非同期サブプロセスとして実行（イベントループをブロックしない）
+    同時に起動するffmpegの数は流入制御の上限までとし、空きを待つ時間はタイムアウトに含めない
+
+    Args:
+        cmd: 実行するコマンド
+        timeout: タイムアウト秒数
+
+    Returns:
+        (終了コード, 標準エラー出力)
+    """
+    async with resource_slot("ffmpeg"):
+        with span("ffmpeg", command=describe_command(cmd)) as current:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
             )
-            if result.returncode == 0:
-                return (True, ffmpeg_path)
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            continue
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise RuntimeError(f"ffmpegの処理がタイムアウトしました（{timeout}秒経過）")
+            except asyncio.CancelledError:
+                # 終了を待ってから空きを返す（ゾンビプロセスを残さない）
+                process.kill()
+                await process.wait()
+                raise
+            current.set_attribute("returncode", process.returncode)
+
+    return process.returncode, stderr.decode("utf-8", errors="replace")
+
+def describe_command(cmd: List[str], max_length: int = 300) -> str:
+    """トレースに記録するコマンドライン（実行ファイルのディレクトリを除き、長い場合は切り詰める）"""
+    text = ' '.join([os.path.basename(cmd[0]), *cmd[1:]])
+    return text if len(text) <= max_length else text[:max_length] + '...'
+
+def write_concat_list(list_path: str, paths: List[str]):
+    """
+    ffmpegのconcat demuxer用のファイル一覧を書き出す
+
+    Args:
+        list_path: 書き出すファイルのパス
+        paths: 連結する順に並べたファイルのパス
+    """
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+def parse_duration(ffmpeg_output: str) -> Optional[float]:
+    """
+    ffmpegの出力（Duration: HH:MM:SS.xx）から音声の長さを取得
 
-    return (False, None)
+    Returns:
+        長さ（秒）。見つからない場合はNone
+    """
+    match = re.search(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)', ffmpeg_output)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+class AudioInfo:
+    """入力音声の情報（コンテナ形式・コーデック・チャンネル数・サンプルレート・ビットレート・長さ）"""
 
-FFMPEG_AVAILABLE, FFMPEG_PATH = check_ffmpeg_available()
-if FFMPEG_AVAILABLE:
-    logger.info(f"ffmpegを使用した音声処理が利用可能です: {FFMPEG_PATH}")
-else:
-    logger.warning("ffmpegが利用できません")
+    def __init__(
+        self,
+        format_name: str,
+        codec: str,
+        channels: int,
+        sample_rate: int,
+        bit_rate: Optional[int],
+        duration: Optional[float],
+    ):
+        self.format_name = format_name
+        self.codec = codec
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bit_rate = bit_rate  # bps
+        self.duration = duration
+
+    def describe(self) -> str:
+        """ログ出力用の要約"""
+        bit_rate = f"{self.bit_rate / 1000:.0f}kbps" if self.bit_rate else "ビットレート不明"
+        duration = f"{self.duration / 60:.1f}分" if self.duration else "長さ不明"
+        return (
+            f"{self.codec}, {self.channels}ch, {self.sample_rate}Hz, {bit_rate}, {duration} "
+            f"(形式: {self.format_name})"
+        )
+
+def parse_ffprobe_output(output: str) -> Optional[AudioInfo]:
+    """
+    ffprobeのJSON出力から最初の音声ストリームの情報を取得
+
+    Returns:
+        音声の情報。音声ストリームがない場合はNone
+    """
+    data = json.loads(output)
+    streams = [stream for stream in data.get("streams", []) if stream.get("codec_type", "audio") == "audio"]
+    if not streams:
+        return None
+    stream = streams[0]
+    format_info = data.get("format", {})
+
+    def number(value, convert):
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            return None
+
+    return AudioInfo(
+        format_name=format_info.get("format_name", ""),
+        codec=stream.get("codec_name", ""),
+        channels=number(stream.get("channels"), int) or 0,
+        sample_rate=number(stream.get("sample_rate"), int) or 0,
+        bit_rate=number(stream.get("bit_rate"), int) or number(format_info.get("bit_rate"), int),
+        duration=number(format_info.get("duration"), float) or number(stream.get("duration"), float),
+    )
+
+def parse_ffmpeg_info(ffmpeg_output: str) -> Optional[AudioInfo]:
+    """
+    ffmpeg -i の出力から最初の音声ストリームの情報を取得（ffprobeがない環境向け）
+
+    Returns:
+        音声の情報。音声ストリームがない場合はNone
+    """
+    stream = re.search(
+        r'Stream #0:\d+.*?: Audio: (\w+)[^\n]*?, (\d+) Hz, ([^,\n]+)(?:, [^,\n]+)?(?:, (\d+) kb/s)?',
+        ffmpeg_output
+    )
+    if not stream:
+        return None
+    codec, sample_rate, layout, stream_kbps = stream.groups()
+    channel_count = re.match(r'(\d+) channels', layout)
+    channels = 1 if layout == 'mono' else int(channel_count.group(1)) if channel_count else 2
+
+    format_match = re.search(r'Input #0, (.+?), from ', ffmpeg_output)
+    total_kbps = re.search(r'bitrate: (\d+) kb/s', ffmpeg_output)
+    kbps = stream_kbps or (total_kbps.group(1) if total_kbps else None)
+    return AudioInfo(
+        format_name=format_match.group(1) if format_match else "",
+        codec=codec,
+        channels=channels,
+        sample_rate=int(sample_rate),
+        bit_rate=int(kbps) * 1000 if kbps else None,
+        duration=parse_duration(ffmpeg_output),
+    )
+
+class AudioProfile:
+    """圧縮プロファイル（コーデック・ビットレート・出力形式）"""
+
+    def __init__(self, name: str, codec: str, bitrate: str, extension: str, extra_args: Optional[List[str]] = None):
+        self.name = name
+        self.codec = codec
+        self.bitrate = bitrate
+        self.extension = extension
+        self.extra_args = extra_args or []
+
+    @property
+    def format(self) -> str:
+        """PyDubの出力形式名"""
+        return self.extension.lstrip('.')
+
+    @property
+    def bit_rate(self) -> int:
+        """ビットレート（bps）"""
+        return int(self.bitrate.rstrip('k')) * 1000
+
+# 同じ入力から常に同じバイト列を出力する（Oggのストリームのシリアル番号は既定では実行ごとに乱数になり、
+# 圧縮後の音声のハッシュをキーにする解析結果のキャッシュが当たらなくなるため）
+BITEXACT_ARGS = ['-fflags', '+bitexact', '-flags:a', '+bitexact']
+
+AUDIO_PROFILES = {
+    # Opusは低ビットレートでも音声の明瞭さが保たれる（voipモードは音声向けの調整）
+    # 最高の圧縮レベル（10）は時間がかかる割にサイズがほぼ変わらないため5にする
+    "opus16": AudioProfile("opus16", "libopus", "16k", ".ogg", ['-application', 'voip', '-compression_level', '5']),
+    "opus24": AudioProfile("opus24", "libopus", "24k", ".ogg", ['-application', 'voip', '-compression_level', '5']),
+    "mp3_32": AudioProfile("mp3_32", "libmp3lame", "32k", ".mp3"),
+    "mp3_64": AudioProfile("mp3_64", "libmp3lame", "64k", ".mp3"),
+}
+
+class SilenceTrimMap:
+    """無音除去後の時刻と元の録音の時刻の対応（残した区間の一覧）"""
+
+    def __init__(self, kept: List[Tuple[float, float]], original_duration: float):
+        """
+        Args:
+            kept: 残した区間 (元の録音での開始, 終了) のリスト（時刻順）
+            original_duration: 元の録音の長さ（秒）
+        """
+        self.kept = kept
+        self.original_duration = original_duration
+        # 除去後の音声での各区間の開始時刻
+        self.trimmed_starts = []
+        position = 0.0
+        for start, end in kept:
+            self.trimmed_starts.append(position)
+            position += end - start
+        self.trimmed_duration = position
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.original_duration - self.trimmed_duration
+
+    def to_original(self, trimmed_time: float) -> float:
+        """
+        除去後の音声の時刻を元の録音の時刻に変換
+
+        Args:
+            trimmed_time: 除去後の音声での時刻（秒）
+
+        Returns:
+            元の録音での時刻（秒）
+        """
+        if not self.kept:
+            return trimmed_time
+        index = max(0, bisect.bisect_right(self.trimmed_starts, trimmed_time) - 1)
+        start, end = self.kept[index]
+        return min(start + max(trimmed_time - self.trimmed_starts[index], 0.0), end)
+
+    def describe(self) -> str:
+        """ログ出力用の要約"""
+        ratio = self.removed_seconds / self.original_duration if self.original_duration else 0
+        return (
+            f"{self.original_duration / 60:.1f}分 → {self.trimmed_duration / 60:.1f}分 "
+            f"（{self.removed_seconds:.0f}秒・{ratio:.0%}を除去, {len(self.kept)}区間）"
+        )
 
 class AudioProcessor:
-    TARGET_BITRATE = "64k"
     TARGET_SAMPLE_RATE = 16000
+    DEFAULT_PROFILE = "mp3_64"  # 長さが分からない場合のプロファイル（従来の設定）
+    # 自動選択：この長さ（秒）以上ならこのプロファイル（長い録音ほどGeminiへのアップロード量を減らす）
+    PROFILE_RULES = [(7200, "opus16"), (1800, "opus24"), (600, "mp3_32"), (0, "mp3_64")]
+    # 非可逆圧縮済みの入力は再圧縮で劣化が重なるため、1段階高いビットレートを選ぶ
+    LOSSY_EXTENSIONS = {'.mp3', '.m4a', '.aac', '.mp4', '.ogg', '.opus', '.webm', '.wma', '.amr', '.3gp'}
+    # 長さを事前に取得できない場合（ストリーミング圧縮）の推定に使う1秒あたりのバイト数
+    TYPICAL_BYTES_PER_SECOND = {'.wav': 176400, '.flac': 88200, '.ogg': 4000, '.opus': 4000, '.webm': 4000}
+    TYPICAL_BYTES_PER_SECOND_DEFAULT = 16000  # 128kbps
+    STREAM_CHUNK_SIZE = 4 * 1024 * 1024  # ストリーミング時の読み込み単位（4MB）
+    STREAM_PREFETCH_CHUNKS = 4  # ストリーミング時に先読みするチャンク数
+    NON_STREAMABLE_EXTENSIONS = {'.m4a', '.mp4', '.mov', '.3gp', '.3g2', '.qt'}
+    # 再エンコードせずに使えるコーデック → 音声だけを取り出す場合の出力形式
+    PASSTHROUGH_CODECS = {'mp3': '.mp3', 'aac': '.aac', 'opus': '.ogg', 'vorbis': '.ogg'}
+    # そのままGeminiへ渡せるコンテナ形式（ffprobeのformat_name）→ 対応するコーデック
+    PASSTHROUGH_FORMATS = {'mp3': {'mp3'}, 'ogg': {'opus', 'vorbis'}}
+    PASSTHROUGH_MAX_SAMPLE_RATE = 24000  # これより高いサンプルレートは16kHzに下げる
+    PASSTHROUGH_BITRATE_TOLERANCE = 1.25  # 選択したプロファイルのビットレートの何倍までそのまま使うか
+    # このサイズ以下の圧縮済み音声はストリーミングせずにダウンロードし、再エンコードが必要か確認する
+    PASSTHROUGH_PROBE_MAX_BYTES = 64 * 1024 * 1024
+    PARALLEL_MIN_SECONDS = 1200  # この長さ（秒）以上の音声は時間で区切って並列に圧縮する
+    PARALLEL_MIN_SEGMENT_SECONDS = 300  # 並列圧縮の1区間の最短の長さ（秒）
+    SEGMENT_ALIGN_SECONDS = 0.18  # 区切り位置の単位（MP3(16kHz)の1フレーム36msとOpusの20msの公倍数）
+    PARALLEL_JOINT_TOLERANCE = 0.1  # 継ぎ目1か所あたりに許容する長さの差（秒、エンコーダーの先頭の遅延分）
+    SILENCE_THRESHOLD = "-35dB"  # 分割時に無音とみなす音量
+    SILENCE_MIN_DURATION = 0.5  # 分割時に無音とみなす最短の長さ（秒）
+    SILENCE_SEARCH_RATIO = 0.2  # 分割点を探す範囲（セグメント長に対する割合）
+    TRIM_SILENCE_THRESHOLD = "-40dB"  # 無音除去で無音とみなす音量（分割より厳しくし、小さな話し声は残す）
+    TRIM_MIN_SILENCE_SECONDS = 3.0  # この長さ以上の無音だけを除去する（会話の間は残す）
+    TRIM_PADDING_SECONDS = 0.5  # 除去する無音の前後に残す長さ（話し始め・話し終わりを切らない）
+    TRIM_MIN_REMOVED_SECONDS = 10.0  # 除去できる長さの合計がこれ未満なら元のファイルを使う
+
+    def __init__(self, profile: str = "auto", encode_workers: int = 0, trim_silence: bool = False):
+        """
+        AudioProcessorの初期化
+
+        Args:
+            profile: 圧縮プロファイル名（auto の場合は音声の長さと入力形式から選択）
+            encode_workers: 長い音声を並列に圧縮するときのffmpegの同時実行数（0の場合はCPU数、1で並列圧縮しない）
+            trim_silence: 圧縮後の音声から長い無音を除去するか（trim_silence()を呼び出し側で実行する）
+        """
+        if profile != "auto" and profile not in AUDIO_PROFILES:
+            raise ValueError(f"不明な圧縮プロファイルです: {profile}（{', '.join(AUDIO_PROFILES)} または auto）")
+        self.profile = profile
+        self.encode_workers = encode_workers or os.cpu_count() or 1
+        self.trim_silence_enabled = trim_silence
+        # 作成した一時ファイル（ジョブの終了時に release_temp_files で外すため、処理中のものだけが残る）
+        self.temp_files = set()
+        self.ffmpeg_path = find_ffmpeg()
+        if self.ffmpeg_path:
+            logger.info(f"ffmpegを使用した音声処理が利用可能です: {self.ffmpeg_path}")
+        else:
+            logger.warning("ffmpegが利用できません")
 
-    def __init__(self):
-        """AudioProcessorの初期化"""
-        self.temp_files = []
+    def choose_profile(self, duration: Optional[float], filename: str) -> AudioProfile:
+        """
+        音声の長さと入力形式から圧縮プロファイルを選択
+
+        Args:
+            duration: 音声の長さ（秒）。不明な場合はNone
+            filename: 入力ファイル名（拡張子で入力形式を判定）
+
+        Returns:
+            圧縮プロファイル
+        """
+        if self.profile != "auto":
+            return AUDIO_PROFILES[self.profile]
+        if duration is None:
+            return AUDIO_PROFILES[self.DEFAULT_PROFILE]
+
+        index = next(i for i, (min_duration, _) in enumerate(self.PROFILE_RULES) if duration >= min_duration)
+        if os.path.splitext(filename)[1].lower() in self.LOSSY_EXTENSIONS:
+            index = min(index + 1, len(self.PROFILE_RULES) - 1)
+        return AUDIO_PROFILES[self.PROFILE_RULES[index][1]]
 
-    def process_audio(self, file_path: str) -> List[str]:
+    def estimate_duration(self, file_size: int, filename: str) -> float:
+        """
+        ファイルサイズと形式から音声の長さを大まかに推定（ストリーミング圧縮でプロファイルを選ぶため）
+
+        Args:
+            file_size: ファイルサイズ（バイト）
+            filename: ファイル名（拡張子で形式を判定）
+
+        Returns:
+            推定した長さ（秒）
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        return file_size / self.TYPICAL_BYTES_PER_SECOND.get(ext, self.TYPICAL_BYTES_PER_SECOND_DEFAULT)
+
+    async def process_audio(self, file_path: str) -> List[str]:
         """
         音声ファイルを処理（圧縮のみ、分割なし）
         メモリ効率のため、ffmpegを優先使用
+        ffmpegは非同期サブプロセス、PyDubはスレッドで実行し、イベントループをブロックしない
 
         Args:
             file_path: 入力音声ファイルのパス
@@ -83,49 +454,194 @@ class AudioProcessor:
             logger.info(f"入力ファイルサイズ: {file_size_mb:.2f} MB")
 
             # 大きなファイル（50MB以上）または常にffmpegを優先使用（メモリ効率が良い）
-            if FFMPEG_AVAILABLE:
-                logger.info("ffmpegを使用してファイルを圧縮します（メモリ効率優先）")
-                return [self._compress_with_ffmpeg(file_path)]
-
-            # ffmpegが使えない場合のみPyDubを使用
-            if PYDUB_AVAILABLE:
-                logger.info("PyDubを使用してファイルを圧縮します")
-                # PyDubで音声ファイルを読み込み
-                audio = AudioSegment.from_file(file_path)
-                duration_minutes = len(audio) / (1000 * 60)
-                logger.info(
-                    f"音声情報 - 長さ: {duration_minutes:.2f}分, "
-                    f"チャンネル: {audio.channels}, サンプルレート: {audio.frame_rate}Hz"
-                )
+            if self.ffmpeg_path:
+                info = await self.probe(file_path)
+                profile = self.choose_profile(info.duration if info else None, file_path)
 
-                # 圧縮処理
-                logger.info("音声ファイルを圧縮します（モノラル、16kHz）")
-                audio = self._compress_audio(audio)
+                # 既に目標以下の圧縮済み音声は再エンコードしない
+                decision = self.plan_fast_path(info, profile) if info else None
+                self._record_input(info, decision or "encode")
+                if decision == "passthrough":
+                    logger.info("入力音声は圧縮済みのため、そのまま使用します")
+                    return [file_path]
+                if decision == "remux":
+                    logger.info("入力音声は圧縮済みのため、再エンコードせずに音声だけを取り出します")
+                    return [await self._remux_with_ffmpeg(file_path, self.PASSTHROUGH_CODECS[info.codec])]
 
-                # 圧縮済みファイルを出力
-                output_path = tempfile.mktemp(suffix=".mp3")
-                audio.export(output_path, format="mp3", bitrate=self.TARGET_BITRATE)
-                output_size = os.path.getsize(output_path)
-                logger.info(f"圧縮完了 - 出力サイズ: {output_size / (1024 * 1024):.2f} MB")
-                self.temp_files.append(output_path)
+                if info and self._should_encode_in_parallel(info.duration):
+                    try:
+                        return [await self._compress_parallel(file_path, profile, info.duration)]
+                    except Exception as e:
+                        logger.warning(f"並列圧縮に失敗したため、1プロセスで圧縮します: {str(e)}")
 
-                # メモリ解放
-                del audio
+                logger.info(f"ffmpegを使用してファイルを圧縮します（メモリ効率優先、プロファイル: {profile.name}）")
+                return [await self._compress_with_ffmpeg(file_path, profile)]
 
-                return [output_path]
+            # ffmpegが使えない場合のみPyDubを使用
+            if PYDUB_AVAILABLE:
+                logger.info("PyDubを使用してファイルを圧縮します")
+                return [await asyncio.to_thread(self._compress_with_pydub, file_path)]
 
             # どちらも使えない場合
             logger.warning("音声処理機能が無効のため、元のファイルをそのまま使用します")
             _, ext = os.path.splitext(file_path)
             output_path = tempfile.mktemp(suffix=ext)
-            shutil.copy2(file_path, output_path)
-            self.temp_files.append(output_path)
+            await asyncio.to_thread(shutil.copy2, file_path, output_path)
+            self.temp_files.add(output_path)
             return [output_path]
 
         except Exception as e:
             logger.error(f"音声処理エラー: {str(e)}")
             raise
 
+    async def probe(self, file_path: str) -> Optional[AudioInfo]:
+        """
+        入力音声の情報を取得（ffprobe、なければffmpeg -i の出力から。ヘッダーのみでデコードはしない）
+
+        Args:
+            file_path: 音声ファイルのパス
+
+        Returns:
+            音声の情報。取得できない場合はNone
+        """
+        try:
+            ffprobe_path = find_ffprobe()
+            if ffprobe_path:
+                cmd = [
+                    ffprobe_path, '-v', 'error',
+                    '-select_streams', 'a:0',
+                    '-show_entries', 'format=format_name,duration,bit_rate:stream=codec_name,channels,sample_rate,bit_rate',
+                    '-of', 'json',
+                    file_path
+                ]
+                with span("ffprobe", command=describe_command(cmd)):
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                    try:
+                        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=30)
+                    except (asyncio.TimeoutError, asyncio.CancelledError):
+                        # タイムアウト・取り消し時はffprobeを終了させてから抜ける（ゾンビプロセスを残さない）
+                        process.kill()
+                        await process.wait()
+                        raise
+                info = parse_ffprobe_output(stdout.decode("utf-8", errors="replace")) if process.returncode == 0 else None
+            else:
+                _, stderr = await run_ffmpeg([self.ffmpeg_path, '-hide_banner', '-i', file_path], timeout=30)
+                info = parse_ffmpeg_info(stderr)
+        except Exception as e:
+            logger.warning(f"入力音声の情報を取得できませんでした: {str(e)}")
+            return None
+
+        if info is None:
+            logger.warning(f"入力音声の情報を取得できませんでした: {file_path}")
+        else:
+            logger.info(f"入力音声: {info.describe()}")
+        return info
+
+    def plan_fast_path(self, info: AudioInfo, profile: AudioProfile) -> Optional[str]:
+        """
+        再エンコードを省略できるか判定
+
+        Args:
+            info: 入力音声の情報
+            profile: 再エンコードする場合に使う圧縮プロファイル
+
+        Returns:
+            passthrough（そのまま使う） / remux（音声だけを再エンコードせずに取り出す） / None（再エンコードが必要）
+        """
+        if info.codec not in self.PASSTHROUGH_CODECS or info.channels != 1 or not info.bit_rate:
+            return None
+        # Opusはデコード時のサンプルレートが常に48kHzと報告されるため、ビットレートのみで判定する
+        if info.codec != 'opus' and info.sample_rate > self.PASSTHROUGH_MAX_SAMPLE_RATE:
+            return None
+        if info.bit_rate > profile.bit_rate * self.PASSTHROUGH_BITRATE_TOLERANCE:
+            return None
+
+        formats = info.format_name.split(',')
+        if any(info.codec in self.PASSTHROUGH_FORMATS.get(name, ()) for name in formats):
+            return "passthrough"
+        return "remux"
+
+    def _record_input(self, info: Optional[AudioInfo], decision: str):
+        """入力音声の情報と圧縮の要否をメトリクスに記録"""
+        AUDIO_INPUTS.inc(codec=info.codec if info else "unknown", decision=decision)
+        if info and info.duration:
+            AUDIO_INPUT_DURATION_SECONDS.observe(info.duration)
+        if info and info.bit_rate:
+            AUDIO_INPUT_BITRATE_KBPS.observe(info.bit_rate / 1000)
+
+    async def _remux_with_ffmpeg(self, file_path: str, extension: str) -> str:
+        """
+        音声ストリームだけを再エンコードせずに取り出す（M4A内のAACなど）
+
+        Args:
+            file_path: 入力音声ファイルのパス
+            extension: 出力形式の拡張子
+
+        Returns:
+            取り出した音声ファイルのパス
+        """
+        output_path = tempfile.mktemp(suffix=extension)
+        cmd = [
+            self.ffmpeg_path,
+            '-i', file_path,
+            '-map', '0:a:0',
+            '-c:a', 'copy',
+            *BITEXACT_ARGS,
+            '-y',
+            output_path
+        ]
+        returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+        if returncode != 0:
+            logger.error(f"ffmpegエラー: {stderr}")
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+            raise RuntimeError("音声の取り出しに失敗しました")
+
+        self.temp_files.add(output_path)
+        return output_path
+
+    def _compress_with_pydub(self, file_path: str) -> str:
+        """
+        PyDubを使用して音声ファイルを圧縮（CPU処理のためスレッドから呼び出す）
+
+        Args:
+            file_path: 入力音声ファイルのパス
+
+        Returns:
+            圧縮された音声ファイルのパス
+        """
+        # PyDubで音声ファイルを読み込み
+        audio = AudioSegment.from_file(file_path)
+        duration_minutes = len(audio) / (1000 * 60)
+        logger.info(
+            f"音声情報 - 長さ: {duration_minutes:.2f}分, "
+            f"チャンネル: {audio.channels}, サンプルレート: {audio.frame_rate}Hz"
+        )
+
+        # 圧縮処理
+        profile = self.choose_profile(len(audio) / 1000, file_path)
+        logger.info(f"音声ファイルを圧縮します（モノラル、16kHz、プロファイル: {profile.name}）")
+        audio = self._compress_audio(audio)
+
+        # 圧縮済みファイルを出力
+        output_path = tempfile.mktemp(suffix=profile.extension)
+        audio.export(
+            output_path, format=profile.format, codec=profile.codec,
+            bitrate=profile.bitrate, parameters=[*profile.extra_args, *BITEXACT_ARGS]
+        )
+        output_size = os.path.getsize(output_path)
+        logger.info(f"圧縮完了 - 出力サイズ: {output_size / (1024 * 1024):.2f} MB")
+        self.temp_files.add(output_path)
+
+        # メモリ解放
+        del audio
+
+        return output_path
+
     def _compress_audio(self, audio: AudioSegment) -> AudioSegment:
         """
         音声ファイルを圧縮
@@ -148,51 +664,560 @@ class AudioProcessor:
 
         return audio
 
-    def _compress_with_ffmpeg(self, file_path: str) -> str:
+    def _encode_args(self, profile: AudioProfile) -> List[str]:
+        """ffmpegのエンコード設定（モノラル、16kHz、プロファイルのコーデック・ビットレート、出力の固定）"""
+        return [
+            '-vn',
+            '-c:a', profile.codec,
+            '-b:a', profile.bitrate,
+            *profile.extra_args,
+            '-ar', str(self.TARGET_SAMPLE_RATE),
+            '-ac', '1',
+            *BITEXACT_ARGS,
+        ]
+
+    async def _compress_with_ffmpeg(self, file_path: str, profile: AudioProfile) -> str:
         """
         ffmpegを使用して音声ファイルを圧縮
 
         Args:
             file_path: 入力音声ファイルのパス
+            profile: 圧縮プロファイル
 
         Returns:
             圧縮された音声ファイルのパス
         """
-        output_path = tempfile.mktemp(suffix=".mp3")
+        output_path = tempfile.mktemp(suffix=profile.extension)
 
         cmd = [
-            FFMPEG_PATH,
+            self.ffmpeg_path,
             '-i', file_path,
-            '-c:a', 'libmp3lame',
-            '-b:a', '64k',
-            '-ar', '16000',
-            '-ac', '1',
+            *self._encode_args(profile),
             '-y',
             output_path
         ]
 
         logger.info("ffmpegで音声ファイルを圧縮中...")
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=600  # 10分タイムアウト
-        )
+        returncode, stderr = await run_ffmpeg(cmd, timeout=600)  # 10分タイムアウト
 
-        if result.returncode != 0:
-            logger.error(f"ffmpegエラー: {result.stderr}")
+        if returncode != 0:
+            logger.error(f"ffmpegエラー: {stderr}")
             raise RuntimeError(f"音声圧縮に失敗しました")
 
         output_size = os.path.getsize(output_path)
         logger.info(f"圧縮完了 - 出力サイズ: {output_size / (1024 * 1024):.2f} MB")
 
-        self.temp_files.append(output_path)
+        self.temp_files.add(output_path)
         return output_path
 
+    def _should_encode_in_parallel(self, duration: Optional[float]) -> bool:
+        return (
+            self.encode_workers > 1
+            and duration is not None
+            and duration >= max(self.PARALLEL_MIN_SECONDS, self.PARALLEL_MIN_SEGMENT_SECONDS * 2)
+        )
+
+    def _parallel_ranges(self, duration: float) -> List[Tuple[float, Optional[float]]]:
+        """
+        並列圧縮の区間を決める（区切り位置はフレーム長の倍数にそろえ、継ぎ目で端数のフレームが入らないようにする）
+
+        Args:
+            duration: 音声の長さ（秒）
+
+        Returns:
+            (開始位置, 長さ) のリスト（最後の区間の長さはNoneで末尾まで）
+        """
+        count = max(1, min(self.encode_workers, int(duration // self.PARALLEL_MIN_SEGMENT_SECONDS)))
+        length = (duration / count) // self.SEGMENT_ALIGN_SECONDS * self.SEGMENT_ALIGN_SECONDS
+        ranges = [(round(i * length, 3), round(length, 3)) for i in range(count - 1)]
+        ranges.append((round((count - 1) * length, 3), None))
+        return ranges
+
+    async def _compress_parallel(self, file_path: str, profile: AudioProfile, duration: float) -> str:
+        """
+        音声を時間で区切って区間ごとに別のffmpegプロセスで同時に圧縮し、
+        concat demuxerで再エンコードせずに連結する（libmp3lameなどは1コアしか使わないため）
+
+        Args:
+            file_path: 入力音声ファイルのパス
+            profile: 圧縮プロファイル
+            duration: 入力音声の長さ（秒）
+
+        Returns:
+            圧縮された音声ファイルのパス
+        """
+        ranges = self._parallel_ranges(duration)
+        logger.info(
+            f"ffmpegで音声ファイルを並列に圧縮中...（{len(ranges)}区間, 同時実行数: {self.encode_workers}, "
+            f"プロファイル: {profile.name}）"
+        )
+
+        work_dir = tempfile.mkdtemp(prefix="encode_")
+        semaphore = asyncio.Semaphore(self.encode_workers)
+
+        async def encode_range(index: int, start: float, length: Optional[float]) -> str:
+            part_path = os.path.join(work_dir, f"part_{index:03d}{profile.extension}")
+            cmd = [
+                self.ffmpeg_path, '-hide_banner',
+                '-ss', f'{start:.3f}',
+                *(['-t', f'{length:.3f}'] if length is not None else []),
+                '-i', file_path,
+                *self._encode_args(profile),
+                '-y',
+                part_path
+            ]
+            async with semaphore:
+                returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+            if returncode != 0:
+                logger.error(f"ffmpegエラー: {stderr}")
+                raise RuntimeError(f"区間{index + 1}の圧縮に失敗しました")
+            return part_path
+
+        output_path = tempfile.mktemp(suffix=profile.extension)
+        try:
+            with span("audio.encode_ranges", ranges=len(ranges), workers=self.encode_workers):
+                tasks = [
+                    asyncio.create_task(encode_range(i, start, length)) for i, (start, length) in enumerate(ranges)
+                ]
+                try:
+                    part_paths = await asyncio.gather(*tasks)
+                except BaseException:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+
+            list_path = os.path.join(work_dir, "parts.txt")
+            write_concat_list(list_path, part_paths)
+
+            cmd = [
+                self.ffmpeg_path, '-hide_banner',
+                '-f', 'concat', '-safe', '0',
+                '-i', list_path,
+                '-c', 'copy',
+                *BITEXACT_ARGS,
+                '-y',
+                output_path
+            ]
+            returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+            if returncode != 0:
+                logger.error(f"ffmpegエラー: {stderr}")
+                raise RuntimeError("圧縮した区間の連結に失敗しました")
+        except BaseException:
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        # 継ぎ目ごとにエンコーダーの先頭の遅延分だけ長くなるため、それを超える差があれば使わない
+        output_duration = await self.get_duration(output_path)
+        tolerance = self.PARALLEL_JOINT_TOLERANCE * len(ranges)
+        if output_duration is None or abs(output_duration - duration) > tolerance:
+            os.unlink(output_path)
+            raise RuntimeError(
+                f"並列圧縮した音声の長さが入力と一致しません（入力 {duration:.2f}秒, 出力 {output_duration}秒）"
+            )
+
+        output_size = os.path.getsize(output_path)
+        logger.info(
+            f"圧縮完了 - 出力サイズ: {output_size / (1024 * 1024):.2f} MB, "
+            f"長さの差: {output_duration - duration:+.3f}秒"
+        )
+        self.temp_files.add(output_path)
+        return output_path
+
+    def can_stream(self, filename: str, file_size: int = 0) -> bool:
+        """
+        ストリーミング圧縮（一時ファイルなし）が可能か判定
+
+        MP4/M4A系はmoovアトムがファイル末尾にあることが多く、
+        シークできないパイプ入力では解析できないため対象外とする
+        小さな圧縮済み音声は再エンコード自体が不要な場合があるため、ダウンロードして確認する
+        並列圧縮の対象になる長い音声も、区間ごとに読み込むためダウンロードする
+
+        Args:
+            filename: 入力ファイル名（拡張子で判定）
+            file_size: 入力のサイズ（バイト）
+
+        Returns:
+            ストリーミング圧縮が可能かどうか
+        """
+        _, ext = os.path.splitext(filename)
+        ext = ext.lower()
+        if ext in self.LOSSY_EXTENSIONS and 0 < file_size <= self.PASSTHROUGH_PROBE_MAX_BYTES:
+            return False
+        # 長い音声は、ダウンロードしてから複数のプロセスで圧縮した方が速い
+        if file_size and self._should_encode_in_parallel(self.estimate_duration(file_size, filename)):
+            return False
+        return bool(self.ffmpeg_path) and ext not in self.NON_STREAMABLE_EXTENSIONS
+
+    async def process_stream(self, reader, file_size: int = 0, filename: str = "") -> List[str]:
+        """
+        入力を読み込みながらffmpegの標準入力へ流し込んで圧縮
+        ダウンロードとエンコードを並行して行い、入力の一時ファイルを作らない
+
+        Args:
+            reader: read(size)でバイト列を返すファイルライクオブジェクト（GCSのBlobReaderなど）
+            file_size: 入力のサイズ（バイト）。プロファイル選択のための長さの推定に使う
+            filename: 入力のファイル名（拡張子で入力形式を判定）
+
+        Returns:
+            処理済み音声ファイルのパスのリスト（1ファイルのみ）
+        """
+        estimated_duration = self.estimate_duration(file_size, filename) if file_size else None
+        profile = self.choose_profile(estimated_duration, filename)
+        # 読み込みながら圧縮するため、事前の情報取得は行わない
+        self._record_input(None, "encode")
+        output_path = tempfile.mktemp(suffix=profile.extension)
+        self.temp_files.add(output_path)
+
+        cmd = [
+            self.ffmpeg_path,
+            '-i', 'pipe:0',
+            *self._encode_args(profile),
+            '-y',
+            output_path
+        ]
+
+        logger.info(f"ffmpegでストリーミング圧縮中...（プロファイル: {profile.name}）")
+
+        async with resource_slot("ffmpeg"):
+            with span("ffmpeg", command=describe_command(cmd), streaming=True) as current:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+
+                try:
+                    input_size, stderr, _ = await asyncio.wait_for(
+                        asyncio.gather(
+                            self._feed_stdin(process, reader),
+                            process.stderr.read(),
+                            process.wait(),
+                        ),
+                        timeout=600  # 10分タイムアウト
+                    )
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise RuntimeError("ffmpegの処理がタイムアウトしました（600秒経過）")
+                except BaseException:
+                    if process.returncode is None:
+                        process.kill()
+                        await process.wait()
+                    if os.path.exists(output_path):
+                        os.unlink(output_path)
+                    raise
+                current.set_attribute("input_bytes", input_size)
+                current.set_attribute("returncode", process.returncode)
+
+        if process.returncode != 0:
+            logger.error(f"ffmpegエラー: {stderr.decode('utf-8', errors='replace')}")
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+            raise RuntimeError("音声圧縮に失敗しました")
+
+        output_size = os.path.getsize(output_path)
+        logger.info(
+            f"圧縮完了 - 入力サイズ: {input_size / (1024 * 1024):.2f} MB, "
+            f"出力サイズ: {output_size / (1024 * 1024):.2f} MB"
+        )
+        return [output_path]
+
+    async def _feed_stdin(self, process, reader) -> int:
+        """
+        readerからチャンク単位で読み込み、ffmpegの標準入力へ書き込む
+        読み込み（ブロッキングI/Oのためスレッドで実行）は先読みし、
+        ffmpegへの書き込みと重ねてダウンロードがエンコード待ちで止まらないようにする
+
+        Returns:
+            書き込んだバイト数
+        """
+        chunks = asyncio.Queue(maxsize=self.STREAM_PREFETCH_CHUNKS)
+
+        async def read_chunks():
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(reader.read, self.STREAM_CHUNK_SIZE)
+                    await chunks.put(chunk)
+                    if not chunk:
+                        break
+            except Exception:
+                # 書き込み側の待機を解除してから、読み込みエラーを伝播させる
+                await chunks.put(b"")
+                raise
+
+        read_task = asyncio.create_task(read_chunks())
+        total = 0
+        try:
+            while True:
+                chunk = await chunks.get()
+                if not chunk:
+                    break
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+                total += len(chunk)
+            await read_task
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpegが先に終了した場合（原因は終了コードと標準エラーで判定する）
+            logger.warning("ffmpegが入力の途中で終了しました")
+        finally:
+            read_task.cancel()
+            process.stdin.close()
+        return total
+
+    async def get_duration(self, file_path: str) -> Optional[float]:
+        """
+        音声ファイルの長さを取得（ffmpegのヘッダー情報から読み取り、デコードはしない）
+
+        Args:
+            file_path: 音声ファイルのパス
+
+        Returns:
+            長さ（秒）。取得できない場合はNone
+        """
+        if not self.ffmpeg_path:
+            return None
+
+        # 出力を指定しないためffmpegは終了コード1で終わるが、入力情報は標準エラーに出力される
+        _, stderr = await run_ffmpeg([self.ffmpeg_path, '-hide_banner', '-i', file_path], timeout=30)
+        duration = parse_duration(stderr)
+        if duration is None:
+            logger.warning(f"音声の長さを取得できませんでした: {file_path}")
+        return duration
+
+    async def _detect_silence(
+        self, file_path: str, threshold: str, min_duration: float
+    ) -> Tuple[float, List[Tuple[float, float]]]:
+        """
+        ffmpegのsilencedetectで無音区間を検出
+
+        Args:
+            file_path: 音声ファイルのパス
+            threshold: 無音とみなす音量（-35dB など）
+            min_duration: 無音とみなす最短の長さ（秒）
+
+        Returns:
+            (音声の長さ, 無音区間 (開始, 終了) のリスト)。末尾まで続く無音は音声の長さで終わる
+        """
+        cmd = [
+            self.ffmpeg_path, '-hide_banner', '-nostats',
+            '-i', file_path,
+            '-af', f'silencedetect=noise={threshold}:d={min_duration}',
+            '-f', 'null', '-'
+        ]
+        returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+        if returncode != 0:
+            logger.error(f"ffmpegエラー: {stderr}")
+            raise RuntimeError("無音区間の検出に失敗しました")
+
+        duration = parse_duration(stderr)
+        if duration is None:
+            raise RuntimeError("音声の長さを取得できませんでした")
+
+        starts = [max(float(v), 0.0) for v in re.findall(r'silence_start:\s*(-?\d+(?:\.\d+)?)', stderr)]
+        ends = [float(v) for v in re.findall(r'silence_end:\s*(-?\d+(?:\.\d+)?)', stderr)]
+        ends += [duration] * (len(starts) - len(ends))
+        return duration, list(zip(starts, ends))
+
+    async def trim_silence(self, file_path: str) -> Tuple[str, Optional[SilenceTrimMap]]:
+        """
+        長い無音（移動中や電話待ちなど）を除去（再エンコードなし）
+        無音の前後を少し残して区間の境界で分割し、残す区間だけをconcat demuxerで連結する
+
+        Args:
+            file_path: 圧縮済みの音声ファイルのパス
+
+        Returns:
+            (除去後の音声ファイルのパス, 時刻の対応)。除去するほどの無音がない場合は (元のパス, None)
+        """
+        duration, silences = await self._detect_silence(
+            file_path, self.TRIM_SILENCE_THRESHOLD, self.TRIM_MIN_SILENCE_SECONDS
+        )
+
+        # 無音の前後にTRIM_PADDING_SECONDSずつ残し、その間を除去する
+        kept = []
+        position = 0.0
+        for start, end in silences:
+            cut_start = start + self.TRIM_PADDING_SECONDS if start > 0 else 0.0
+            cut_end = end - self.TRIM_PADDING_SECONDS if end < duration else duration
+            if cut_end <= cut_start:
+                continue
+            if cut_start > position:
+                kept.append((position, cut_start))
+            position = cut_end
+        if position < duration:
+            kept.append((position, duration))
+
+        trim_map = SilenceTrimMap(kept, duration)
+        AUDIO_SILENCE_REMOVED_SECONDS.observe(trim_map.removed_seconds)
+        AUDIO_SILENCE_REMOVED_RATIO.observe(trim_map.removed_seconds / duration if duration else 0)
+        if not kept or trim_map.removed_seconds < self.TRIM_MIN_REMOVED_SECONDS:
+            logger.info(f"除去する無音がないため、元の音声を使用します（無音 {trim_map.removed_seconds:.0f}秒）")
+            return file_path, None
+
+        # 残す区間の境界で分割し（ストリームコピーのためパケット単位で正確に切れる）、残す区間だけを連結する
+        # concat demuxerのinpointはOggではページ単位にしかシークできず、継ぎ目ごとに時刻がずれるため使わない
+        cut_times = [point for start, end in kept for point in (start, end) if 0 < point < duration]
+        kept_starts = {round(start, 3) for start, _ in kept}
+        _, ext = os.path.splitext(file_path)
+        output_path = tempfile.mktemp(suffix=ext)
+        work_dir = tempfile.mkdtemp(prefix="trim_")
+        try:
+            cmd = [
+                self.ffmpeg_path, '-hide_banner',
+                '-i', file_path,
+                '-f', 'segment',
+                '-segment_times', ','.join(f'{point:.3f}' for point in cut_times),
+                '-reset_timestamps', '1',
+                '-c', 'copy',
+                *BITEXACT_ARGS,
+                '-y',
+                os.path.join(work_dir, f'piece_%05d{ext}')
+            ]
+            returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+            if returncode != 0:
+                logger.error(f"ffmpegエラー: {stderr}")
+                raise RuntimeError("無音の除去に失敗しました")
+
+            pieces = sorted(name for name in os.listdir(work_dir) if name.startswith('piece_'))
+            piece_starts = [0.0] + cut_times
+            list_path = os.path.join(work_dir, "pieces.txt")
+            write_concat_list(list_path, [
+                os.path.join(work_dir, name)
+                for name, start in zip(pieces, piece_starts) if round(start, 3) in kept_starts
+            ])
+            cmd = [
+                self.ffmpeg_path, '-hide_banner',
+                '-f', 'concat', '-safe', '0',
+                '-i', list_path,
+                '-c', 'copy',
+                *BITEXACT_ARGS,
+                '-y',
+                output_path
+            ]
+            returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+            if returncode != 0:
+                logger.error(f"ffmpegエラー: {stderr}")
+                raise RuntimeError("無音の除去に失敗しました")
+        except BaseException:
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        self.temp_files.add(output_path)
+        input_size = os.path.getsize(file_path)
+        output_size = os.path.getsize(output_path)
+        AUDIO_SILENCE_TRIM_BYTES.inc(input_size, state="before")
+        AUDIO_SILENCE_TRIM_BYTES.inc(output_size, state="after")
+        logger.info(
+            f"無音除去: {trim_map.describe()}, "
+            f"サイズ {input_size / (1024 * 1024):.2f} MB → {output_size / (1024 * 1024):.2f} MB"
+        )
+        return output_path, trim_map
+
+    async def split_at_silence(self, file_path: str, segment_seconds: float) -> List[str]:
+        """
+        無音区間を境界にして音声ファイルを分割（再エンコードなし）
+        各セグメントはおおよそsegment_seconds以下の長さになる
+
+        Args:
+            file_path: 分割する音声ファイルのパス（圧縮済みMP3）
+            segment_seconds: 1セグメントの目標長（秒）
+
+        Returns:
+            時間順に並んだ分割音声ファイルのパスのリスト
+        """
+        # 無音区間を検出
+        duration, silences = await self._detect_silence(file_path, self.SILENCE_THRESHOLD, self.SILENCE_MIN_DURATION)
+        silence_points = [(start + end) / 2 for start, end in silences]
+
+        cut_points = self._choose_cut_points(silence_points, duration, segment_seconds)
+        logger.info(
+            f"音声を分割: 長さ {duration / 60:.1f}分, 無音区間 {len(silence_points)}箇所, "
+            f"{len(cut_points) + 1}セグメント"
+        )
+
+        if not cut_points:
+            return [file_path]
+
+        # 分割点で切り出し（ストリームコピーのため高速）
+        output_dir = tempfile.mkdtemp(prefix="segments_")
+        _, ext = os.path.splitext(file_path)
+        cmd = [
+            self.ffmpeg_path, '-hide_banner',
+            '-i', file_path,
+            '-f', 'segment',
+            '-segment_times', ','.join(f'{point:.3f}' for point in cut_points),
+            '-reset_timestamps', '1',
+            '-c', 'copy',
+            *BITEXACT_ARGS,
+            '-y',
+            os.path.join(output_dir, f'segment_%03d{ext}')
+        ]
+        returncode, stderr = await run_ffmpeg(cmd, timeout=600)
+        if returncode != 0:
+            logger.error(f"ffmpegエラー: {stderr}")
+            raise RuntimeError("音声の分割に失敗しました")
+
+        segment_paths = sorted(
+            os.path.join(output_dir, name) for name in os.listdir(output_dir)
+        )
+        self.temp_files.update(segment_paths)
+        return segment_paths
+
+    def _choose_cut_points(self, silence_points: List[float], duration: float, segment_seconds: float) -> List[float]:
+        """
+        目標長ごとに、その直前の探索範囲内で最も遅い無音区間を分割点に選ぶ
+        （無音区間がなければ目標長の位置で分割）
+
+        Args:
+            silence_points: 無音区間の中央の時刻（秒）
+            duration: 音声全体の長さ（秒）
+            segment_seconds: 1セグメントの目標長（秒）
+
+        Returns:
+            分割点の時刻（秒）のリスト
+        """
+        search_window = segment_seconds * self.SILENCE_SEARCH_RATIO
+        min_last_segment = segment_seconds * self.SILENCE_SEARCH_RATIO
+
+        cut_points = []
+        last_cut = 0.0
+        while duration - last_cut > segment_seconds:
+            target = last_cut + segment_seconds
+            candidates = [p for p in silence_points if target - search_window <= p <= target]
+            cut = max(candidates) if candidates else target
+
+            # 最後のセグメントが極端に短くなる場合は分割しない
+            if duration - cut < min_last_segment:
+                break
+
+            cut_points.append(cut)
+            last_cut = cut
+
+        return cut_points
+
+    def release_temp_files(self, paths: List[str]):
+        """
+        呼び出し元で削除する一時ファイルを管理対象から外す
+        プロセス内で共有するため、ジョブの終了ごとに呼び出して一覧が増え続けないようにする
+
+        Args:
+            paths: 一時ファイルのパス
+        """
+        for path in paths:
+            self.temp_files.discard(path)
+
     def cleanup(self):
         """一時ファイルのクリーンアップ"""
-        for temp_file in self.temp_files:
+        for temp_file in list(self.temp_files):
             try:
                 if os.path.exists(temp_file):
                     os.unlink(temp_file)
@@ -0,0 +1,4 @@
+"""
+性能計測用スクリプト集（本番イメージには含めない）
+リポジトリのルートから `python -m benchmarks.<スクリプト名>` で実行する
+"""
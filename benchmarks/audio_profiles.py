@@ -0,0 +1,133 @@
+"""
+圧縮プロファイルごとのエンコード時間・出力サイズ・Geminiへのアップロード時間の比較
+
+入力（コーパス）は --corpus で指定したディレクトリの音声ファイル。省略時はffmpegで
+話し声に近い合成音声（WAVと電話録音相当のMP3）を生成する
+アップロード時間は --upload-mbps の回線速度からの推定値。--gemini を付けると
+GEMINI_API_KEY を使って実際に genai.upload_file でアップロードして計測する（API課金なし、ファイルは削除する）
+各プロファイルは2回エンコードし、出力が同一でない場合（解析結果のキャッシュが当たらない）は終了コード1で終了する
+
+使い方:
+    python -m benchmarks.audio_profiles --durations 60 600 --upload-mbps 20
+    python -m benchmarks.audio_profiles --corpus ./samples --gemini
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from audio_processor import AUDIO_PROFILES, AudioProcessor, find_ffmpeg
+
+
+def generate_corpus(output_dir: str, durations: list) -> list:
+    """
+    話し声に近い合成音声を生成（声の帯域に絞ったノイズに抑揚をつけ、発話5秒・無音2秒を繰り返す）
+
+    Returns:
+        生成したファイルのパスのリスト
+    """
+    ffmpeg = find_ffmpeg()
+    voice = (
+        "anoisesrc=d={d}:c=pink:r=44100:a=0.5,"
+        "bandpass=f=400:width_type=h:w=600,tremolo=f=4:d=0.7,"
+        "volume='if(lt(mod(t\\,7)\\,5)\\,1\\,0.02)':eval=frame"
+    )
+    paths = []
+    for duration in durations:
+        source = voice.format(d=duration)
+        for name, args in (
+            ("wav", ['-ac', '2', '-c:a', 'pcm_s16le']),
+            ("mp3", ['-ac', '1', '-ar', '22050', '-c:a', 'libmp3lame', '-b:a', '48k']),
+        ):
+            path = os.path.join(output_dir, f"speech_{int(duration)}s.{name}")
+            subprocess.run(
+                [ffmpeg, '-hide_banner', '-loglevel', 'error', '-f', 'lavfi', '-i', source, *args, '-y', path],
+                check=True,
+            )
+            paths.append(path)
+    return paths
+
+
+def file_digest(path: str) -> str:
+    """ファイルのSHA-256"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def upload_to_gemini(path: str) -> float:
+    """実際にGeminiへアップロードして時間（秒）を計測し、アップロードしたファイルは削除する"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    start = time.perf_counter()
+    uploaded = genai.upload_file(path=path)
+    elapsed = time.perf_counter() - start
+    genai.delete_file(uploaded.name)
+    return elapsed
+
+
+async def run(corpus: list, upload_mbps: float, use_gemini: bool) -> int:
+    processor = AudioProcessor()
+    unstable = []
+    print(f"{'入力':<24} {'プロファイル':<8} {'エンコード':>10} {'出力サイズ':>10} {'アップロード':>12} {'再現性':>6}")
+    for path in corpus:
+        duration = await processor.get_duration(path)
+        chosen = processor.choose_profile(duration, path).name
+        input_label = f"{os.path.basename(path)} ({os.path.getsize(path) / (1024 * 1024):.1f}MB)"
+        for name, profile in AUDIO_PROFILES.items():
+            start = time.perf_counter()
+            output_path = await processor._compress_with_ffmpeg(path, profile)
+            encode_time = time.perf_counter() - start
+            output_size = os.path.getsize(output_path)
+            # 同じ入力から同じバイト列が出力されるか（解析結果のキャッシュのキーになる）
+            repeated_path = await processor._compress_with_ffmpeg(path, profile)
+            identical = file_digest(output_path) == file_digest(repeated_path)
+            if not identical:
+                unstable.append(f"{os.path.basename(path)} {name}")
+
+            if use_gemini:
+                upload_time = await asyncio.to_thread(upload_to_gemini, output_path)
+            else:
+                upload_time = output_size * 8 / (upload_mbps * 1000 * 1000)
+            marker = " *" if name == chosen else ""
+            print(
+                f"{input_label:<24} {name:<8} {encode_time:9.2f}s {output_size / (1024 * 1024):9.2f}MB "
+                f"{upload_time:11.2f}s {'同一' if identical else '不一致':>6}{marker}"
+            )
+            input_label = ""
+        processor.cleanup()
+    print("* = 自動選択されるプロファイル" + ("" if use_gemini else f"（アップロード時間は {upload_mbps}Mbps での推定）"))
+    if unstable:
+        print(f"同じ入力から異なる出力になりました: {', '.join(unstable)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="入力音声ファイルのディレクトリ（省略時は合成音声を生成）")
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600], help="生成する合成音声の長さ（秒）")
+    parser.add_argument("--upload-mbps", type=float, default=20, help="アップロード時間の推定に使う回線速度（Mbps）")
+    parser.add_argument("--gemini", action="store_true", help="実際にGeminiへアップロードして計測する")
+    args = parser.parse_args()
+
+    work_dir = None
+    if args.corpus:
+        corpus = sorted(
+            os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+            if os.path.isfile(os.path.join(args.corpus, name))
+        )
+    else:
+        work_dir = tempfile.mkdtemp(prefix="audio_profiles_")
+        corpus = generate_corpus(work_dir, args.durations)
+    try:
+        exit_code = asyncio.run(run(corpus, args.upload_mbps, args.gemini))
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(exit_code)
@@ -0,0 +1,229 @@
+"""
+重複行削除の速度・検出数の比較（従来実装 vs セクション内の近似重複判定）
+
+Geminiの出力が崩れたときの典型的なパターンを合成し、
+約45,000文字（5時間の会議の上限相当）の出力に対する処理時間と削除行数を比較する
+
+続けて、打合せ内容の項目を決定事項で改めて挙げた議事録で、別のセクションでの再掲が残ること、
+セクション内の繰り返しは削除されること、ストリーミングと一括の解析結果が一致することを確認する
+（Gemini APIのスタンドインを使用し、ストリーミングはSSEで配信するジョブと同じ経路で確認）。確認に失敗した場合は終了コード1で終了する
+
+使い方:
+    python -m benchmarks.dedup_speed --chars 45000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from benchmarks.fakes import FakeGenai
+from gemini_service import GeminiService
+
+# 打合せ内容で挙げた項目を決定事項で再掲し、打合せ内容の中では語尾を変えて繰り返す議事録
+DECISION = "キッチンの食洗機は深型のビルトインタイプを採用する"
+RESTATED_MINUTES = "\n".join([
+    "1. 打合せ概要",
+    "キッチンと外壁の仕様を確認しました。",
+    "",
+    "2. 打合せ内容",
+    "【キッチン】",
+    f"・{DECISION}",
+    "・カップボードは吊戸棚なしのプランで見積を作成する",
+    f"・{DECISION[:-2]}します",
+    "",
+    "3. 決定事項",
+    f"・{DECISION}",
+    "",
+    "4. 次回までの確認・準備事項",
+    "【お客様】",
+    "・特になし",
+    "【当社】",
+    "・カップボードの見積を作成する",
+    "",
+    "5. 補足メモ",
+    "特になし",
+])
+
+WORDS = [
+    "工事", "見積", "外壁", "屋根", "断熱", "基礎", "配管", "電気", "設計", "図面",
+    "変更", "確認", "予算", "工期", "契約", "着工", "引渡し", "仕上げ", "塗装", "防水",
+    "お客様", "担当者", "次回", "打ち合わせ", "資料", "提出", "検討", "追加", "費用", "調整",
+]
+
+
+def legacy_similarity_ratio(str1: str, str2: str) -> float:
+    """従来の類似度（1文字ごとに長い方の文字列を走査するO(n·m)）"""
+    if not str1 or not str2:
+        return 0.0
+    shorter = str1 if len(str1) <= len(str2) else str2
+    longer = str2 if len(str1) <= len(str2) else str1
+    common_chars = sum(1 for c in shorter if c in longer)
+    return common_chars / len(longer) if longer else 0.0
+
+
+def legacy_remove_duplicate_lines(text: str) -> str:
+    """従来の重複行削除（隣接する行どうしのみ比較）"""
+    lines = text.split('\n')
+    result_lines = []
+    seen_lines = set()
+    consecutive_similar_count = 0
+    prev_line_normalized = ""
+
+    for line in lines:
+        if not line.strip():
+            result_lines.append(line)
+            consecutive_similar_count = 0
+            continue
+        normalized = line.strip()
+        if normalized == prev_line_normalized:
+            consecutive_similar_count += 1
+            if consecutive_similar_count >= 2:
+                continue
+        else:
+            consecutive_similar_count = 0
+        if normalized.startswith('・') and prev_line_normalized.startswith('・'):
+            current_content = normalized[1:].strip()
+            prev_content = prev_line_normalized[1:].strip() if prev_line_normalized else ""
+            if current_content and prev_content:
+                if legacy_similarity_ratio(current_content, prev_content) > 0.8:
+                    continue
+        if len(normalized) > 0 and normalized[0].isdigit() and '. ' in normalized[:5]:
+            section_key = normalized[:5]
+            if section_key in seen_lines:
+                continue
+            seen_lines.add(section_key)
+        result_lines.append(line)
+        prev_line_normalized = normalized
+
+    return '\n'.join(result_lines)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return "、".join(rng.choice(WORDS) + rng.choice(["について", "を", "の", "は"]) for _ in range(words)) + "。"
+
+
+def clean_output(rng: random.Random, chars: int) -> str:
+    """重複のない通常の出力"""
+    lines = []
+    section = 1
+    while sum(len(line) + 1 for line in lines) < chars:
+        if len(lines) % 40 == 0 and section <= 5:
+            lines += ["", f"## {section}. セクション{section}", ""]
+            section += 1
+        lines.append(f"・{len(lines)}件目 {_sentence(rng, rng.randint(4, 10))}")
+    return "\n".join(lines)
+
+
+def looping_output(rng: random.Random, chars: int, block: int = 6) -> str:
+    """数行のブロックを語尾だけ変えて繰り返す出力（隣接比較では検出できない崩れ方）"""
+    bullets = [f"・{_sentence(rng, rng.randint(6, 10))}" for _ in range(block)]
+    lines = ["## 3. 詳細内容", ""]
+    while sum(len(line) + 1 for line in lines) < chars:
+        for bullet in bullets:
+            lines.append(bullet[:-1] + rng.choice(["。", "です。", "ました。"]))
+    return "\n".join(lines)
+
+
+def long_line_output(rng: random.Random, chars: int, line_chars: int = 3000) -> str:
+    """同じ語句が延々と続く長い箇条書きが並ぶ出力（従来の類似度計算が最も遅くなる）"""
+    lines = []
+    while sum(len(line) + 1 for line in lines) < chars:
+        phrase = _sentence(rng, 3)
+        lines.append("・" + (phrase * (line_chars // len(phrase) + 1))[:line_chars])
+    return "\n".join(lines)
+
+
+def measure(func, text: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    removed = len(text.split("\n")) - len(result.split("\n"))
+    return best, removed
+
+
+def run(chars: int, repeat: int, seed: int):
+    rng = random.Random(seed)
+    service = GeminiService()
+    cases = {
+        "clean": clean_output(rng, chars),
+        "looping": looping_output(rng, chars),
+        "long lines": long_line_output(rng, chars),
+    }
+
+    print(f"{'case':<12}{'lines':>7}  {'legacy':>22}  {'current':>22}")
+    for name, text in cases.items():
+        legacy_time, legacy_removed = measure(legacy_remove_duplicate_lines, text, repeat)
+        current_time, current_removed = measure(service._remove_duplicate_lines, text, repeat)
+        print(
+            f"{name:<12}{len(text.split(chr(10))):>7}  "
+            f"{legacy_time * 1000:9.1f}ms {legacy_removed:5d}行削除  "
+            f"{current_time * 1000:9.1f}ms {current_removed:5d}行削除"
+        )
+
+
+async def analyze_both(service: GeminiService, audio_path: str) -> tuple:
+    """
+    スタンドインのGeminiで、一括の解析結果と、ジョブと同じ経路（SSEで配信して全文を保存）の結果を取得
+
+    Returns:
+        (一括の解析結果, ストリーミングで保存される全文, SSEで配信されたセクション)
+    """
+    import main
+    from job_queue import Job
+
+    FakeGenai(
+        upload_latency=0, processing_polls=0, generate_latency=0, summary=RESTATED_MINUTES
+    ).install(service)
+    summary = await service.analyze_audio(audio_path)
+    job = Job("benchmark", {})
+    streamed = await main._stream_minutes(job, service.analyze_audio_stream(audio_path))
+    published = [data["text"] for event, data in job.events if event == "section"]
+    return summary, streamed, published
+
+
+def check_restated_sections() -> list:
+    """
+    別のセクションでの再掲を残し、セクション内の繰り返しだけを削除するかを確認
+
+    Returns:
+        失敗した確認内容のリスト
+    """
+    service = GeminiService()
+    with tempfile.NamedTemporaryFile(suffix=".mp3") as audio_file:
+        audio_file.write(b"\0" * 1024)
+        audio_file.flush()
+        summary, streamed, published = asyncio.run(analyze_both(service, audio_file.name))
+
+    failures = []
+    sections = summary.split("3. 決定事項")
+    if len(sections) != 2 or DECISION not in sections[1].split("4. ")[0]:
+        failures.append("決定事項での再掲が削除されました")
+    if sections[0].count(DECISION) != 1:
+        failures.append("打合せ内容の中での繰り返しが削除されていません")
+    if streamed != summary:
+        failures.append("ストリーミングと一括の解析結果が一致しません")
+    if not any(section.startswith("3. 決定事項") and DECISION in section for section in published):
+        failures.append("SSEで配信された決定事項に再掲が含まれていません")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=45000, help="合成する出力の文字数")
+    parser.add_argument("--repeat", type=int, default=5, help="各ケースの計測回数（最速値を表示）")
+    parser.add_argument("--seed", type=int, default=0, help="合成に使う乱数シード")
+    args = parser.parse_args()
+    run(args.chars, args.repeat, args.seed)
+
+    failures = check_restated_sections()
+    if failures:
+        print("\n" + "\n".join(f"NG: {failure}" for failure in failures))
+        sys.exit(1)
+    print("\nOK: 別のセクションでの再掲は残り、セクション内の繰り返しは削除されました（ストリーミングと一括で一致）")
@@ -0,0 +1,230 @@
+"""
+議事録のドキュメント生成の計測（generate_word / generate_pdf / _convert_markdown_symbols / _remove_duplicate_lines）
+
+プロンプトの出力形式どおりの5セクションの議事録（1,000〜50,000文字）を合成し、
+呼び出し1回あたりの時間（中央値・最速値）とピークメモリを計測する
+ピークメモリはtracemallocで計測するため、Pythonのメモリ管理を通さない確保（Word生成でのlxmlのXMLツリーなど）は含まない
+初回の呼び出し（フォントの読み込みなど）は別に記録し、--profile で最も長い議事録の関数ごとの時間を表示する
+
+基準値はマシンに依存するため、同じマシンで --save-baseline で保存してから --baseline で比較する
+時間（最速値）・メモリのいずれかが基準値から --threshold（割合）を超えて増えた場合は終了コード1で終了する
+
+使い方:
+    python -m benchmarks.document_render --save-baseline document_render_baseline.json
+    python -m benchmarks.document_render --baseline document_render_baseline.json --threshold 0.25
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from document_generator import DocumentGenerator, load_japanese_font
+from gemini_service import GeminiService
+
+METADATA = {
+    "created_date": "2026-01-01",
+    "creator": "計測",
+    "customer_name": "計測用顧客",
+    "meeting_place": "本社",
+}
+
+TOPICS = ["間取り", "外壁", "屋根", "キッチン", "浴室", "収納", "断熱", "外構", "照明", "資金計画", "工程", "駐車場"]
+SUBJECTS = [
+    "リビングの広さ", "南側の窓の大きさ", "外壁の色", "屋根材の種類", "食洗機の有無", "浴室乾燥機",
+    "玄関の土間収納", "2階のトイレ", "太陽光パネル", "床暖房", "カーポートの位置", "着工の時期",
+]
+DETAILS = [
+    "お客様から{subject}について**{topic}の仕様**を確認したいとのご要望がありました",
+    "{subject}は予算との兼ね合いで、次回までに2案を比較できるよう見積を用意することになりました",
+    "{subject}についてはご家族で相談のうえ、{topic}の打合せで最終決定する予定です",
+    "当社から{subject}の標準仕様と**オプション費用**を説明しました",
+    "{subject}はショールームで実物を確認してから判断したいとのことでした",
+    "{topic}に関して、{subject}を変更した場合の工期への影響を説明しました",
+]
+
+
+def realistic_minutes(chars: int, seed: int = 0) -> str:
+    """
+    プロンプトの出力形式（5セクション・【】の小見出し・箇条書き・**強調**）に沿った議事録を合成
+
+    Args:
+        chars: 目標の文字数
+        seed: 乱数シード
+
+    Returns:
+        議事録の本文
+    """
+    rng = random.Random(seed)
+
+    def detail() -> str:
+        return rng.choice(DETAILS).format(subject=rng.choice(SUBJECTS), topic=rng.choice(TOPICS)) + "。"
+
+    header = [
+        "## 1. 打合せ概要",
+        f"{rng.choice(TOPICS)}と{rng.choice(TOPICS)}を中心に、前回の宿題事項の確認と仕様の打合せを行いました。",
+        "",
+        "## 2. 打合せ内容",
+    ]
+    footer = [
+        "",
+        "## 3. 決定事項",
+        f"・{rng.choice(SUBJECTS)}は標準仕様で進める",
+        f"・次回は{rng.choice(TOPICS)}の打合せを行う",
+        "",
+        "## 4. 次回までの確認・準備事項",
+        "【お客様】",
+        f"・{rng.choice(SUBJECTS)}のご希望をまとめておく",
+        "【当社】",
+        f"・{rng.choice(SUBJECTS)}の見積を作成する",
+        "",
+        "## 5. 補足メモ",
+        detail(),
+    ]
+    body = []
+    length = sum(len(line) + 1 for line in header + footer)
+    while length < chars:
+        block = ["", f"【{rng.choice(TOPICS)}】"] + [f"・{detail()}" for _ in range(rng.randint(3, 8))]
+        if rng.random() < 0.3:
+            block.append(detail() + detail())
+        body += block
+        length += sum(len(line) + 1 for line in block)
+    return "\n".join(header + body + footer)
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    時間（ミリ秒）とピークメモリ（KB）を計測
+    時間は tracemalloc なしで repeat 回（100ms未満の処理は合計100ms以上になるまで）、メモリは別に1回計測する
+    """
+    times = []
+    deadline = time.perf_counter() + 0.1
+    while len(times) < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "runs": len(times),
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def print_profile(func, label: str, limit: int = 15):
+    """関数ごとの時間（自身の時間順）を表示"""
+    profiler = cProfile.Profile()
+    profiler.runcall(func)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("tottime").print_stats(limit)
+    print(f"\n=== {label} ===")
+    print(output.getvalue())
+
+
+def check_regressions(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """
+    基準値から threshold を超えて遅く・大きくなった項目を返す
+    ごく短い処理の揺らぎで失敗しないよう、時間の差が min_delta_ms 未満のものは対象外
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        # 他のプロセスの影響を受けにくい最速値で比較する
+        delta_ms = current["min_ms"] - previous["min_ms"]
+        if delta_ms > min_delta_ms and current["min_ms"] > previous["min_ms"] * (1 + threshold):
+            regressions.append(f"{key}: 時間（最速） {previous['min_ms']:.2f} → {current['min_ms']:.2f}ms")
+        if current["peak_kb"] > previous["peak_kb"] * (1 + threshold):
+            regressions.append(f"{key}: メモリ {previous['peak_kb']:.0f} → {current['peak_kb']:.0f}KB")
+    return regressions
+
+
+def run(args) -> int:
+    generator = DocumentGenerator()
+    service = GeminiService()
+    targets = {
+        "convert_markdown": lambda content: generator._convert_markdown_symbols(content),
+        "remove_duplicates": lambda content: service._remove_duplicate_lines(content),
+        "word": lambda content: generator.generate_word(content, METADATA),
+    }
+    if load_japanese_font() is not None:
+        targets["pdf"] = lambda content: generator.generate_pdf(content, METADATA)
+    else:
+        print("日本語フォントが見つからないため、PDFは計測しません")
+
+    documents = {chars: realistic_minutes(chars, args.seed) for chars in args.sizes}
+
+    # 初回の呼び出し（フォントの読み込み・テンプレートの準備など一度だけの処理を含む）
+    first_calls = {}
+    smallest = documents[min(args.sizes)]
+    for name, target in targets.items():
+        start = time.perf_counter()
+        target(smallest)
+        first_calls[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    results = {}
+    print(f"{'対象':<18}{'文字数':>8}{'回数':>6}{'中央値':>12}{'最速':>12}{'ピークメモリ':>14}")
+    for name, target in targets.items():
+        print(f"{name:<18}{'(初回)':>8}{1:>6}{first_calls[name]:>10.2f}ms")
+        for chars, content in documents.items():
+            result = measure(lambda: target(content), args.repeat)
+            results[f"{name}/{chars}"] = result
+            print(
+                f"{name:<18}{chars:>8}{result['runs']:>6}{result['median_ms']:>10.2f}ms"
+                f"{result['min_ms']:>10.2f}ms{result['peak_kb']:>12.0f}KB"
+            )
+
+    if args.profile:
+        largest = documents[max(args.sizes)]
+        for name in ("word", "pdf"):
+            if name in targets:
+                print_profile(lambda: targets[name](largest), f"{name} {max(args.sizes)}文字")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"first_calls": first_calls, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n基準値を保存しました: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = check_regressions(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n基準値（{args.baseline}）から{args.threshold:.0%}を超えて悪化しました:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n基準値（{args.baseline}）からの悪化はありません（しきい値 {args.threshold:.0%}）")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 25000, 50000],
+                        help="議事録の文字数")
+    parser.add_argument("--repeat", type=int, default=5, help="各対象・文字数の最低計測回数")
+    parser.add_argument("--seed", type=int, default=0, help="議事録の合成に使う乱数シード")
+    parser.add_argument("--profile", action="store_true", help="最も長い議事録の関数ごとの時間を表示する")
+    parser.add_argument("--save-baseline", help="結果を基準値として保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較する基準値のJSONファイル")
+    parser.add_argument("--threshold", type=float, default=0.25, help="悪化とみなす増加の割合")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="悪化とみなす時間の差の下限（ミリ秒）")
+    args = parser.parse_args()
+    sys.exit(run(args))
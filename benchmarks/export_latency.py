@@ -0,0 +1,91 @@
+"""
+エクスポートのレイテンシ比較（一時ファイル経由 vs メモリ上で完結）
+
+disk:   生成したドキュメントを一時ファイルに書き出し、レスポンス用に読み直して削除する（従来の経路）
+memory: 生成したバイト列をそのままレスポンスに使う（現在の経路）
+
+使い方:
+    python -m benchmarks.export_latency --iterations 20 --bullets 300
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from document_generator import DocumentGenerator, load_japanese_font
+
+METADATA = {
+    "created_date": "2026-01-01",
+    "creator": "計測",
+    "customer_name": "計測用顧客",
+    "meeting_place": "本社",
+}
+
+
+def sample_minutes(bullets: int) -> str:
+    """セクション5つに箇条書きを振り分けた議事録本文"""
+    titles = ["打合せ概要", "決定事項", "詳細内容", "次回までの課題", "補足メモ"]
+    lines = []
+    for section, title in enumerate(titles, start=1):
+        lines += [f"## {section}. {title}", ""]
+        for i in range(bullets // len(titles)):
+            lines.append(f"・{title}に関する{i + 1}件目の内容です。**外壁塗装**の工期と費用について確認しました。")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def render_via_disk(render, content: str) -> bytes:
+    path = tempfile.mktemp()
+    try:
+        with open(path, "wb") as f:
+            f.write(render(content, METADATA))
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+def render_in_memory(render, content: str) -> bytes:
+    return render(content, METADATA)
+
+
+def measure(render, content: str, iterations: int) -> dict:
+    """両方の経路を交互に実行してレイテンシ（ミリ秒）を収集（実行順による偏りを避けるため）"""
+    paths = {"disk": render_via_disk, "memory": render_in_memory}
+    latencies = {label: [] for label in paths}
+    for _ in range(iterations):
+        for label, func in paths.items():
+            start = time.perf_counter()
+            func(render, content)
+            latencies[label].append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run(iterations: int, bullets: int):
+    generator = DocumentGenerator()
+    content = sample_minutes(bullets)
+    renderers = {"word": generator.generate_word}
+    if load_japanese_font() is not None:
+        renderers["pdf"] = generator.generate_pdf
+    else:
+        print("日本語フォントが見つからないため、PDFは計測しません")
+
+    for name, render in renderers.items():
+        # フォント読み込みなど初回のみの処理を除外
+        render(content, METADATA)
+        for label, latencies in measure(render, content, iterations).items():
+            latencies = sorted(latencies)
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+            print(
+                f"{name:<5} {label:<7} n={iterations:<4} "
+                f"p50={statistics.median(latencies):8.2f}ms  p95={p95:8.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20, help="各経路の計測回数")
+    parser.add_argument("--bullets", type=int, default=300, help="議事録本文の箇条書きの数")
+    args = parser.parse_args()
+    run(args.iterations, args.bullets)
@@ -0,0 +1,272 @@
+"""
+ベンチマーク用のGCS・Gemini APIスタンドイン
+実サービスに接続せず、レイテンシを再現したうえでパイプラインの実コードを動かす
+"""
+import asyncio
+import io
+import itertools
+import math
+import os
+import random
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+def generate_wav(duration_seconds: float, sample_rate: int = 44100, channels: int = 2) -> bytes:
+    """正弦波のWAVデータを生成（ffmpegなしで入力音声を用意するため）"""
+    # 1周期がサンプル数で割り切れる周波数を使い、1周期分を繰り返して高速に生成する
+    period_samples = 100
+    frequency = sample_rate / period_samples
+    period = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate))) * channels
+        for i in range(period_samples)
+    )
+    frames = int(duration_seconds * sample_rate)
+    data = period * (frames // period_samples) + period[: (frames % period_samples) * 2 * channels]
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(data)
+    return buffer.getvalue()
+
+
+class FakeBlob:
+    """google.cloud.storage.Blobの代替（呼び出しは同期的にブロックする）"""
+
+    def __init__(self, bucket: "FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.size = None
+        self.content_type = None
+
+    def reload(self):
+        time.sleep(self.bucket.metadata_latency)
+        self.size = len(self.bucket.objects[self.name])
+
+    def upload_from_string(self, data, content_type: str = None):
+        time.sleep(self.bucket.metadata_latency)
+        self.bucket.objects[self.name] = data.encode() if isinstance(data, str) else data
+
+    def download_as_bytes(self) -> bytes:
+        time.sleep(self.bucket.metadata_latency)
+        return self.bucket.objects[self.name]
+
+    def download_to_file(self, file_obj):
+        data = self.bucket.objects[self.name]
+        time.sleep(self.bucket.metadata_latency + len(data) / self.bucket.throughput_bytes_per_sec)
+        file_obj.write(data)
+
+    def open(self, mode: str = "rb", chunk_size: int = 40 * 1024 * 1024):
+        time.sleep(self.bucket.metadata_latency)
+        return FakeBlobReader(self.bucket, self.bucket.objects[self.name])
+
+    def delete(self):
+        time.sleep(self.bucket.metadata_latency)
+        self.bucket.objects.pop(self.name, None)
+
+    def generate_signed_url(self, **kwargs) -> str:
+        """FakeUploadServerへのPUT用URL"""
+        return f"{self.bucket.upload_base_url}/{self.name}"
+
+    def compose(self, sources):
+        time.sleep(self.bucket.metadata_latency)
+        self.bucket.objects[self.name] = b"".join(self.bucket.objects[source.name] for source in sources)
+        self.size = len(self.bucket.objects[self.name])
+
+
+class FakeBlobReader(io.BytesIO):
+    """google.cloud.storage.fileio.BlobReaderの代替（読み込み量に応じてブロックする）"""
+
+    def __init__(self, bucket: "FakeBucket", data: bytes):
+        super().__init__(data)
+        self.bucket = bucket
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = super().read(size)
+        time.sleep(len(chunk) / self.bucket.throughput_bytes_per_sec)
+        return chunk
+
+
+class FakeBucket:
+    """google.cloud.storage.Bucketの代替"""
+
+    def __init__(self, metadata_latency: float = 0.05, throughput_bytes_per_sec: float = 50 * 1024 * 1024):
+        self.metadata_latency = metadata_latency
+        self.throughput_bytes_per_sec = throughput_bytes_per_sec
+        self.objects = {}
+        self.upload_base_url = None
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+    def list_blobs(self, prefix: str = ""):
+        time.sleep(self.metadata_latency)
+        blobs = [FakeBlob(self, name) for name in sorted(self.objects) if name.startswith(prefix)]
+        for blob in blobs:
+            blob.size = len(self.objects[blob.name])
+        return blobs
+
+    def delete_blobs(self, blobs, on_error=None):
+        for blob in blobs:
+            self.objects.pop(blob.name, None)
+
+
+class FakeUploadServer:
+    """
+    署名付きURLへのPUTを受け付けるGCSの代わり（FakeBucketにオブジェクトを保存する）
+    回線の不安定さを再現するため、一定の確率で受信途中に接続を切る
+    """
+
+    def __init__(self, bucket: FakeBucket, failure_rate: float = 0.0, seed: int = 0):
+        self.bucket = bucket
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.received_bytes = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_PUT(self):
+                length = int(self.headers.get("Content-Length", 0))
+                fail_at = length * server.random.random() if server.random.random() < server.failure_rate else None
+                received = bytearray()
+                while len(received) < length:
+                    chunk = self.rfile.read(min(1024 * 1024, length - len(received)))
+                    if not chunk:
+                        break
+                    received += chunk
+                    server.received_bytes += len(chunk)
+                    time.sleep(len(chunk) / server.bucket.throughput_bytes_per_sec)
+                    if fail_at is not None and len(received) >= fail_at:
+                        self.send_error(503, "injected failure")
+                        return
+                server.bucket.objects[self.path.lstrip("/")] = bytes(received)
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        bucket.upload_base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class FakeSigningIdentity:
+    """signing_identity.SigningIdentityの代替（メタデータサーバーに接続しない）"""
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def get(self):
+        return "benchmark@example.iam.gserviceaccount.com", "fake-token"
+
+
+class FakeGenai:
+    """
+    GeminiServiceが使うgenaiモジュール関数とモデルの代替
+    ファイルアップロード・状態取得は同期的にブロックし、生成は非同期に待機する
+    """
+
+    SUMMARY = (
+        "1. 打合せ概要\n打合せのテスト概要\n\n2. 打合せ内容\n・【間取り】についての要望\n\n"
+        "3. 決定事項\n・特になし\n\n4. 次回までの確認・準備事項\n【お客様】\n・特になし\n"
+        "【当社】\n・特になし\n\n5. 補足メモ\n特になし"
+    )
+
+    def __init__(
+        self,
+        upload_latency: float = 0.5,
+        processing_polls: int = 1,
+        generate_latency: float = 2.0,
+        upload_throughput_bytes_per_sec: float = None,
+        summary: str = None,
+    ):
+        """
+        Args:
+            upload_latency: アップロード1回あたりの固定の待ち時間（秒）
+            processing_polls: ファイルがACTIVEになるまでの状態取得の回数
+            generate_latency: 生成にかかる時間（秒）
+            upload_throughput_bytes_per_sec: アップロードの速度（Noneの場合はサイズによらず固定の待ち時間のみ）
+            summary: 生成する議事録（Noneの場合はSUMMARY）
+        """
+        self.upload_latency = upload_latency
+        self.processing_polls = processing_polls
+        self.generate_latency = generate_latency
+        self.upload_throughput_bytes_per_sec = upload_throughput_bytes_per_sec
+        self.summary = summary or self.SUMMARY
+        self._polls = {}
+        # 並行アップロードでもファイル名が重ならないよう連番で採番する
+        self._file_ids = itertools.count()
+
+    def install(self, gemini_service):
+        """gemini_serviceモジュールのgenaiとサービスのモデルを差し替える"""
+        import gemini_service as gemini_module
+
+        gemini_module.genai.upload_file = self.upload_file
+        gemini_module.genai.get_file = self.get_file
+        gemini_module.genai.delete_file = self.delete_file
+        gemini_service.model = self
+
+    def _file(self, name: str):
+        remaining = self._polls.get(name, 0)
+        state = "PROCESSING" if remaining > 0 else "ACTIVE"
+        return SimpleNamespace(name=name, state=SimpleNamespace(name=state))
+
+    def upload_file(self, path, **kwargs):
+        latency = self.upload_latency
+        if self.upload_throughput_bytes_per_sec:
+            latency += os.path.getsize(path) / self.upload_throughput_bytes_per_sec
+        time.sleep(latency)
+        name = f"files/{next(self._file_ids)}"
+        self._polls[name] = self.processing_polls
+        return self._file(name)
+
+    def get_file(self, name):
+        time.sleep(0.05)
+        self._polls[name] = max(0, self._polls.get(name, 0) - 1)
+        return self._file(name)
+
+    def delete_file(self, name):
+        time.sleep(0.05)
+        self._polls.pop(name, None)
+
+    def _response(self, text: str):
+        candidate = SimpleNamespace(finish_reason="FinishReason.STOP")
+        return SimpleNamespace(text=text, candidates=[candidate])
+
+    def generate_content(self, contents, **kwargs):
+        time.sleep(self.generate_latency)
+        return self._response(self.summary)
+
+    async def generate_content_async(self, contents, stream: bool = False, **kwargs):
+        if stream:
+            return self._stream(self.summary)
+        await asyncio.sleep(self.generate_latency)
+        return self._response(self.summary)
+
+    async def _stream(self, text: str):
+        """生成時間を行数で按分し、1行ずつチャンクとして返す"""
+        lines = text.split("\n")
+        for i, line in enumerate(lines):
+            await asyncio.sleep(self.generate_latency / len(lines))
+            chunk = line + ("\n" if i < len(lines) - 1 else "")
+            candidate = SimpleNamespace(finish_reason="FinishReason.STOP" if i == len(lines) - 1 else 0)
+            yield SimpleNamespace(text=chunk, candidates=[candidate])
@@ -0,0 +1,97 @@
+"""
+議事録生成中の /health レイテンシ計測
+
+N件のアップロードを同時に処理している間も /health の応答時間が
+アイドル時と変わらない（イベントループがブロックされていない）ことを確認する
+
+使い方:
+    python -m benchmarks.health_latency --uploads 4 --duration 60
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+import httpx
+
+import main
+from benchmarks.fakes import FakeBucket, FakeGenai, generate_wav
+
+
+async def sample_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float = 0.05) -> list:
+    """stopがセットされるまで /health を叩いてレイテンシ（ミリ秒）を収集"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+def summarize(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(
+        f"{label:<12} n={len(latencies):<5} "
+        f"p50={statistics.median(latencies):7.2f}ms  p95={p95:7.2f}ms  max={latencies[-1]:7.2f}ms"
+    )
+
+
+async def run(uploads: int, duration: float):
+    bucket = FakeBucket()
+    main.services.bucket = bucket
+    FakeGenai().install(main.services.gemini)
+
+    audio = generate_wav(duration)
+    token = main.auth_service.create_access_token({"sub": "user"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            # アイドル時
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(sample_health(client, stop))
+            await asyncio.sleep(2)
+            stop.set()
+            summarize("idle", await sampler)
+
+            # アップロード処理中
+            job_ids = []
+            for i in range(uploads):
+                blob_name = f"user/benchmark-{i}.wav"
+                bucket.objects[blob_name] = audio
+                response = await client.post("/api/upload", headers=headers, data={
+                    "blob_name": blob_name,
+                    "created_date": "2026-01-01",
+                    "creator": "benchmark",
+                    "customer_name": "benchmark",
+                    "meeting_place": "benchmark",
+                })
+                response.raise_for_status()
+                job_ids.append(response.json()["job_id"])
+
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(sample_health(client, stop))
+            started = time.perf_counter()
+            while True:
+                statuses = [main.job_queue.get(job_id).status for job_id in job_ids]
+                if all(s in ("completed", "failed") for s in statuses):
+                    break
+                await asyncio.sleep(0.1)
+            stop.set()
+            summarize(f"{uploads} uploads", await sampler)
+            print(f"全ジョブ完了: {time.perf_counter() - started:.2f}秒 ({statuses.count('completed')}/{uploads} 成功)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=4, help="同時に処理するアップロード数")
+    parser.add_argument("--duration", type=float, default=60, help="入力音声の長さ（秒）")
+    args = parser.parse_args()
+    asyncio.run(run(args.uploads, args.duration))
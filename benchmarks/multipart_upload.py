@@ -0,0 +1,211 @@
+"""
+大きな音声ファイルのアップロード比較（1回のPUT vs パートに分けた並行アップロード）
+
+GCSの代わりにローカルのアップロードサーバー（FakeUploadServer）を起動し、
+一定の確率で受信途中に接続を切って不安定な回線を再現する
+    single:    /api/generate-upload-url のURLに1回でPUT（失敗したら最初からやり直し）
+    multipart: /api/uploads/multipart のパートURLに並行PUT（失敗したパートだけ再送して結合）
+
+結合したオブジェクトを /api/upload に渡し、議事録生成まで完了することも確認する
+最後に、開始時と異なるパート数での結合が400になること、途中で切れたパートが再送対象になることを確認し、
+確認に失敗した場合は終了コード1で終了する
+
+使い方:
+    python -m benchmarks.multipart_upload --duration 600 --failure-rate 0.3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+import httpx
+
+import main
+from benchmarks.fakes import FakeBucket, FakeGenai, FakeSigningIdentity, FakeUploadServer, generate_wav
+
+CONTENT_TYPE = "audio/wav"
+MAX_ATTEMPTS = 10
+
+
+async def put(upload_client: httpx.AsyncClient, url: str, body: bytes) -> bool:
+    try:
+        response = await upload_client.put(url, content=body, headers={"Content-Type": CONTENT_TYPE})
+        return response.status_code == 200
+    except httpx.TransportError:
+        return False
+
+
+async def upload_single(api: httpx.AsyncClient, upload_client: httpx.AsyncClient, headers: dict, audio: bytes) -> dict:
+    response = await api.post("/api/generate-upload-url", headers=headers, data={
+        "filename": "meeting.wav", "content_type": CONTENT_TYPE,
+    })
+    response.raise_for_status()
+    target = response.json()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if await put(upload_client, target["upload_url"], audio):
+            return {"blob_name": target["blob_name"], "attempts": attempt}
+    raise RuntimeError("アップロードが完了しませんでした")
+
+
+async def upload_multipart(
+    api: httpx.AsyncClient, upload_client: httpx.AsyncClient, headers: dict, audio: bytes, concurrency: int
+) -> dict:
+    form = {"filename": "meeting.wav", "content_type": CONTENT_TYPE, "file_size": str(len(audio))}
+    response = await api.post("/api/uploads/multipart", headers=headers, data=form)
+    response.raise_for_status()
+    session = response.json()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        queue = list(session["parts"])
+
+        async def worker():
+            while queue:
+                part = queue.pop(0)
+                start = (part["part_number"] - 1) * session["part_size"]
+                await put(upload_client, part["upload_url"], audio[start:start + session["part_size"]])
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        response = await api.post("/api/uploads/multipart/complete", headers=headers, data={
+            "upload_id": session["upload_id"], "filename": "meeting.wav",
+            "content_type": CONTENT_TYPE, "part_count": str(session["part_count"]),
+        })
+        if response.status_code == 200:
+            return {"blob_name": response.json()["blob_name"], "attempts": attempt, "parts": session["part_count"]}
+        if response.status_code != 409:
+            response.raise_for_status()
+
+        # 未アップロードのパートだけURLを再発行して再開
+        response = await api.post(
+            "/api/uploads/multipart", headers=headers, data={**form, "upload_id": session["upload_id"]}
+        )
+        response.raise_for_status()
+        session = response.json()
+    raise RuntimeError("アップロードが完了しませんでした")
+
+
+async def check_completion(api: httpx.AsyncClient, headers: dict, bucket: FakeBucket, audio: bytes) -> list:
+    """
+    結合時のパートの確認（パートはアップロードサーバーを通さずにバケットへ直接書き込む）
+
+    Returns:
+        失敗した確認項目の説明（すべて成功した場合は空）
+    """
+    failures = []
+    form = {"filename": "meeting.wav", "content_type": CONTENT_TYPE, "file_size": str(len(audio))}
+    response = await api.post("/api/uploads/multipart", headers=headers, data=form)
+    response.raise_for_status()
+    session = response.json()
+    if session["part_count"] < 2:
+        return ["パートが1つしかないため確認できません（--durationを長くしてください）"]
+
+    prefix = main.multipart_uploads.part_prefix("user", session["upload_id"])
+    for part in session["parts"]:
+        start = (part["part_number"] - 1) * session["part_size"]
+        bucket.objects[f"{prefix}{part['part_number']:05d}"] = audio[start:start + session["part_size"]]
+
+    async def complete(part_count: int) -> httpx.Response:
+        return await api.post("/api/uploads/multipart/complete", headers=headers, data={
+            "upload_id": session["upload_id"], "filename": "meeting.wav",
+            "content_type": CONTENT_TYPE, "part_count": str(part_count),
+        })
+
+    # 最後のパートを落とす・存在しないパートを足す申告は、どちらも開始時のパート数と異なる
+    for part_count in (session["part_count"] - 1, session["part_count"] + 1):
+        response = await complete(part_count)
+        if response.status_code != 400:
+            failures.append(f"パート数{part_count}（開始時 {session['part_count']}）での結合が {response.status_code}")
+
+    # 途中で切れたパートは結合せず、再送対象として返す
+    first_part = f"{prefix}00001"
+    bucket.objects[first_part] = bucket.objects[first_part][:-1]
+    response = await complete(session["part_count"])
+    if response.status_code != 409 or response.json()["detail"]["missing_parts"] != [1]:
+        failures.append(f"途中で切れたパートでの結合が {response.status_code} {response.text}")
+
+    bucket.objects[first_part] = audio[:session["part_size"]]
+    response = await complete(session["part_count"])
+    if response.status_code != 200:
+        failures.append(f"再送後の結合が {response.status_code} {response.text}")
+    elif bucket.objects.get(response.json()["blob_name"]) != audio:
+        failures.append("再送後に結合した内容が元の音声と一致しません")
+    return failures
+
+
+async def generate_minutes(api: httpx.AsyncClient, headers: dict, blob_name: str) -> str:
+    """アップロードしたオブジェクトで議事録生成ジョブを実行し、最終状態を返す"""
+    response = await api.post("/api/upload", headers=headers, data={
+        "blob_name": blob_name,
+        "created_date": "2026-01-01",
+        "creator": "benchmark",
+        "customer_name": "benchmark",
+        "meeting_place": "benchmark",
+    })
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while main.job_queue.get(job_id).status not in ("completed", "failed"):
+        await asyncio.sleep(0.1)
+    return main.job_queue.get(job_id).status
+
+
+async def run(duration: float, failure_rate: float, throughput_mb: float, concurrency: int, seed: int) -> list:
+    bucket = FakeBucket(throughput_bytes_per_sec=throughput_mb * 1024 * 1024)
+    main.services.bucket = bucket
+    main.signing_identity = FakeSigningIdentity()
+    main.multipart_uploads.signing_identity = main.signing_identity
+    FakeGenai(upload_latency=0.1, generate_latency=0.2).install(main.services.gemini)
+
+    audio = generate_wav(duration)
+    print(f"入力: {len(audio) / (1024 * 1024):.1f} MB, 失敗率 {failure_rate:.0%}/リクエスト, "
+          f"接続あたり {throughput_mb:.0f} MB/s")
+
+    token = main.auth_service.create_access_token({"sub": "user"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    failures = []
+    with FakeUploadServer(bucket, failure_rate=failure_rate, seed=seed) as server:
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as api, \
+                    httpx.AsyncClient(timeout=None) as upload_client:
+                for label in ("single", "multipart"):
+                    before = server.received_bytes
+                    start = time.perf_counter()
+                    if label == "single":
+                        result = await upload_single(api, upload_client, headers, audio)
+                    else:
+                        result = await upload_multipart(api, upload_client, headers, audio, concurrency)
+                    elapsed = time.perf_counter() - start
+
+                    intact = bucket.objects.get(result["blob_name"]) == audio
+                    if not intact:
+                        failures.append(f"{label}: アップロードした内容が元の音声と一致しません")
+                    status = await generate_minutes(api, headers, result["blob_name"])
+                    parts = f", {result['parts']}パート" if "parts" in result else ""
+                    print(
+                        f"{label:<10} {elapsed:7.2f}秒  送信 {(server.received_bytes - before) / (1024 * 1024):7.1f} MB  "
+                        f"試行 {result['attempts']}回{parts}  内容一致={intact}  議事録生成={status}"
+                    )
+
+                failures.extend(await check_completion(api, headers, bucket, audio))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=600, help="入力音声（44.1kHzステレオWAV）の長さ（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.3, help="PUTが途中で失敗する確率")
+    parser.add_argument("--throughput-mb", type=float, default=20, help="1接続あたりのアップロード速度（MB/秒）")
+    parser.add_argument("--concurrency", type=int, default=4, help="パートの同時アップロード数")
+    parser.add_argument("--seed", type=int, default=0, help="失敗の発生に使う乱数シード")
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.duration, args.failure_rate, args.throughput_mb, args.concurrency, args.seed))
+    for failure in failures:
+        print(f"NG: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: 開始時と異なるパート数・途中で切れたパートでは結合されない")
@@ -0,0 +1,62 @@
+"""
+長い音声の圧縮時間の比較（1プロセス vs 時間で区切った並列圧縮）
+
+ffmpegで話し声に近い合成音声（44.1kHzステレオWAV）を生成し、プロファイルごとに
+圧縮時間と出力の長さを比較する（並列圧縮の出力の長さが1プロセスの場合と一致するかの確認を兼ねる）
+
+使い方:
+    python -m benchmarks.parallel_encode --duration 3600 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from audio_processor import AUDIO_PROFILES, AudioProcessor
+from benchmarks.audio_profiles import generate_corpus
+
+
+async def run(duration: float, workers: int, profiles: list):
+    work_dir = tempfile.mkdtemp(prefix="parallel_encode_")
+    try:
+        input_path = generate_corpus(work_dir, [duration])[0]
+        processor = AudioProcessor(encode_workers=workers)
+        input_duration = await processor.get_duration(input_path)
+        print(
+            f"入力: {os.path.getsize(input_path) / (1024 * 1024):.1f} MB, {input_duration:.2f}秒, "
+            f"{len(processor._parallel_ranges(input_duration))}区間, 同時実行数 {workers} (CPU数 {os.cpu_count()})"
+        )
+
+        for name in profiles:
+            profile = AUDIO_PROFILES[name]
+            results = {}
+            for label in ("single", "parallel"):
+                start = time.perf_counter()
+                if label == "single":
+                    output_path = await processor._compress_with_ffmpeg(input_path, profile)
+                else:
+                    output_path = await processor._compress_parallel(input_path, profile, input_duration)
+                elapsed = time.perf_counter() - start
+                results[label] = (elapsed, await processor.get_duration(output_path), os.path.getsize(output_path))
+
+            single_duration = results["single"][1]
+            for label, (elapsed, output_duration, output_size) in results.items():
+                print(
+                    f"{name:<8} {label:<9} {elapsed:8.2f}秒  出力 {output_size / (1024 * 1024):7.2f} MB  "
+                    f"長さ {output_duration:9.2f}秒 (1プロセスとの差 {output_duration - single_duration:+.3f}秒)"
+                )
+            processor.cleanup()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3600, help="入力音声の長さ（秒）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="ffmpegの同時実行数")
+    parser.add_argument("--profiles", nargs="+", default=["mp3_64", "opus24"], choices=list(AUDIO_PROFILES),
+                        help="比較する圧縮プロファイル")
+    args = parser.parse_args()
+    asyncio.run(run(args.duration, args.workers, args.profiles))
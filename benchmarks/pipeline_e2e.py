@@ -0,0 +1,302 @@
+"""
+議事録生成・エクスポートのエンドツーエンド計測（GCS・Gemini APIのスタンドインを使用、API課金なし）
+
+録音の長さ（--durations）と同時実行数（--concurrency）の組み合わせごとに、
+POST /api/upload で同時にジョブを登録して完了までの時間・ステージごとの時間を計測し、
+続けて生成された議事録を POST /api/export で同時にエクスポートする
+GCSの読み込み速度、Geminiのアップロード速度・生成時間は引数で指定する
+結果は --output のJSONに保存し、--compare で以前の結果と比較できる
+
+入力音声はffmpegで生成する話し声に近い合成音声（ICレコーダー相当の44.1kHzステレオMP3 128kbps）
+解析結果・エクスポート結果のキャッシュは無効にして計測する
+
+使い方:
+    python -m benchmarks.pipeline_e2e --durations 60 600 --concurrency 1 2 4 8 16 32
+    python -m benchmarks.pipeline_e2e --durations 18000 --concurrency 1 4 --output long.json --compare base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+import httpx
+
+from audio_processor import find_ffmpeg
+from benchmarks.fakes import FakeBucket, FakeGenai
+
+METADATA = {
+    "created_date": "2026-01-01",
+    "creator": "benchmark",
+    "customer_name": "benchmark",
+    "meeting_place": "benchmark",
+}
+
+# 混雑による拒否（429: 処理待ちが上限、503: 以前の実装との比較用）
+REJECTED_STATUS_CODES = (429, 503)
+
+
+def generate_recording(path: str, duration: float):
+    """話し声に近い合成音声（発話5秒・無音2秒の繰り返し）をMP3で生成"""
+    source = (
+        f"anoisesrc=d={duration}:c=pink:r=44100:a=0.5,"
+        "bandpass=f=400:width_type=h:w=600,tremolo=f=4:d=0.7,"
+        "volume='if(lt(mod(t\\,7)\\,5)\\,1\\,0.02)':eval=frame"
+    )
+    subprocess.run(
+        [find_ffmpeg(), '-hide_banner', '-loglevel', 'error', '-f', 'lavfi', '-i', source,
+         '-ac', '2', '-c:a', 'libmp3lame', '-b:a', '128k', '-y', path],
+        check=True,
+    )
+
+
+def summarize(values: list) -> dict:
+    """件数・p50・p95・最大（秒）"""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": round(statistics.median(values), 3),
+        "p95": round(values[max(0, int(len(values) * 0.95 + 0.5) - 1)], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def collect_spans(job, spans: dict):
+    """ジョブのトレースの区間の所要時間を名前ごとに集める（ffmpegなど同じ名前の区間は合計する）"""
+    totals = {}
+    for entry in job.trace.timeline()["spans"][1:] if job.trace else []:
+        totals[entry["name"]] = totals.get(entry["name"], 0.0) + entry["duration_ms"] / 1000
+    for name, seconds in totals.items():
+        spans.setdefault(name, []).append(seconds)
+
+
+async def run_jobs(main, client: httpx.AsyncClient, headers: dict, bucket: FakeBucket,
+                   audio: bytes, duration: float, concurrency: int) -> tuple:
+    """同時に concurrency 件のジョブを登録し、すべての完了を待って結果を集計"""
+    job_ids = []
+    rejected = 0
+    started = time.perf_counter()
+    for i in range(concurrency):
+        blob_name = f"benchmark/{int(duration)}s-{concurrency}-{i}.mp3"
+        bucket.objects[blob_name] = audio
+        response = await client.post("/api/upload", headers=headers, data={"blob_name": blob_name, **METADATA})
+        if response.status_code == 202:
+            job_ids.append(response.json()["job_id"])
+        else:
+            rejected += 1
+            bucket.objects.pop(blob_name, None)
+
+    jobs = [main.job_queue.get(job_id) for job_id in job_ids]
+    while any(job.status not in ("completed", "failed") for job in jobs):
+        await asyncio.sleep(0.1)
+    wall = time.perf_counter() - started
+
+    completed = [job for job in jobs if job.status == "completed"]
+    stages = {}
+    spans = {}
+    for job in completed:
+        for stage, seconds in job.stage_timings.items():
+            stages.setdefault(stage, []).append(seconds)
+        collect_spans(job, spans)
+
+    result = {
+        "submitted": concurrency,
+        "rejected": rejected,
+        "completed": len(completed),
+        "failed": len(jobs) - len(completed),
+        "errors": sorted({job.error for job in jobs if job.error}),
+        "wall_seconds": round(wall, 3),
+        "jobs_per_minute": round(len(completed) / wall * 60, 2),
+        # 1時間あたりに処理できる録音の時間（時間）
+        "audio_hours_per_hour": round(len(completed) * duration / wall, 2),
+        "input_mb_per_second": round(len(completed) * len(audio) / (1024 * 1024) / wall, 2),
+        "job_seconds": summarize([job.finished_at - job.started_at for job in completed]),
+        "queue_wait_seconds": summarize([job.started_at - job.created_at for job in completed]),
+        "stages": {stage: summarize(values) for stage, values in sorted(stages.items())},
+        "spans": {name: summarize(values) for name, values in sorted(spans.items())},
+    }
+    return result, [job.result["summary"] for job in completed]
+
+
+async def run_exports(client: httpx.AsyncClient, headers: dict, summaries: list,
+                      export_format: str, concurrency: int) -> dict:
+    """生成された議事録を同時に concurrency 件エクスポート"""
+    async def export(summary: str) -> tuple:
+        start = time.perf_counter()
+        response = await client.post("/api/export", headers=headers, json={
+            "summary": summary, "metadata": METADATA, "format": export_format,
+        })
+        return response.status_code, time.perf_counter() - start
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(export(summaries[i % len(summaries)]) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    latencies = [seconds for code, seconds in results if code == 200]
+    return {
+        "succeeded": len(latencies),
+        "rejected": sum(1 for code, _ in results if code in REJECTED_STATUS_CODES),
+        "failed": sum(1 for code, _ in results if code != 200 and code not in REJECTED_STATUS_CODES),
+        "wall_seconds": round(wall, 3),
+        "exports_per_second": round(len(latencies) / wall, 2),
+        "latency_seconds": summarize(latencies),
+    }
+
+
+def print_result(entry: dict):
+    jobs = entry["jobs"]
+    stages = "  ".join(f"{stage} {values['p50']:.2f}" for stage, values in jobs["stages"].items())
+    print(
+        f"{entry['duration_seconds'] / 60:6.0f}分 ×{entry['concurrency']:<3} "
+        f"完了 {jobs['completed']}/{jobs['submitted']}  全体 {jobs['wall_seconds']:7.2f}秒  "
+        f"ジョブ p50 {jobs['job_seconds'].get('p50', 0):7.2f}秒 p95 {jobs['job_seconds'].get('p95', 0):7.2f}秒  "
+        f"処理量 {jobs['audio_hours_per_hour']:7.2f}時間/時"
+    )
+    print(f"{'':12}ステージ p50（秒）: {stages}")
+    for export_format, export in entry["exports"].items():
+        latency = export["latency_seconds"]
+        print(
+            f"{'':12}{export_format:<5} 成功 {export['succeeded']}/{entry['concurrency']}"
+            f"（拒否 {export['rejected']}）  p50 {latency.get('p50', 0):.3f}秒 p95 {latency.get('p95', 0):.3f}秒  "
+            f"{export['exports_per_second']:.2f}件/秒"
+        )
+
+
+def compare(results: list, baseline_path: str):
+    """以前の結果と、同じ長さ・同時実行数のジョブ時間とステージ時間（p50）を比較"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {
+            (entry["duration_seconds"], entry["concurrency"]): entry for entry in json.load(f)["results"]
+        }
+    print(f"\n{baseline_path} との比較（p50、+は遅くなった割合）")
+    for entry in results:
+        previous = baseline.get((entry["duration_seconds"], entry["concurrency"]))
+        if previous is None:
+            continue
+        pairs = [("job", entry["jobs"]["job_seconds"], previous["jobs"]["job_seconds"])]
+        pairs += [
+            (stage, values, previous["jobs"]["stages"].get(stage, {}))
+            for stage, values in entry["jobs"]["stages"].items()
+        ]
+        changes = [
+            f"{name} {current['p50'] / old['p50'] - 1:+.0%}"
+            for name, current, old in pairs
+            if current.get("p50") and old.get("p50")
+        ]
+        print(f"{entry['duration_seconds'] / 60:6.0f}分 ×{entry['concurrency']:<3} " + "  ".join(changes))
+
+
+async def run(args):
+    # 同時実行数の上限まで受け付けて並行に処理させる（importより前に設定する）
+    os.environ.setdefault("JOB_WORKERS", str(max(args.concurrency)))
+    os.environ.setdefault("JOB_QUEUE_SIZE", str(max(args.concurrency)))
+    import main
+    from document_generator import load_japanese_font
+
+    bucket = FakeBucket(
+        metadata_latency=args.gcs_latency,
+        throughput_bytes_per_sec=args.gcs_mbps * 1000 * 1000 / 8,
+    )
+    fake_genai = FakeGenai(
+        upload_latency=args.gemini_upload_latency,
+        upload_throughput_bytes_per_sec=args.gemini_upload_mbps * 1000 * 1000 / 8,
+        processing_polls=args.gemini_processing_polls,
+    )
+    main.services.bucket = bucket
+    main.services.result_cache = None
+    main.export_cache = None
+    fake_genai.install(main.services.gemini)
+
+    export_formats = ["word"]
+    if load_japanese_font() is not None:
+        export_formats.append("pdf")
+    else:
+        print("日本語フォントが見つからないため、PDFは計測しません")
+
+    token = main.auth_service.create_access_token({"sub": "benchmark"})
+    headers = {"Authorization": f"Bearer {token}"}
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="pipeline_e2e_")
+    try:
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                for duration in args.durations:
+                    path = os.path.join(work_dir, f"recording_{int(duration)}s.mp3")
+                    generate_recording(path, duration)
+                    with open(path, "rb") as f:
+                        audio = f.read()
+                    os.unlink(path)
+                    # Geminiの生成時間は録音の長さに比例させる
+                    fake_genai.generate_latency = args.generate_latency + args.generate_seconds_per_hour * duration / 3600
+
+                    for concurrency in args.concurrency:
+                        jobs, summaries = await run_jobs(main, client, headers, bucket, audio, duration, concurrency)
+                        exports = {}
+                        if summaries:
+                            for export_format in export_formats:
+                                exports[export_format] = await run_exports(
+                                    client, headers, summaries, export_format, concurrency
+                                )
+                        entry = {
+                            "duration_seconds": duration,
+                            "input_bytes": len(audio),
+                            "concurrency": concurrency,
+                            "jobs": jobs,
+                            "exports": exports,
+                        }
+                        results.append(entry)
+                        print_result(entry)
+    finally:
+        for name in os.listdir(work_dir):
+            os.unlink(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "job_workers": main.job_queue.max_workers,
+            "audio_profile": main.services.audio_processor.profile,
+            "audio_streaming": main.AUDIO_STREAMING_ENABLED,
+        },
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n結果を保存しました: {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600],
+                        help="録音の長さ（秒、1分〜5時間は 60 〜 18000）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="同時に登録するジョブ・エクスポートの数")
+    parser.add_argument("--gcs-latency", type=float, default=0.05, help="GCSの呼び出し1回あたりの待ち時間（秒）")
+    parser.add_argument("--gcs-mbps", type=float, default=400, help="GCSからの読み込み速度（Mbps）")
+    parser.add_argument("--gemini-upload-latency", type=float, default=0.3,
+                        help="Geminiへのアップロード1回あたりの待ち時間（秒）")
+    parser.add_argument("--gemini-upload-mbps", type=float, default=100, help="Geminiへのアップロード速度（Mbps）")
+    parser.add_argument("--gemini-processing-polls", type=int, default=1,
+                        help="アップロードしたファイルがACTIVEになるまでの状態確認の回数")
+    parser.add_argument("--generate-latency", type=float, default=2.0, help="生成の固定の待ち時間（秒）")
+    parser.add_argument("--generate-seconds-per-hour", type=float, default=30.0,
+                        help="録音1時間あたりに加える生成時間（秒）")
+    parser.add_argument("--output", default="pipeline_e2e.json", help="結果を保存するJSONファイル")
+    parser.add_argument("--compare", help="比較する以前の結果のJSONファイル")
+    args = parser.parse_args()
+    asyncio.run(run(args))
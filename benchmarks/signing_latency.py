@@ -0,0 +1,157 @@
+"""
+署名付きURL用のサービスアカウント取得のレイテンシ比較（リクエストごとに取得 vs キャッシュ）
+
+ローカルに偽のメタデータサーバーを起動し、GCE上の認証情報（compute_engine.Credentials）を
+そこへ向けて計測する（GCPへの接続は不要）
+    per-request: リクエストごとにトークン更新＋メールアドレス取得（従来の経路）
+    cached:      SigningIdentity のキャッシュを使う（現在の経路）
+
+IAMによる署名そのものはネットワークが必要なため計測対象外
+
+使い方:
+    python -m benchmarks.signing_latency --requests 50 --metadata-latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICE_ACCOUNT_EMAIL = "benchmark@example.iam.gserviceaccount.com"
+
+
+class FakeMetadataServer:
+    """GCEメタデータサーバーの代わり（メールアドレス・アカウント情報・アクセストークンのみ）"""
+
+    def __init__(self, latency_seconds: float = 0.0, token_lifetime_seconds: int = 3600):
+        self.latency_seconds = latency_seconds
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self.requests = 0
+        self.token_requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency_seconds)
+                if self.headers.get("Metadata-Flavor") != "Google":
+                    self.send_error(403)
+                    return
+                # アカウント名は default でもメールアドレスでもよい
+                path = self.path.split("?")[0]
+                if "/service-accounts/" not in path:
+                    self.send_error(404)
+                elif path.endswith("/email"):
+                    self._send("text/plain", SERVICE_ACCOUNT_EMAIL)
+                elif path.endswith("/token"):
+                    server.token_requests += 1
+                    self._send("application/json", json.dumps({
+                        "access_token": f"fake-token-{server.token_requests}",
+                        "expires_in": server.token_lifetime_seconds,
+                        "token_type": "Bearer",
+                    }))
+                elif path.endswith("/"):
+                    self._send("application/json", json.dumps({
+                        "email": SERVICE_ACCOUNT_EMAIL,
+                        "scopes": ["https://www.googleapis.com/auth/cloud-platform"],
+                    }))
+                else:
+                    self.send_error(404)
+
+            def _send(self, content_type: str, body: str):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Metadata-Flavor", "Google")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def legacy_identity(credentials, metadata_host: str) -> tuple:
+    """従来の経路：リクエストごとにトークンを更新し、メタデータサーバーからメールアドレスを取得"""
+    from google.auth.transport import requests as google_auth_requests
+
+    credentials.refresh(google_auth_requests.Request())
+    req = urllib.request.Request(
+        f"http://{metadata_host}/computeMetadata/v1/instance/service-accounts/default/email",
+        headers={"Metadata-Flavor": "Google"}
+    )
+    with urllib.request.urlopen(req, timeout=2) as response:
+        return response.read().decode("utf-8"), credentials.token
+
+
+async def measure(requests: int, server: FakeMetadataServer) -> dict:
+    from google.auth.compute_engine import credentials as compute_credentials
+    from signing_identity import SigningIdentity
+
+    latencies = {"per-request": [], "cached": []}
+    metadata_requests = {}
+
+    legacy_credentials = compute_credentials.Credentials()
+    before = server.requests
+    for _ in range(requests):
+        start = time.perf_counter()
+        await asyncio.to_thread(legacy_identity, legacy_credentials, server.host)
+        latencies["per-request"].append((time.perf_counter() - start) * 1000)
+    metadata_requests["per-request"] = server.requests - before
+
+    identity = SigningIdentity(credentials=compute_credentials.Credentials(), metadata_host=server.host)
+    before = server.requests
+    identity.start()
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            email, token = await identity.get()
+            latencies["cached"].append((time.perf_counter() - start) * 1000)
+            assert email == SERVICE_ACCOUNT_EMAIL and token
+    finally:
+        await identity.stop()
+    metadata_requests["cached"] = server.requests - before
+
+    return {
+        label: {"latencies": values, "metadata_requests": metadata_requests[label]}
+        for label, values in latencies.items()
+    }
+
+
+def run(requests: int, metadata_latency_ms: float):
+    with FakeMetadataServer(latency_seconds=metadata_latency_ms / 1000) as server:
+        # google-authはメタデータサーバーのホストをimport時に読み込むため、importより先に設定する
+        os.environ["GCE_METADATA_HOST"] = server.host
+        results = asyncio.run(measure(requests, server))
+
+    for label, result in results.items():
+        latencies = sorted(result["latencies"])
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        print(
+            f"{label:<12} n={requests:<4} p50={statistics.median(latencies):8.2f}ms  "
+            f"p95={p95:8.2f}ms  max={latencies[-1]:8.2f}ms  "
+            f"metadata_requests={result['metadata_requests']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="署名付きURL生成リクエスト数")
+    parser.add_argument("--metadata-latency-ms", type=float, default=20, help="メタデータサーバーの応答遅延（ミリ秒）")
+    args = parser.parse_args()
+    run(args.requests, args.metadata_latency_ms)
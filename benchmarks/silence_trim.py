@@ -0,0 +1,101 @@
+"""
+無音除去の効果の計測（除去した長さ・圧縮済み音声のサイズ・Geminiへのアップロード時間）
+
+ffmpegで「発話 --speech 秒・無音 --silence 秒」を繰り返す合成音声を生成して圧縮し、
+無音除去の前後を比較する。除去後の音声で検出した発話の開始時刻を時刻の対応で元の録音の時刻に戻し、
+実際の発話の開始時刻とのずれも確認する
+アップロード時間は --upload-mbps の回線速度からの推定値。--gemini を付けると実際にアップロードして計測する
+
+使い方:
+    python -m benchmarks.silence_trim --duration 3600 --speech 60 --silence 30
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from audio_processor import AUDIO_PROFILES, AudioProcessor, find_ffmpeg
+from benchmarks.audio_profiles import upload_to_gemini
+
+
+def generate_recording(path: str, duration: float, speech: float, silence: float):
+    """発話と無音（現場の移動中や電話待ちを想定した小さな環境音）を繰り返す合成音声を生成"""
+    period = speech + silence
+    source = (
+        f"anoisesrc=d={duration}:c=pink:r=44100:a=0.5,"
+        "bandpass=f=400:width_type=h:w=600,tremolo=f=4:d=0.7,"
+        f"volume='if(lt(mod(t\\,{period})\\,{speech})\\,1\\,0.001)':eval=frame"
+    )
+    subprocess.run(
+        [find_ffmpeg(), '-hide_banner', '-loglevel', 'error', '-f', 'lavfi', '-i', source,
+         '-ac', '2', '-c:a', 'pcm_s16le', '-y', path],
+        check=True,
+    )
+
+
+async def run(duration: float, speech: float, silence: float, profiles: list, upload_mbps: float, use_gemini: bool):
+    work_dir = tempfile.mkdtemp(prefix="silence_trim_")
+    try:
+        input_path = os.path.join(work_dir, "recording.wav")
+        generate_recording(input_path, duration, speech, silence)
+        processor = AudioProcessor(trim_silence=True)
+        period = speech + silence
+        print(f"入力: {duration / 60:.0f}分（発話 {speech:.0f}秒・無音 {silence:.0f}秒の繰り返し）")
+
+        for name in profiles:
+            compressed_path = await processor._compress_with_ffmpeg(input_path, AUDIO_PROFILES[name])
+            start = time.perf_counter()
+            trimmed_path, trim_map = await processor.trim_silence(compressed_path)
+            trim_time = time.perf_counter() - start
+            if trim_map is None:
+                print(f"{name:<8} 除去する無音がありませんでした")
+                processor.cleanup()
+                continue
+
+            # 除去後の音声で発話の開始時刻を検出し、元の録音の時刻に戻して実際の開始時刻と比べる
+            _, silences = await processor._detect_silence(
+                trimmed_path, processor.TRIM_SILENCE_THRESHOLD, processor.SILENCE_MIN_DURATION
+            )
+            errors = []
+            for _, end in silences:
+                original = trim_map.to_original(end)
+                errors.append(abs(original - round(original / period) * period))
+            max_error = max(errors) if errors else 0.0
+
+            sizes = [os.path.getsize(compressed_path), os.path.getsize(trimmed_path)]
+            uploads = []
+            for path, size in zip((compressed_path, trimmed_path), sizes):
+                if use_gemini:
+                    uploads.append(await asyncio.to_thread(upload_to_gemini, path))
+                else:
+                    uploads.append(size * 8 / (upload_mbps * 1000 * 1000))
+            actual_duration = await processor.get_duration(trimmed_path)
+            print(
+                f"{name:<8} 除去 {trim_map.removed_seconds:7.1f}秒（{trim_map.removed_seconds / duration:.0%}）"
+                f"  処理 {trim_time:5.2f}秒"
+                f"  サイズ {sizes[0] / (1024 * 1024):6.2f} → {sizes[1] / (1024 * 1024):6.2f} MB"
+                f"  アップロード {uploads[0]:6.2f} → {uploads[1]:6.2f}秒"
+                f"  長さ（対応表との差） {actual_duration - trim_map.trimmed_duration:+.3f}秒"
+                f"  発話開始時刻のずれ 最大 {max_error:.3f}秒（{len(errors)}か所）"
+            )
+            processor.cleanup()
+        if not use_gemini:
+            print(f"アップロード時間は {upload_mbps}Mbps での推定")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3600, help="入力音声の長さ（秒）")
+    parser.add_argument("--speech", type=float, default=60, help="発話が続く長さ（秒）")
+    parser.add_argument("--silence", type=float, default=30, help="無音が続く長さ（秒）")
+    parser.add_argument("--profiles", nargs="+", default=["mp3_32", "opus24"], choices=list(AUDIO_PROFILES),
+                        help="比較する圧縮プロファイル")
+    parser.add_argument("--upload-mbps", type=float, default=20, help="アップロード時間の推定に使う回線速度（Mbps）")
+    parser.add_argument("--gemini", action="store_true", help="実際にGeminiへアップロードして計測する")
+    args = parser.parse_args()
+    asyncio.run(run(args.duration, args.speech, args.silence, args.profiles, args.upload_mbps, args.gemini))
@@ -0,0 +1,117 @@
+"""
+コールドスタート時間の計測（プロセス起動からリクエスト受付・ウォームアップ完了まで）
+
+uvicornでアプリを別プロセスとして起動し、以下を計測する
+    import:    `import main` にかかる時間
+    listening: プロセス起動から /health が応答するまで
+    ready:     プロセス起動からウォームアップ（サービス初期化・エクスポート用プロセス起動）完了まで
+
+使い方:
+    python -m benchmarks.startup_time --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_MESSAGE = "ウォームアップ完了"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+    env["PYTHONUNBUFFERED"] = "1"
+    return env
+
+
+def measure_import() -> float:
+    """`import main` の時間（秒）"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import main"],
+        cwd=ROOT_DIR, env=_env(), check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def measure_startup(timeout: float = 60) -> tuple:
+    """
+    uvicornを起動して、待ち受け開始・ウォームアップ完了までの時間（秒）を計測
+
+    Returns:
+        (listening, ready)
+    """
+    port = _free_port()
+    ready_event = threading.Event()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT_DIR, env=_env(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    ready_at = []
+
+    def watch_log():
+        for line in process.stderr:
+            if READY_MESSAGE in line and not ready_event.is_set():
+                ready_at.append(time.perf_counter() - start)
+                ready_event.set()
+
+    threading.Thread(target=watch_log, daemon=True).start()
+
+    try:
+        listening = None
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    listening = time.perf_counter() - start
+                    break
+            except httpx.TransportError:
+                time.sleep(0.01)
+        if listening is None:
+            raise RuntimeError("サーバーが起動しませんでした")
+        if not ready_event.wait(timeout):
+            raise RuntimeError("ウォームアップが完了しませんでした")
+        return listening, ready_at[0]
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(runs: int):
+    imports, listenings, readies = [], [], []
+    for _ in range(runs):
+        imports.append(measure_import())
+        listening, ready = measure_startup()
+        listenings.append(listening)
+        readies.append(ready)
+
+    for label, values in (("import", imports), ("listening", listenings), ("ready", readies)):
+        print(
+            f"{label:<10} n={runs:<3} p50={statistics.median(values) * 1000:8.1f}ms  "
+            f"min={min(values) * 1000:8.1f}ms  max={max(values) * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    args = parser.parse_args()
+    run(args.runs)
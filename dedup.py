@@ -0,0 +1,75 @@
+"""
+近似重複行の検出 - 同じセクション内の直近の行と文字n-gramのJaccard係数で比較する
+数行離れて繰り返される箇条書きも、1行あたり一定の比較回数で検出する
+"""
+from collections import deque
+from typing import Deque, FrozenSet, Set, Tuple
+
+
+class NearDuplicateWindow:
+    """
+    直近に登録した行と似ている行を探す
+
+    完全に同じ行は登録済みのすべての行と集合で判定し、
+    それ以外は直近 window 行だけを文字n-gram（シングル）の集合のJaccard係数で比較する
+    セクションをまたいで比較しないよう、見出しごとに clear() で空にして使う
+    """
+
+    def __init__(self, shingle_size: int = 3, window: int = 10, threshold: float = 0.8):
+        """
+        Args:
+            shingle_size: シングルの文字数
+            window: 近似重複を比較する直近の行数
+            threshold: 重複とみなすJaccard係数の下限
+        """
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self._texts: Set[str] = set()
+        self._recent: Deque[Tuple[int, FrozenSet[str]]] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def clear(self):
+        """登録済みの行をすべて削除"""
+        self._texts.clear()
+        self._recent.clear()
+
+    def shingles(self, text: str) -> FrozenSet[str]:
+        """文字列をシングルの集合に変換（シングルより短い文字列は全体を1つとする）"""
+        size = self.shingle_size
+        if len(text) <= size:
+            return frozenset((text,))
+        return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+    @staticmethod
+    def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+        """2つのシングル集合のJaccard係数"""
+        if not a or not b:
+            return 0.0
+        intersection = len(a & b)
+        return intersection / (len(a) + len(b) - intersection)
+
+    def check_and_add(self, text: str) -> bool:
+        """
+        似ている行が登録済みか判定し、なければ登録する
+
+        Returns:
+            似ている行が登録済みの場合はTrue（その場合は登録しない）
+        """
+        # 完全に同じ行はシングルを作らずに判定する
+        if text in self._texts:
+            return True
+
+        shingles = self.shingles(text)
+        size = len(shingles)
+        # 集合の大きさの比がしきい値未満なら、Jaccard係数もしきい値に届かない
+        lower = size * self.threshold
+        upper = size / self.threshold
+        for recent_size, recent in self._recent:
+            if lower <= recent_size <= upper and self.jaccard(shingles, recent) >= self.threshold:
+                return True
+
+        self._texts.add(text)
+        self._recent.append((size, shingles))
+        return False
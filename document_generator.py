@@ -4,17 +4,158 @@
 from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from fontTools import ttLib
 from fpdf import FPDF
-import tempfile
+from fpdf.fonts import SubsetMap, TTFFont
+import copy
+import io
 import os
 import logging
 import re
 import glob
-from typing import Dict
-from datetime import datetime
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+from export_renderer import format_created_at
 
 logger = logging.getLogger(__name__)
 
+# フォントファイルを探すディレクトリ（build時に prepare_fonts.py が日本語フェイスを書き出す）
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# 同梱フォント（環境非依存のため最優先）
+BUNDLED_FONT_FILES = [
+    "NotoSansJP-Regular.ttf",
+    "NotoSansCJKjp-Regular.otf",
+    "NotoSansJP-Regular.otf",
+]
+
+# システムフォント
+SYSTEM_FONT_PATHS = [
+    # Windows
+    ("C:\\Windows\\Fonts\\msgothic.ttc", "MSGothic"),
+    ("C:\\Windows\\Fonts\\meiryo.ttc", "Meiryo"),
+    ("C:\\Windows\\Fonts\\YuGothR.ttc", "YuGothic"),
+    ("C:\\Windows\\Fonts\\msmincho.ttc", "MSMincho"),
+    # macOS
+    ("/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc", "Hiragino"),
+    ("/Library/Fonts/Arial Unicode.ttf", "ArialUnicode"),
+    # Linux (Debian/Ubuntu fonts-noto-cjk) - 優先順位順
+    ("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", "NotoSansCJK"),
+    ("/usr/share/fonts/opentype/noto/NotoSansCJKjp-Regular.otf", "NotoSansCJK"),
+    ("/usr/share/fonts/truetype/noto/NotoSansCJKjp-Regular.otf", "NotoSansCJK"),
+    ("/usr/share/fonts/truetype/noto/NotoSansCJK.ttc", "NotoSansCJK"),
+    ("/usr/share/fonts/opentype/noto-cjk/NotoSansCJK-Regular.ttc", "NotoSansCJK"),
+    ("/usr/share/fonts/truetype/noto-cjk/NotoSansCJKjp-Regular.ttf", "NotoSansCJK"),
+]
+
+# 上記で見つからない場合のglob検索パターン
+FONT_SEARCH_PATTERNS = [
+    "/usr/share/fonts/**/NotoSans*CJK*.ttc",
+    "/usr/share/fonts/**/NotoSans*CJK*.otf",
+    "/usr/share/fonts/**/NotoSans*CJK*.ttf",
+    "/usr/share/fonts/**/*Gothic*.ttc",
+    "/usr/share/fonts/**/*gothic*.ttc",
+]
+
+_font_lock = threading.Lock()
+
+
+def _japanese_font_candidates() -> Iterator[Tuple[str, str, str]]:
+    """
+    日本語フォントの候補を優先順位順に列挙（globはそれより前の候補がすべて失敗した場合のみ実行）
+
+    Yields:
+        (フォントファイルのパス, フォントファミリー名, 種別)
+    """
+    for font_file in BUNDLED_FONT_FILES:
+        font_path = os.path.join(FONTS_DIR, font_file)
+        if os.path.exists(font_path):
+            yield font_path, "NotoSansJP", "同梱フォント"
+
+    for font_path, font_name in SYSTEM_FONT_PATHS:
+        if os.path.exists(font_path):
+            yield font_path, font_name, "日本語フォント"
+
+    for pattern in FONT_SEARCH_PATTERNS:
+        try:
+            found_fonts = glob.glob(pattern, recursive=True)
+        except Exception as e:
+            logger.warning(f"glob検索エラー: {pattern} - {str(e)}")
+            continue
+        for font_path in found_fonts[:1]:
+            yield font_path, "JapaneseFont", "日本語フォント（glob検索）"
+
+
+@lru_cache(maxsize=1)
+def _load_japanese_font_template() -> Optional[Tuple[str, str, TTFFont]]:
+    """
+    日本語フォントを探して解析し、プロセス内で使い回すテンプレートを作成（初回のみ実行）
+
+    Returns:
+        (フォントファイルのパス, フォントファミリー名, 解析済みのフォント)。見つからない場合はNone
+    """
+    for font_path, font_name, label in _japanese_font_candidates():
+        try:
+            start_time = time.perf_counter()
+            loader = FPDF()
+            loader.add_font(font_name, fname=font_path)
+            template = loader.fonts[font_name.lower()]
+            logger.info(f"{label}登録成功: {font_path} ({time.perf_counter() - start_time:.2f}秒)")
+            return font_path, font_name, template
+        except Exception as e:
+            logger.warning(f"フォント登録失敗: {font_path} - {str(e)}")
+
+    logger.error("日本語フォントが見つかりません。PDF生成に失敗する可能性があります。")
+    return None
+
+
+def load_japanese_font() -> Optional[Tuple[str, str, TTFFont]]:
+    """
+    日本語フォントのテンプレートを取得（同時に呼ばれても探索・解析は1回だけ行う）
+
+    Returns:
+        (フォントファイルのパス, フォントファミリー名, 解析済みのフォント)。見つからない場合はNone
+    """
+    with _font_lock:
+        return _load_japanese_font_template()
+
+
+# 複製時に作り直すフォントの属性（fpdf2 2.8の内部実装に依存するため、ない場合は複製しない）
+_CLONED_FONT_ATTRIBUTES = ("ttffile", "collection_font_number", "ttfont", "_hbfont", "subset", "missing_glyphs")
+
+
+def _clone_font(template: TTFFont, pdf: FPDF) -> TTFFont:
+    """
+    解析済みのフォントをPDFインスタンス用に複製
+
+    文字幅・cmapなど読み取り専用のデータはテンプレートと共有し、
+    出力時にサブセット化で書き換えられるfontToolsのフォントと、使用文字の記録は文書ごとに作り直す
+
+    Raises:
+        AttributeError: fpdf2のバージョンが異なり、複製に必要な属性がない場合
+    """
+    missing = [name for name in _CLONED_FONT_ATTRIBUTES if not hasattr(template, name)]
+    if missing:
+        raise AttributeError(f"フォントに属性がありません: {', '.join(missing)}")
+
+    font = copy.copy(template)
+    font.i = len(pdf.fonts) + 1
+    font.ttfont = ttLib.TTFont(
+        template.ttffile,
+        recalcTimestamp=False,
+        fontNumber=template.collection_font_number,
+        lazy=True,
+    )
+    font._hbfont = None
+    font.biggest_size_pt = 0
+    font.missing_glyphs = []
+    font.subset = SubsetMap(font)
+    return font
+
+
 class JapanesePDF(FPDF):
     """日本語対応PDF生成クラス"""
 
@@ -23,91 +164,25 @@ class JapanesePDF(FPDF):
         self.font_name = None
         self._setup_japanese_font()
 
-    def _get_bundled_font_path(self):
-        """プロジェクト同梱フォントのパスを取得"""
-        # このファイルのディレクトリを基準にfontsフォルダを探す
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        font_candidates = [
-            os.path.join(base_dir, "fonts", "NotoSansJP-Regular.ttf"),
-            os.path.join(base_dir, "fonts", "NotoSansCJKjp-Regular.otf"),
-            os.path.join(base_dir, "fonts", "NotoSansJP-Regular.otf"),
-        ]
-        for font_path in font_candidates:
-            if os.path.exists(font_path):
-                return font_path
-        return None
-
     def _setup_japanese_font(self):
-        """日本語フォントを設定"""
-        # 1. まずプロジェクト同梱のフォントを優先（環境非依存）
-        bundled_font = self._get_bundled_font_path()
-        if bundled_font:
-            try:
-                self.add_font("NotoSansJP", fname=bundled_font)
-                self.font_name = "NotoSansJP"
-                logger.info(f"同梱フォント登録成功: {bundled_font}")
-                return
-            except Exception as e:
-                logger.warning(f"同梱フォント登録失敗: {bundled_font} - {str(e)}")
-
-        # 2. システムフォントにフォールバック
-        font_paths = [
-            # Windows
-            ("C:\\Windows\\Fonts\\msgothic.ttc", "MSGothic"),
-            ("C:\\Windows\\Fonts\\meiryo.ttc", "Meiryo"),
-            ("C:\\Windows\\Fonts\\YuGothR.ttc", "YuGothic"),
-            ("C:\\Windows\\Fonts\\msmincho.ttc", "MSMincho"),
-            # macOS
-            ("/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc", "Hiragino"),
-            ("/Library/Fonts/Arial Unicode.ttf", "ArialUnicode"),
-            # Linux (Debian/Ubuntu fonts-noto-cjk) - 優先順位順
-            ("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", "NotoSansCJK"),
-            ("/usr/share/fonts/opentype/noto/NotoSansCJKjp-Regular.otf", "NotoSansCJK"),
-            ("/usr/share/fonts/truetype/noto/NotoSansCJKjp-Regular.otf", "NotoSansCJK"),
-            ("/usr/share/fonts/truetype/noto/NotoSansCJK.ttc", "NotoSansCJK"),
-            ("/usr/share/fonts/opentype/noto-cjk/NotoSansCJK-Regular.ttc", "NotoSansCJK"),
-            ("/usr/share/fonts/truetype/noto-cjk/NotoSansCJKjp-Regular.ttf", "NotoSansCJK"),
-        ]
-
-        for font_path, font_name in font_paths:
-            if os.path.exists(font_path):
-                try:
-                    self.add_font(font_name, fname=font_path)
-                    self.font_name = font_name
-                    logger.info(f"日本語フォント登録成功: {font_path}")
-                    return
-                except Exception as e:
-                    logger.warning(f"フォント登録失敗: {font_path} - {str(e)}")
-                    continue
-
-        # 3. フォントが見つからない場合、globで検索
-        search_patterns = [
-            "/usr/share/fonts/**/NotoSans*CJK*.ttc",
-            "/usr/share/fonts/**/NotoSans*CJK*.otf",
-            "/usr/share/fonts/**/NotoSans*CJK*.ttf",
-            "/usr/share/fonts/**/*Gothic*.ttc",
-            "/usr/share/fonts/**/*gothic*.ttc",
-        ]
-        for pattern in search_patterns:
-            try:
-                found_fonts = glob.glob(pattern, recursive=True)
-                if found_fonts:
-                    font_path = found_fonts[0]
-                    try:
-                        self.add_font("JapaneseFont", fname=font_path)
-                        self.font_name = "JapaneseFont"
-                        logger.info(f"日本語フォント登録成功（glob検索）: {font_path}")
-                        return
-                    except Exception as e:
-                        logger.warning(f"フォント登録失敗（glob検索）: {font_path} - {str(e)}")
-                        continue
-            except Exception as e:
-                logger.warning(f"glob検索エラー: {pattern} - {str(e)}")
-                continue
+        """日本語フォントを設定（解析済みのフォントをプロセス内で共有）"""
+        loaded = load_japanese_font()
+        if loaded is None:
+            self.font_name = None
+            return
 
-        # フォントが見つからない場合
-        logger.error("日本語フォントが見つかりません。PDF生成に失敗する可能性があります。")
-        self.font_name = None
+        font_path, font_name, template = loaded
+        try:
+            font = _clone_font(template, self)
+            if font.is_cff and font.is_cid_keyed:
+                self._set_min_pdf_version("1.6")
+            # すべての属性を設定してから登録する（失敗時に作りかけのフォントを残さない）
+            self.fonts[template.fontkey] = font
+        except Exception as e:
+            # 複製に失敗した場合は従来どおりファイルから登録
+            logger.warning(f"フォントキャッシュを使用できません: {str(e)}")
+            self.add_font(font_name, fname=font_path)
+        self.font_name = font_name
 
     def set_japanese_font(self, size=10):
         """日本語フォントを設定"""
@@ -132,16 +207,16 @@ class DocumentGenerator:
         text = re.sub(r'\*\*(.+?)\*\*', r'【\1】', text)
         return text
 
-    def generate_word(self, content: str, metadata: Dict) -> str:
+    def generate_word(self, content: str, metadata: Dict) -> bytes:
         """
-        Word文書を生成
+        Word文書を生成（ファイルには書き出さずメモリ上で作成）
 
         Args:
             content: 議事録の本文
-            metadata: メタデータ（日付、作成者など）
+            metadata: メタデータ（日付、作成者など。created_at を指定するとフッターの作成日時に使う）
 
         Returns:
-            生成されたWordファイルのパス
+            生成されたWordファイルの内容
         """
         try:
             logger.info("Word文書の生成を開始")
@@ -208,41 +283,39 @@ class DocumentGenerator:
 
             # フッター
             doc.add_paragraph()
-            footer = doc.add_paragraph(f"作成日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}")
+            footer = doc.add_paragraph(f"作成日時: {metadata.get('created_at') or format_created_at()}")
             footer.alignment = WD_ALIGN_PARAGRAPH.RIGHT
             footer_run = footer.runs[0]
             footer_run.font.size = Pt(9)
             footer_run.font.color.rgb = RGBColor(128, 128, 128)
 
-            # 一時ファイルに保存
-            output_path = tempfile.mktemp(suffix=".docx")
-            doc.save(output_path)
+            # メモリ上のバッファに保存
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            data = buffer.getvalue()
 
-            logger.info(f"Word文書生成完了: {output_path}")
-            return output_path
+            logger.info(f"Word文書生成完了: {len(data)} bytes")
+            return data
 
         except Exception as e:
             logger.error(f"Word文書生成エラー: {str(e)}")
             raise
 
-    def generate_pdf(self, content: str, metadata: Dict) -> str:
+    def generate_pdf(self, content: str, metadata: Dict) -> bytes:
         """
-        PDF文書を生成（fpdf2使用）
+        PDF文書を生成（fpdf2使用、ファイルには書き出さずメモリ上で作成）
 
         Args:
             content: 議事録の本文
-            metadata: メタデータ（日付、作成者など）
+            metadata: メタデータ（日付、作成者など。created_at を指定するとフッターの作成日時に使う）
 
         Returns:
-            生成されたPDFファイルのパス
+            生成されたPDFファイルの内容
         """
         try:
             logger.info("PDF文書の生成を開始")
             logger.info(f"metadata: {metadata}")
 
-            # 一時ファイルパス
-            output_path = tempfile.mktemp(suffix=".pdf")
-
             # PDF作成
             try:
                 pdf = JapanesePDF()
@@ -408,14 +481,14 @@ class DocumentGenerator:
 
             pdf.set_japanese_font(8)
             pdf.set_text_color(128, 128, 128)
-            footer_text = f"作成日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}"
+            footer_text = f"作成日時: {metadata.get('created_at') or format_created_at()}"
             pdf.cell(effective_width, 6, footer_text, align='R')
 
-            # PDF保存
-            pdf.output(output_path)
+            # PDFをバイト列として出力
+            data = bytes(pdf.output())
 
-            logger.info(f"PDF文書生成完了: {output_path}")
-            return output_path
+            logger.info(f"PDF文書生成完了: {len(data)} bytes")
+            return data
 
         except Exception as e:
             import traceback
@@ -0,0 +1,83 @@
+"""
+エクスポート結果キャッシュ - 同じ議事録の再エクスポートを即座に返す
+本文・メタデータ・形式のハッシュをキーに、生成済みのWord/PDFをメモリに保存する
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from result_cache import CACHE_REQUESTS, MemoryCacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCache:
+    """生成済みドキュメントのキャッシュ（サイズ上限・有効期限で古いものから削除）"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.backend = MemoryCacheBackend(max_bytes, ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(summary: str, metadata: Dict, export_format: str) -> str:
+        """
+        本文・メタデータ・形式からキーを生成
+
+        Args:
+            summary: 議事録の本文
+            metadata: メタデータ（日付、作成者など）
+            export_format: 出力形式（word / pdf）
+
+        Returns:
+            SHA-256のハッシュ値（16進数）
+        """
+        payload = json.dumps(
+            {"summary": summary, "metadata": metadata, "format": export_format},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="export", result="miss")
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="export", result="hit")
+            logger.info(f"エクスポートキャッシュ: ヒット ({key[:12]})")
+        return value
+
+    def put(self, key: str, data: bytes):
+        self.backend.put(key, data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.backend.evictions,
+        }
+
+
+def create_export_cache() -> Optional[ExportCache]:
+    """
+    環境変数の設定からエクスポート結果キャッシュを作成
+
+    Returns:
+        ExportCache（EXPORT_CACHE_MAX_BYTES=0 の場合はNone）
+    """
+    max_bytes = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    ttl_seconds = float(os.getenv("EXPORT_CACHE_TTL_SECONDS", "3600"))
+
+    if max_bytes <= 0:
+        logger.info("エクスポートキャッシュは無効です")
+        return None
+
+    logger.info(f"エクスポートキャッシュ: 上限 {max_bytes / (1024 * 1024):.0f} MB, 有効期限 {ttl_seconds:.0f}秒")
+    return ExportCache(max_bytes, ttl_seconds)
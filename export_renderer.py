@@ -0,0 +1,197 @@
+"""
+エクスポート用ドキュメント生成のプロセスプール
+fpdf2/python-docxのレイアウト処理はCPUを占有するため、別プロセスで実行してイベントループを止めない
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# エクスポートの待ち時間（プール空き待ち＋プロセス間転送）と生成時間
+EXPORT_QUEUE_WAIT_SECONDS = Histogram(
+    "export_queue_wait_seconds",
+    "エクスポートのレンダリング開始までの待ち時間（秒）"
+)
+EXPORT_RENDER_SECONDS = Histogram(
+    "export_render_seconds",
+    "エクスポートのレンダリング時間（秒）"
+)
+
+# ワーカープロセス内のドキュメント生成（initializerで作成）
+_worker_generator = None
+
+
+# 生成の実績がない場合に使う、1件の生成時間の目安（秒）
+DEFAULT_RENDER_SECONDS = 2.0
+
+
+def format_created_at(now: Optional[datetime] = None) -> str:
+    """
+    ドキュメントのフッターに入れる作成日時（分単位）
+
+    キャッシュキーと生成結果で同じ値を使うため、親プロセスで決めてメタデータの created_at として渡す
+    """
+    return (now or datetime.now()).strftime('%Y年%m月%d日 %H:%M')
+
+
+class RenderQueueFullError(Exception):
+    """処理待ちのエクスポートが上限に達した場合の例外"""
+
+
+def _init_worker():
+    """ワーカープロセスの初期化（日本語フォントの探索・解析を最初に1回だけ行う）"""
+    global _worker_generator
+    logging.basicConfig(level=logging.INFO)
+
+    from document_generator import DocumentGenerator, load_japanese_font
+
+    load_japanese_font()
+    _worker_generator = DocumentGenerator()
+
+
+def render_document(export_format: str, summary: str, metadata: Dict) -> Tuple[bytes, float]:
+    """
+    Word/PDFを生成（ワーカープロセスで実行）
+
+    Args:
+        export_format: 出力形式（word / pdf）
+        summary: 議事録の本文
+        metadata: メタデータ
+
+    Returns:
+        (生成されたファイルの内容, 生成にかかった秒数)
+    """
+    global _worker_generator
+    if _worker_generator is None:
+        _init_worker()
+
+    start_time = time.perf_counter()
+    try:
+        if export_format == "word":
+            data = _worker_generator.generate_word(summary, metadata)
+        else:
+            data = _worker_generator.generate_pdf(summary, metadata)
+    except Exception as e:
+        # fpdf2などの例外は親プロセスで復元できない（pickle不可）場合があり、プールが壊れるため変換する
+        raise RuntimeError(str(e)) from None
+    return data, time.perf_counter() - start_time
+
+
+class ExportRenderer:
+    """上限付きのプロセスプールでエクスポートを生成"""
+
+    def __init__(self, max_workers: int = 2, max_queue_size: int = 8):
+        """
+        Args:
+            max_workers: ワーカープロセス数（0の場合はプロセスを使わずスレッドで生成）
+            max_queue_size: 実行中以外に待たせておけるエクスポート数の上限
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """ワーカープロセスを起動（起動時にフォントを読み込ませる）"""
+        if self._executor is not None or self.max_workers <= 0:
+            return
+        self._executor = self._create_executor()
+        logger.info(f"エクスポート用プロセスプール起動: ワーカー数={self.max_workers}, 待ち上限={self.max_queue_size}")
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # forkはスレッドを持つ親プロセスからは安全でないため、spawnで起動する
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # ワーカーを先に起動してフォントを読み込ませておく（最初のエクスポートを待たせないため）
+        for _ in range(self.max_workers):
+            executor.submit(os.getpid)
+        return executor
+
+    def stop(self):
+        """ワーカープロセスを停止"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("エクスポート用プロセスプール停止")
+
+    async def render(self, export_format: str, summary: str, metadata: Dict) -> bytes:
+        """
+        Word/PDFを生成
+
+        Args:
+            export_format: 出力形式（word / pdf）
+            summary: 議事録の本文
+            metadata: メタデータ
+
+        Returns:
+            生成されたファイルの内容
+
+        Raises:
+            RenderQueueFullError: 処理待ちのエクスポートが上限に達している場合
+        """
+        if self.pending >= max(self.max_workers, 1) + self.max_queue_size:
+            raise RenderQueueFullError(f"処理待ちのエクスポートが上限（{self.max_queue_size}件）に達しています")
+
+        self.pending += 1
+        start_time = time.perf_counter()
+        try:
+            if self._executor is not None:
+                executor = self._executor
+                loop = asyncio.get_running_loop()
+                try:
+                    data, render_time = await loop.run_in_executor(
+                        executor, render_document, export_format, summary, metadata
+                    )
+                except BrokenProcessPool:
+                    # ワーカーが異常終了した場合はプールを作り直す（以降のエクスポートを失敗させないため）
+                    if self._executor is executor:
+                        logger.error("エクスポート用プロセスプールが停止したため再起動します")
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self._executor = self._create_executor()
+                    raise
+            else:
+                data, render_time = await asyncio.to_thread(render_document, export_format, summary, metadata)
+        finally:
+            self.pending -= 1
+
+        total_time = time.perf_counter() - start_time
+        wait_time = max(total_time - render_time, 0.0)
+        EXPORT_QUEUE_WAIT_SECONDS.observe(wait_time)
+        EXPORT_RENDER_SECONDS.observe(render_time)
+        logger.info(
+            f"エクスポート生成完了: {export_format} ({len(data)} bytes, "
+            f"待ち {wait_time:.2f}秒, 生成 {render_time:.2f}秒)"
+        )
+        return data
+
+    def estimate_wait_seconds(self) -> float:
+        """
+        今からエクスポートを依頼した場合に生成が始まるまでの待ち時間の見積もり（生成時間の実績から求める）
+
+        Returns:
+            秒数
+        """
+        render = EXPORT_RENDER_SECONDS.snapshot()[()]
+        average = render["sum"] / render["count"] if render["count"] else DEFAULT_RENDER_SECONDS
+        workers = max(self.max_workers, 1)
+        return max(self.pending - workers + 1, 0) * average / workers
+
+
+def create_export_renderer() -> ExportRenderer:
+    """環境変数の設定からエクスポート用プロセスプールを作成"""
+    return ExportRenderer(
+        max_workers=int(os.getenv("EXPORT_WORKERS", "2")),
+        max_queue_size=int(os.getenv("EXPORT_QUEUE_SIZE", "8")),
+    )
@@ -3,13 +3,137 @@ Google Gemini APIを使用した音声解析サービス
 """
 import google.generativeai as genai
 import os
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, List
 import time
 
+from admission import resource_slot
+from dedup import NearDuplicateWindow
+from metrics import Counter, Histogram
+from tracing import span, start_span
+
 logger = logging.getLogger(__name__)
 
+# アップロード後、Gemini側でファイルが利用可能になるまでの時間
+FILE_PROCESSING_SECONDS = Histogram(
+    "gemini_file_processing_seconds",
+    "Gemini側のファイル処理完了までの待ち時間（秒）"
+)
+FILE_UPLOAD_SECONDS = Histogram(
+    "gemini_file_upload_seconds",
+    "Geminiへの音声ファイルのアップロード時間（秒）"
+)
+# generate_contentの時間（stream: 音声からのストリーミング生成 / request: 分割解析・統合などの一括生成）
+GENERATE_SECONDS = Histogram(
+    "gemini_generate_seconds",
+    "generate_contentの開始から生成完了までの時間（秒）",
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 180, 300, 600, 900),
+    labelnames=("mode",)
+)
+FIRST_OUTPUT_SECONDS = Histogram(
+    "gemini_first_output_seconds",
+    "ストリーミング生成で最初の出力を受信するまでの時間（秒）"
+)
+# 生成の終了理由（MAX_TOKENSは出力が途中で切れたことを示す）
+FINISH_REASONS = Counter(
+    "gemini_finish_reason_total",
+    "generate_contentの終了理由（finish_reason）ごとの回数",
+    labelnames=("reason",)
+)
+
+class DuplicateLineFilter:
+    """
+    重複行を1行ずつ判定するフィルター
+    ストリーミング出力にも逐次適用できるよう、直前の行などの状態を保持する
+    """
+
+    # セクション内で近似重複を判定する箇条書きの最小文字数（「特になし」など短い定型文は対象外）
+    MIN_INDEXED_LENGTH = 12
+
+    def __init__(self, similarity_ratio: Callable[[str, str], float]):
+        self.similarity_ratio = similarity_ratio
+        self.bullet_window = NearDuplicateWindow()
+        self.seen_lines = set()
+        self.consecutive_similar_count = 0
+        self.prev_line_normalized = ""
+        self.removed_count = 0
+
+    def feed(self, line: str) -> bool:
+        """
+        行を判定
+
+        Args:
+            line: 判定する行
+
+        Returns:
+            残す場合はTrue、重複として削除する場合はFalse
+        """
+        # 空行はそのまま追加
+        if not line.strip():
+            self.consecutive_similar_count = 0
+            return True
+
+        # 正規化（比較用）- 空白を除去して比較
+        normalized = line.strip()
+
+        # 完全に同じ行が連続している場合はスキップ
+        if normalized == self.prev_line_normalized:
+            self.consecutive_similar_count += 1
+            if self.consecutive_similar_count >= 2:
+                logger.debug(f"重複行をスキップ: {line[:50]}...")
+                self.removed_count += 1
+                return False
+        else:
+            self.consecutive_similar_count = 0
+
+        # 類似度チェック（同じ接頭辞で始まる箇条書きの連続）
+        if normalized.startswith('・') and self.prev_line_normalized.startswith('・'):
+            # 箇条書きの内容部分を比較
+            current_content = normalized[1:].strip()
+            prev_content = self.prev_line_normalized[1:].strip() if self.prev_line_normalized else ""
+
+            # 同じ内容が繰り返されている場合はスキップ
+            if current_content and prev_content:
+                # 80%以上同じ場合は重複とみなす
+                if self.similarity_ratio(current_content, prev_content) > 0.8:
+                    logger.debug(f"類似行をスキップ: {line[:50]}...")
+                    self.removed_count += 1
+                    return False
+
+        # 数行離れて繰り返される箇条書き（同じセクションの直近の行と近似重複を判定）
+        if normalized.startswith('・'):
+            content = normalized[1:].strip()
+            if len(content) >= self.MIN_INDEXED_LENGTH and self.bullet_window.check_and_add(content):
+                logger.debug(f"既出の類似行をスキップ: {line[:50]}...")
+                self.removed_count += 1
+                return False
+
+        # セクション見出し（1. 2. 3. など、Markdownの「## 」付きも含む）は重複チェックを厳格に
+        heading = normalized.lstrip('#').strip()
+        if len(heading) > 0 and heading[0].isdigit() and '. ' in heading[:5]:
+            section_key = heading[:5]
+            if section_key in self.seen_lines:
+                logger.debug(f"重複セクションをスキップ: {line[:50]}...")
+                self.removed_count += 1
+                return False
+            self.seen_lines.add(section_key)
+            # 打合せ内容の項目を決定事項で改めて挙げるなど、別のセクションでの再掲は残す
+            self.bullet_window.clear()
+
+        self.prev_line_normalized = normalized
+        return True
+
 class GeminiService:
+    # アップロードしたファイルの処理完了の確認間隔（秒）。初回から倍率で延ばし、上限で頭打ち
+    FILE_POLL_INITIAL_INTERVAL = 0.25
+    FILE_POLL_BACKOFF = 1.6
+    FILE_POLL_MAX_INTERVAL = 5.0
+    # 処理完了を待つ時間の上限（秒）= 基本時間 + 1MBあたりの時間（最大値で頭打ち）
+    FILE_WAIT_BASE_SECONDS = 60
+    FILE_WAIT_SECONDS_PER_MB = 10
+    FILE_WAIT_MAX_SECONDS = 900
+
     def __init__(self):
         """Gemini APIサービスの初期化"""
         # APIキーの設定（GEMINI_API_KEY と GOOGLE_API_KEY の両方をサポート）
@@ -62,23 +186,8 @@ class GeminiService:
                 "APIキーが正しいか、利用可能なモデルがあるか確認してください。"
             )
         
-        # 音声解析プロンプト（議事録を生成）
-        self.prompt = """あなたは注文住宅会社の優秀な営業アシスタントです。
-この音声ファイルを聴いて、議事録を作成してください。
-
-【絶対禁止事項】
-・同じ内容や文章を繰り返し出力しないでください
-・一度書いた項目を再度書かないでください
-・類似の箇条書きを連続して並べないでください
-・「屋外」「設置」などの単語を連続で繰り返さないでください
-
-【出力方針】
-・全文の文字起こしは不要です。要点を整理してまとめてください
-・金額、サイズ、色、品番などの具体的な数値情報は必ず含めてください
-・各議題は1回だけ簡潔に記載してください
-・出力は必ず「5. 補足メモ」まで完成させてください
-
-【出力形式】必ず以下の5セクション構成で出力してください。
+        # 議事録の出力形式（音声解析と分割解析の統合で共通）
+        self.output_format = """【出力形式】必ず以下の5セクション構成で出力してください。
 箇条書きには「・」のみ使用してください。
 強調したい語句は【】で囲んでください（例：【ロッカーについて】）。
 「*」「#」「**」などの記号は絶対に使用しないでください。
@@ -107,6 +216,46 @@ class GeminiService:
 
 5. 補足メモ
 その他の気づきや注意点（なければ「特になし」）"""
+
+        # 音声解析プロンプト（議事録を生成）
+        self.prompt = """あなたは注文住宅会社の優秀な営業アシスタントです。
+この音声ファイルを聴いて、議事録を作成してください。
+
+【絶対禁止事項】
+・同じ内容や文章を繰り返し出力しないでください
+・一度書いた項目を再度書かないでください
+・類似の箇条書きを連続して並べないでください
+・「屋外」「設置」などの単語を連続で繰り返さないでください
+
+【出力方針】
+・全文の文字起こしは不要です。要点を整理してまとめてください
+・金額、サイズ、色、品番などの具体的な数値情報は必ず含めてください
+・各議題は1回だけ簡潔に記載してください
+・出力は必ず「5. 補足メモ」まで完成させてください
+
+""" + self.output_format
+
+        # 分割音声の解析プロンプト（self.promptの前に付与）
+        self.segment_prompt_template = """【分割音声について】
+この音声は1つの打合せを時間順に{total}分割したうちの{index}番目の部分です。
+この部分で話された内容だけを対象に、以下の指示に従って部分議事録を作成してください。
+他の部分は別途処理され、後で1つの議事録に統合されます。
+
+"""
+
+        # 部分議事録の統合プロンプト
+        self.merge_prompt = """あなたは注文住宅会社の優秀な営業アシスタントです。
+以下は1つの打合せ音声を時間順に分割して作成した部分議事録です。
+これらを統合して、打合せ全体の議事録を1つ作成してください。
+
+【統合方針】
+・複数の部分に出てくる同じ議題は1つにまとめてください
+・金額、サイズ、色、品番などの具体的な数値情報は必ず残してください
+・後の部分で変更・訂正された内容は、最新の内容を採用してください
+・「特になし」は、すべての部分で該当がない場合のみ記載してください
+・出力は必ず「5. 補足メモ」まで完成させてください
+
+""" + self.output_format
     
     async def analyze_audio(self, audio_file_path: str) -> str:
         """
@@ -120,110 +269,358 @@ class GeminiService:
         """
         try:
             # ファイルサイズを取得
-            import os
             file_size_mb = os.path.getsize(audio_file_path) / (1024 * 1024)
             logger.info(f"Gemini APIで音声を解析: {audio_file_path} ({file_size_mb:.2f} MB)")
             logger.info(f"使用モデル: {self.model_name}")
 
-            # 音声ファイルをアップロード
+            audio_file = await self._upload_audio_file(audio_file_path)
             try:
-                logger.info("Gemini APIへファイルアップロードを開始...")
-                audio_file = genai.upload_file(path=audio_file_path)
-                logger.info(f"ファイルアップロード完了: {audio_file.name}")
-            except Exception as e:
-                logger.error(f"ファイルアップロードエラー: {str(e)}")
-                raise ValueError(
-                    f"音声ファイルのアップロードに失敗しました。\n"
-                    f"ファイル形式を確認してください。\n"
-                    f"エラー詳細: {str(e)}"
+                # Geminiで解析
+                logger.info("Gemini APIに解析リクエストを送信")
+                result_text = await self._generate(
+                    [self.prompt, audio_file],
+                    max_output_tokens=32000,  # 5時間の会議に対応（約45,000文字分）
                 )
+            finally:
+                await self._delete_uploaded_file(audio_file)
+
+            # 重複行を検出・削除する後処理
+            result_text = await asyncio.to_thread(self._remove_duplicate_lines, result_text)
+
+            return result_text.strip()
+
+        except Exception as e:
+            logger.error(f"Gemini API解析エラー: {str(e)}")
+            raise
+
+    async def analyze_segments(self, segment_paths: List[str], max_parallel: int = 4) -> str:
+        """
+        分割した音声を並列に解析し、部分議事録を1つの議事録に統合（map-reduce）
+        処理時間は全体の長さではなく、最も長いセグメントの解析時間に比例する
+
+        Args:
+            segment_paths: 時間順に並んだ分割音声ファイルのパス
+            max_parallel: 同時に解析するセグメント数の上限
+
+        Returns:
+            解析結果（統合された議事録）
+        """
+        try:
+            total = len(segment_paths)
+            logger.info(f"分割音声を解析: {total}セグメント (同時実行数: {max_parallel})")
+            logger.info(f"使用モデル: {self.model_name}")
+
+            semaphore = asyncio.Semaphore(max_parallel)
+
+            async def analyze_segment(index: int, segment_path: str) -> str:
+                async with semaphore:
+                    segment_start = time.time()
+                    audio_file = await self._upload_audio_file(segment_path)
+                    try:
+                        prompt = self.segment_prompt_template.format(index=index, total=total) + self.prompt
+                        partial = await self._generate(
+                            [prompt, audio_file],
+                            max_output_tokens=16000,
+                        )
+                    finally:
+                        await self._delete_uploaded_file(audio_file)
+                    logger.info(f"セグメント {index}/{total} 解析完了 ({time.time() - segment_start:.2f}秒)")
+                    return partial
+
+            partials = await asyncio.gather(*[
+                analyze_segment(index, segment_path)
+                for index, segment_path in enumerate(segment_paths, start=1)
+            ])
+
+            # 部分議事録を統合（テキストのみのリクエスト）
+            logger.info("部分議事録の統合リクエストを送信")
+            merged_input = "\n\n".join(
+                f"【部分議事録 {index}/{total}】\n{partial.strip()}"
+                for index, partial in enumerate(partials, start=1)
+            )
+            result_text = await self._generate(
+                [self.merge_prompt, merged_input],
+                max_output_tokens=32000,
+            )
+
+            # 重複行を検出・削除する後処理
+            result_text = await asyncio.to_thread(self._remove_duplicate_lines, result_text)
+
+            return result_text.strip()
+
+        except Exception as e:
+            logger.error(f"Gemini API分割解析エラー: {str(e)}")
+            raise
+
+    async def _upload_audio_file(self, audio_file_path: str):
+        """
+        音声ファイルをアップロードし、Gemini側の処理完了を待機
+
+        Args:
+            audio_file_path: アップロードする音声ファイルのパス
+
+        Returns:
+            処理済みのファイルオブジェクト
+        """
+        # 音声ファイルをアップロード
+        try:
+            logger.info("Gemini APIへファイルアップロードを開始...")
+            async with resource_slot("gemini_upload"):
+                upload_start = time.monotonic()
+                with span("gemini.upload_file", bytes=os.path.getsize(audio_file_path)):
+                    audio_file = await asyncio.to_thread(genai.upload_file, path=audio_file_path)
+                upload_time = time.monotonic() - upload_start
+            FILE_UPLOAD_SECONDS.observe(upload_time)
+            logger.info(f"ファイルアップロード完了: {audio_file.name} ({upload_time:.2f}秒)")
+        except Exception as e:
+            logger.error(f"ファイルアップロードエラー: {str(e)}")
+            raise ValueError(
+                f"音声ファイルのアップロードに失敗しました。\n"
+                f"ファイル形式を確認してください。\n"
+                f"エラー詳細: {str(e)}"
+            )
+
+        try:
+            audio_file = await self._wait_for_file_active(audio_file, os.path.getsize(audio_file_path))
+        except Exception:
+            await self._delete_uploaded_file(audio_file)
+            raise
 
-            # アップロード処理の完了を待機
-            max_wait_time = 300  # 最大300秒（5分）待機
-            wait_interval = 3  # 3秒ごとにチェック
-            elapsed_time = 0
+        return audio_file
+
+    async def _wait_for_file_active(self, audio_file, file_size: int):
+        """
+        アップロードしたファイルのGemini側の処理完了を待機
+        確認間隔は短く始めて指数的に延ばし、短い音声はすぐ解析に進めるようにする
+        タイムアウトはファイルサイズから計算する
+
+        Args:
+            audio_file: アップロード直後のファイルオブジェクト
+            file_size: ファイルサイズ（バイト）
+
+        Returns:
+            処理済みのファイルオブジェクト
+        """
+        file_size_mb = file_size / (1024 * 1024)
+        max_wait_time = min(
+            self.FILE_WAIT_BASE_SECONDS + file_size_mb * self.FILE_WAIT_SECONDS_PER_MB,
+            self.FILE_WAIT_MAX_SECONDS
+        )
+        wait_interval = self.FILE_POLL_INITIAL_INTERVAL
+        poll_count = 0
+        wait_start = time.monotonic()
+
+        with span("gemini.wait_active") as current:
             while audio_file.state.name == "PROCESSING":
+                elapsed_time = time.monotonic() - wait_start
                 if elapsed_time >= max_wait_time:
-                    raise TimeoutError(f"ファイル処理がタイムアウトしました（{max_wait_time}秒経過）")
-                logger.info(f"ファイル処理中... ({elapsed_time}秒経過)")
-                time.sleep(wait_interval)
-                audio_file = genai.get_file(audio_file.name)
-                elapsed_time += wait_interval
+                    raise TimeoutError(f"ファイル処理がタイムアウトしました（{max_wait_time:.0f}秒経過）")
+                logger.debug(f"ファイル処理中... ({elapsed_time:.1f}秒経過)")
+                await asyncio.sleep(min(wait_interval, max_wait_time - elapsed_time))
+                poll_count += 1
+                with span("gemini.get_file", poll=poll_count) as poll:
+                    audio_file = await asyncio.to_thread(genai.get_file, audio_file.name)
+                    poll.set_attribute("state", audio_file.state.name)
+                wait_interval = min(wait_interval * self.FILE_POLL_BACKOFF, self.FILE_POLL_MAX_INTERVAL)
+            current.set_attribute("polls", poll_count)
+
+        if audio_file.state.name == "FAILED":
+            raise ValueError(f"ファイル処理に失敗しました: {audio_file.state.name}")
+
+        processing_time = time.monotonic() - wait_start
+        FILE_PROCESSING_SECONDS.observe(processing_time)
+        logger.info(f"ファイル処理完了: {audio_file.state.name} ({processing_time:.2f}秒, 確認{poll_count}回)")
+        return audio_file
+
+    async def _delete_uploaded_file(self, audio_file):
+        """アップロードしたファイルを削除"""
+        try:
+            with span("gemini.delete_file"):
+                await asyncio.to_thread(genai.delete_file, audio_file.name)
+            logger.info("アップロードファイルを削除")
+        except Exception as e:
+            logger.warning(f"ファイル削除エラー: {str(e)}")
 
-            if audio_file.state.name == "FAILED":
-                raise ValueError(f"ファイル処理に失敗しました: {audio_file.state.name}")
+    def _generation_config(self, max_output_tokens: int):
+        return genai.types.GenerationConfig(
+            temperature=0.1,  # 創造性を最小限に抑えて重複を防止
+            max_output_tokens=max_output_tokens,
+        )
 
-            logger.info(f"ファイル処理完了: {audio_file.state.name}")
+    async def _generate(self, contents: list, max_output_tokens: int) -> str:
+        """
+        generate_contentを実行してテキストを取得
 
-            # Geminiで解析
-            logger.info("Gemini APIに解析リクエストを送信")
-            analysis_start_time = time.time()
-            try:
-                response = self.model.generate_content(
-                    [self.prompt, audio_file],
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.1,  # 創造性を最小限に抑えて重複を防止
-                        max_output_tokens=32000,  # 5時間の会議に対応（約45,000文字分）
+        Args:
+            contents: プロンプトと音声ファイル（またはテキスト）
+            max_output_tokens: 最大出力トークン数
+
+        Returns:
+            生成されたテキスト
+        """
+        try:
+            async with resource_slot("gemini_generate"):
+                analysis_start_time = time.time()
+                with span("gemini.generate_content", mode="request", max_output_tokens=max_output_tokens):
+                    response = await self.model.generate_content_async(
+                        contents,
+                        generation_config=self._generation_config(max_output_tokens)
                     )
-                )
                 analysis_time = time.time() - analysis_start_time
-                logger.info(f"Gemini API解析完了 - 処理時間: {analysis_time:.2f}秒")
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"generate_contentエラー: {error_msg}")
-
-                # より詳細なエラーメッセージを提供
-                if "404" in error_msg or "not found" in error_msg.lower():
-                    raise ValueError(
-                        f"使用中のモデル '{self.model_name}' は音声ファイルの処理に対応していません。\n"
-                        f"APIキーの権限を確認するか、Google AI Studioで利用可能なモデルを確認してください。\n"
-                        f"エラー詳細: {error_msg}"
-                    )
-                elif "not supported" in error_msg.lower():
-                    raise ValueError(
-                        f"このAPIキーでは音声ファイルの処理がサポートされていません。\n"
-                        f"有料プランへのアップグレードが必要な可能性があります。"
-                    )
-                else:
-                    raise
+            GENERATE_SECONDS.observe(analysis_time, mode="request")
+            logger.info(f"Gemini API解析完了 - 処理時間: {analysis_time:.2f}秒")
+        except Exception as e:
+            self._raise_generation_error(e)
 
-            # finish_reasonを確認（出力が途中で切れていないかチェック）
-            finish_reason = None
-            output_truncated = False
-            if response.candidates and len(response.candidates) > 0:
-                finish_reason = response.candidates[0].finish_reason
-                logger.info(f"finish_reason: {finish_reason}")
+        self._check_finish_reason(response.candidates)
 
-                # MAX_TOKENSで終了した場合は警告
-                if str(finish_reason) == "FinishReason.MAX_TOKENS" or str(finish_reason) == "2":
-                    logger.warning("【警告】出力がmax_output_tokensに達して途中で切れました")
-                    output_truncated = True
+        # レスポンスのパース
+        result_text = response.text
+        self._check_result_text(result_text)
+        return result_text
 
-            # レスポンスのパース
-            result_text = response.text
-            logger.info(f"解析完了 - 文字数: {len(result_text)}")
-            logger.debug(f"解析結果の最初の200文字: {result_text[:200]}")
-            logger.debug(f"解析結果の最後の200文字: {result_text[-200:]}")
+    async def analyze_audio_stream(self, audio_file_path: str) -> AsyncIterator[str]:
+        """
+        音声ファイルをGemini APIで解析し、生成された議事録を1行ずつ返す（ストリーミング）
+        重複行の削除は生成と並行して逐次適用する
 
-            # 出力が不完全な場合の警告チェック
-            if "5. 補足メモ" not in result_text and "## 5." not in result_text:
-                logger.warning("議事録の出力が不完全な可能性があります（セクション5が見つかりません）")
+        Args:
+            audio_file_path: 解析する音声ファイルのパス
 
-            # 重複行を検出・削除する後処理
-            result_text = self._remove_duplicate_lines(result_text)
+        Yields:
+            重複を削除した議事録の行
+        """
+        file_size_mb = os.path.getsize(audio_file_path) / (1024 * 1024)
+        logger.info(f"Gemini APIで音声を解析（ストリーミング）: {audio_file_path} ({file_size_mb:.2f} MB)")
+        logger.info(f"使用モデル: {self.model_name}")
 
-            # アップロードしたファイルを削除
+        audio_file = await self._upload_audio_file(audio_file_path)
+        try:
+            # 生成中（行を返している間も含む）は同時実行数の枠を使用する
+            async with resource_slot("gemini_generate"):
+                logger.info("Gemini APIに解析リクエストを送信（ストリーミング）")
+                analysis_start_time = time.time()
+                # 行を返すたびに呼び出し側へ制御が移るため、以降の区間の親にはしない
+                generate_span = start_span("gemini.generate_content", mode="stream", max_output_tokens=32000)
+                try:
+                    try:
+                        response = await self.model.generate_content_async(
+                            [self.prompt, audio_file],
+                            generation_config=self._generation_config(32000),  # 5時間の会議に対応（約45,000文字分）
+                            stream=True
+                        )
+                    except Exception as e:
+                        self._raise_generation_error(e)
+
+                    duplicate_filter = DuplicateLineFilter(self._similarity_ratio)
+                    buffer = ""
+                    result_lines = []
+                    candidates = None
+                    first_chunk_time = None
+                    dedup_seconds = 0.0
+
+                    async for chunk in response:
+                        candidates = chunk.candidates or candidates
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            # 本文を含まないチャンク（終了理由のみ）
+                            continue
+                        if first_chunk_time is None:
+                            first_chunk_time = time.time() - analysis_start_time
+                            FIRST_OUTPUT_SECONDS.observe(first_chunk_time)
+                            generate_span.set_attribute("first_output_ms", round(first_chunk_time * 1000, 1))
+                            logger.info(f"最初の出力を受信 ({first_chunk_time:.2f}秒)")
+
+                        buffer += text
+                        *lines, buffer = buffer.split('\n')
+                        for line in lines:
+                            dedup_start = time.perf_counter()
+                            keep = duplicate_filter.feed(line)
+                            dedup_seconds += time.perf_counter() - dedup_start
+                            if keep:
+                                result_lines.append(line)
+                                yield line
+
+                    if buffer and duplicate_filter.feed(buffer):
+                        result_lines.append(buffer)
+                        yield buffer
+
+                    # 重複行の削除は生成と並行して行単位で行うため、区間ではなく合計時間を記録する
+                    generate_span.set_attribute("dedup_ms", round(dedup_seconds * 1000, 3))
+                    generate_span.set_attribute("dedup_removed_lines", duplicate_filter.removed_count)
+                except BaseException as e:
+                    generate_span.record_error(e)
+                    raise
+                finally:
+                    generate_span.end()
+
+            analysis_time = time.time() - analysis_start_time
+            GENERATE_SECONDS.observe(analysis_time, mode="stream")
+            logger.info(f"Gemini API解析完了 - 処理時間: {analysis_time:.2f}秒")
+            self._check_finish_reason(candidates)
+            self._check_result_text('\n'.join(result_lines))
+            if duplicate_filter.removed_count > 0:
+                logger.info(f"重複行を{duplicate_filter.removed_count}行削除しました")
+
+        finally:
+            await self._delete_uploaded_file(audio_file)
+
+    def _raise_generation_error(self, e: Exception):
+        """generate_contentのエラーを分かりやすいメッセージに変換して送出"""
+        error_msg = str(e)
+        logger.error(f"generate_contentエラー: {error_msg}")
+
+        # より詳細なエラーメッセージを提供
+        if "404" in error_msg or "not found" in error_msg.lower():
+            raise ValueError(
+                f"使用中のモデル '{self.model_name}' は音声ファイルの処理に対応していません。\n"
+                f"APIキーの権限を確認するか、Google AI Studioで利用可能なモデルを確認してください。\n"
+                f"エラー詳細: {error_msg}"
+            )
+        elif "not supported" in error_msg.lower():
+            raise ValueError(
+                f"このAPIキーでは音声ファイルの処理がサポートされていません。\n"
+                f"有料プランへのアップグレードが必要な可能性があります。"
+            )
+        else:
+            raise e
+
+    def _check_finish_reason(self, candidates):
+        """finish_reasonを確認（出力が途中で切れていないかチェック）"""
+        if candidates and len(candidates) > 0:
+            finish_reason = candidates[0].finish_reason
+            reason = self._finish_reason_name(finish_reason)
+            FINISH_REASONS.inc(reason=reason)
+            logger.info(f"finish_reason: {finish_reason}")
+
+            # MAX_TOKENSで終了した場合は警告
+            if reason == "MAX_TOKENS":
+                logger.warning("【警告】出力がmax_output_tokensに達して途中で切れました")
+
+    @staticmethod
+    def _finish_reason_name(finish_reason) -> str:
+        """finish_reason（列挙型・数値・"FinishReason.STOP"などの文字列）を名前に変換"""
+        name = getattr(finish_reason, "name", None)
+        if name:
+            return name
+        text = str(finish_reason)
+        if text.isdigit():
             try:
-                genai.delete_file(audio_file.name)
-                logger.info("アップロードファイルを削除")
-            except Exception as e:
-                logger.warning(f"ファイル削除エラー: {str(e)}")
+                return genai.protos.Candidate.FinishReason(int(text)).name
+            except ValueError:
+                return text
+        return text.rsplit(".", 1)[-1]
 
-            return result_text.strip()
+    def _check_result_text(self, result_text: str):
+        """生成結果をログ出力し、出力が不完全でないか確認"""
+        logger.info(f"解析完了 - 文字数: {len(result_text)}")
+        logger.debug(f"解析結果の最初の200文字: {result_text[:200]}")
+        logger.debug(f"解析結果の最後の200文字: {result_text[-200:]}")
 
-        except Exception as e:
-            logger.error(f"Gemini API解析エラー: {str(e)}")
-            raise
+        # 出力が不完全な場合の警告チェック
+        if "5. 補足メモ" not in result_text and "## 5." not in result_text:
+            logger.warning("議事録の出力が不完全な可能性があります（セクション5が見つかりません）")
 
     def _remove_duplicate_lines(self, text: str) -> str:
         """
@@ -235,61 +632,14 @@ class GeminiService:
         Returns:
             重複を削除したテキスト
         """
-        lines = text.split('\n')
-        result_lines = []
-        seen_lines = set()
-        consecutive_similar_count = 0
-        prev_line_normalized = ""
-
-        for line in lines:
-            # 空行はそのまま追加
-            if not line.strip():
-                result_lines.append(line)
-                consecutive_similar_count = 0
-                continue
-
-            # 正規化（比較用）- 空白を除去して比較
-            normalized = line.strip()
-
-            # 完全に同じ行が連続している場合はスキップ
-            if normalized == prev_line_normalized:
-                consecutive_similar_count += 1
-                if consecutive_similar_count >= 2:
-                    logger.debug(f"重複行をスキップ: {line[:50]}...")
-                    continue
-            else:
-                consecutive_similar_count = 0
-
-            # 類似度チェック（同じ接頭辞で始まる箇条書きの連続）
-            if normalized.startswith('・') and prev_line_normalized.startswith('・'):
-                # 箇条書きの内容部分を比較
-                current_content = normalized[1:].strip()
-                prev_content = prev_line_normalized[1:].strip() if prev_line_normalized else ""
-
-                # 同じ内容が繰り返されている場合はスキップ
-                if current_content and prev_content:
-                    # 80%以上同じ場合は重複とみなす
-                    if self._similarity_ratio(current_content, prev_content) > 0.8:
-                        logger.debug(f"類似行をスキップ: {line[:50]}...")
-                        continue
-
-            # セクション見出し（1. 2. 3. など）は重複チェックを厳格に
-            if len(normalized) > 0 and normalized[0].isdigit() and '. ' in normalized[:5]:
-                section_key = normalized[:5]
-                if section_key in seen_lines:
-                    logger.debug(f"重複セクションをスキップ: {line[:50]}...")
-                    continue
-                seen_lines.add(section_key)
-
-            result_lines.append(line)
-            prev_line_normalized = normalized
-
-        result = '\n'.join(result_lines)
+        with span("dedup", chars=len(text)) as current:
+            duplicate_filter = DuplicateLineFilter(self._similarity_ratio)
+            result = '\n'.join(line for line in text.split('\n') if duplicate_filter.feed(line))
+            current.set_attribute("removed_lines", duplicate_filter.removed_count)
 
         # 削除された行数をログ出力
-        removed_count = len(lines) - len(result_lines)
-        if removed_count > 0:
-            logger.info(f"重複行を{removed_count}行削除しました")
+        if duplicate_filter.removed_count > 0:
+            logger.info(f"重複行を{duplicate_filter.removed_count}行削除しました")
 
         return result
 
@@ -311,8 +661,9 @@ class GeminiService:
         shorter = str1 if len(str1) <= len(str2) else str2
         longer = str2 if len(str1) <= len(str2) else str1
 
-        # 共通の文字数をカウント
-        common_chars = sum(1 for c in shorter if c in longer)
+        # 共通の文字数をカウント（長い方は集合にして1文字あたり定数時間で判定）
+        longer_chars = set(longer)
+        common_chars = sum(1 for c in shorter if c in longer_chars)
 
         return common_chars / len(longer) if longer else 0.0
     
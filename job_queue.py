@@ -0,0 +1,355 @@
+"""
+非同期ジョブキュー - 議事録生成パイプラインをバックグラウンドで実行
+HTTPリクエストはジョブIDを即座に返し、処理は上限付きのワーカーで実行する
+"""
+import asyncio
+import heapq
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import Counter, Histogram
+from tracing import JobProfiler, OtlpTraceExporter, Trace, start_trace
+
+logger = logging.getLogger(__name__)
+
+# ステージごとの処理時間（p95を押し上げているステージの特定用）・実行開始までの待ち時間・ジョブ全体の時間
+JOB_STAGE_SECONDS = Histogram(
+    "job_stage_seconds",
+    "ジョブのステージごとの処理時間（秒）",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800),
+    labelnames=("stage",)
+)
+JOB_QUEUE_WAIT_SECONDS = Histogram(
+    "job_queue_wait_seconds",
+    "ジョブの登録から実行開始までの待ち時間（秒）"
+)
+JOB_DURATION_SECONDS = Histogram(
+    "job_duration_seconds",
+    "ジョブの登録から終了までの時間（秒、結果ごと）",
+    buckets=(5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+    labelnames=("status",)
+)
+JOBS_SUBMITTED = Counter(
+    "jobs_submitted_total",
+    "ジョブの登録数（受け付け accepted・待ち上限による拒否 rejected・リソースの待ちによる拒否 throttled）",
+    labelnames=("result",)
+)
+
+
+# 完了したジョブの実績がない場合に使う、1ジョブの実行時間の目安（秒）
+DEFAULT_JOB_SECONDS = 120.0
+
+
+class QueueFullError(Exception):
+    """処理待ちジョブが上限に達した場合の例外"""
+
+
+class Job:
+    """議事録生成ジョブ（状態・ステージ・処理時間を保持）"""
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    def __init__(self, owner: str, params: Dict[str, Any], profile: bool = False):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.params = params
+        self.status = self.STATUS_QUEUED
+        self.stage = "queued"
+        self.stage_timings: Dict[str, float] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self._stage_started: Optional[float] = None
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self._event_signal = asyncio.Event()
+        self.trace: Optional[Trace] = None
+        # プロファイルの取得を指定された場合のみ作成
+        self.profiler: Optional[JobProfiler] = JobProfiler() if profile else None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    def set_stage(self, stage: str):
+        """
+        現在のステージを更新（直前のステージの処理時間を記録）
+
+        Args:
+            stage: ステージ名（download, compress, analyze など）
+        """
+        self._finish_stage()
+        self.stage = stage
+        self._stage_started = time.time()
+        self.publish("stage", {"stage": stage})
+
+    def _finish_stage(self):
+        if self._stage_started is not None:
+            duration = time.time() - self._stage_started
+            self.stage_timings[self.stage] = round(duration, 3)
+            JOB_STAGE_SECONDS.observe(duration, stage=self.stage)
+            self._stage_started = None
+
+    def mark_running(self):
+        self.status = self.STATUS_RUNNING
+        self.started_at = time.time()
+        JOB_QUEUE_WAIT_SECONDS.observe(self.started_at - self.created_at)
+
+    def mark_completed(self, result: Any):
+        self._finish_stage()
+        self.status = self.STATUS_COMPLETED
+        self.stage = "done"
+        self.result = result
+        self.finished_at = time.time()
+        JOB_DURATION_SECONDS.observe(self.finished_at - self.created_at, status=self.status)
+        self.publish("done", self.to_dict())
+
+    def mark_failed(self, error: str):
+        self._finish_stage()
+        self.status = self.STATUS_FAILED
+        self.error = error
+        self.finished_at = time.time()
+        JOB_DURATION_SECONDS.observe(self.finished_at - self.created_at, status=self.status)
+        self.publish("error", {"error": error})
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        """
+        進捗イベントを記録し、購読中のクライアントに通知
+
+        Args:
+            event: イベント名（stage, line, section, done, error）
+            data: イベントのデータ
+        """
+        self.events.append((event, data))
+        self._event_signal.set()
+        self._event_signal = asyncio.Event()
+
+    async def iter_events(self, start: int = 0) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        記録済みのイベントから順に返し、ジョブ終了まで新しいイベントを待ち続ける
+
+        Args:
+            start: 最初に返すイベントの番号（再接続時の続きから）
+
+        Yields:
+            (イベント番号, イベント名, データ)
+        """
+        index = start
+        while True:
+            signal = self._event_signal
+            while index < len(self.events):
+                event, data = self.events[index]
+                yield index, event, data
+                index += 1
+            if self.is_finished:
+                return
+            await signal.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ステータスAPI用の辞書に変換"""
+        def _iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "queue_wait_seconds": round(self.started_at - self.created_at, 3) if self.started_at else None,
+            "elapsed_seconds": round(end - self.created_at, 3),
+            "stage_timings": dict(self.stage_timings),
+            "trace_id": self.trace.trace_id if self.trace else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """上限付きワーカープールでジョブを実行するインプロセスキュー"""
+
+    def __init__(
+        self,
+        handler: Callable[[Job], Awaitable[Any]],
+        max_workers: int = 2,
+        max_queue_size: int = 20,
+        retention_seconds: int = 3600,
+        trace_exporter: Optional[OtlpTraceExporter] = None,
+    ):
+        """
+        Args:
+            handler: ジョブを処理するコルーチン関数（戻り値がジョブの結果になる）
+            max_workers: 同時に実行するジョブ数の上限
+            max_queue_size: 処理待ちジョブ数の上限
+            retention_seconds: 完了したジョブの結果を保持する秒数
+            trace_exporter: 終了したジョブのトレースの送信先（Noneの場合は送信しない）
+        """
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retention_seconds = retention_seconds
+        self.trace_exporter = trace_exporter
+        self._export_tasks: set = set()
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list = []
+
+    async def start(self):
+        """ワーカーを起動"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_workers)
+        ]
+        logger.info(f"ジョブキュー起動: ワーカー数={self.max_workers}, 待ち上限={self.max_queue_size}")
+
+    async def stop(self):
+        """ワーカーを停止"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("ジョブキュー停止")
+
+    def submit(self, owner: str, params: Dict[str, Any], profile: bool = False) -> Job:
+        """
+        ジョブを登録
+
+        Args:
+            owner: ジョブを登録したユーザー
+            params: ハンドラーに渡すパラメータ
+            profile: 実行中のプロファイルを取得するか
+
+        Returns:
+            登録されたジョブ
+
+        Raises:
+            QueueFullError: 処理待ちジョブが上限に達している場合
+        """
+        if self._queue is None:
+            raise RuntimeError("ジョブキューが起動していません")
+
+        self._purge_expired()
+
+        job = Job(owner, params, profile=profile)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            JOBS_SUBMITTED.inc(result="rejected")
+            raise QueueFullError(f"処理待ちジョブが上限（{self.max_queue_size}件）に達しています")
+
+        self.jobs[job.id] = job
+        JOBS_SUBMITTED.inc(result="accepted")
+        logger.info(f"ジョブ登録: {job.id} (待ち: {self.queued_count}件)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブIDからジョブを取得"""
+        return self.jobs.get(job_id)
+
+    @property
+    def queued_count(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def running_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == Job.STATUS_RUNNING)
+
+    def average_run_seconds(self) -> float:
+        """保持している完了ジョブのステージごとの処理時間から求めた、1ジョブの平均実行時間（秒）"""
+        totals = [
+            sum(seconds for stage, seconds in job.stage_timings.items() if stage != "first_section")
+            for job in list(self.jobs.values())
+            if job.status == Job.STATUS_COMPLETED
+        ]
+        return sum(totals) / len(totals) if totals else DEFAULT_JOB_SECONDS
+
+    def estimate_wait_seconds(self, position: Optional[int] = None) -> float:
+        """
+        処理待ちの position 番目（0始まり）のジョブの実行が始まるまでの待ち時間の見積もり
+        実行中のジョブの残り時間と、前に並んでいるジョブの実行時間（完了ジョブの平均）から求める
+
+        Args:
+            position: 処理待ちの順番（Noneの場合は今から登録するジョブ）
+
+        Returns:
+            秒数
+        """
+        average = self.average_run_seconds()
+        now = time.time()
+        # ワーカーごとに次に空く時刻（実行中のジョブは平均との差を残り時間とする）
+        free_at = [
+            max(average - (now - job.started_at), 0.0)
+            for job in list(self.jobs.values())
+            if job.status == Job.STATUS_RUNNING and job.started_at
+        ][:self.max_workers]
+        free_at += [0.0] * (max(self.max_workers, 1) - len(free_at))
+        heapq.heapify(free_at)
+        for _ in range(self.queued_count if position is None else position):
+            heapq.heappush(free_at, heapq.heappop(free_at) + average)
+        return free_at[0]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job, worker_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, worker_id: int):
+        """ジョブを実行（トレースを記録し、指定された場合はプロファイルを取得）"""
+        if job.profiler is not None:
+            profiling = job.profiler.start(running_jobs=self.running_count)
+        else:
+            profiling = False
+            JobProfiler.record_overlapping_job()
+        try:
+            with start_trace("job", job_id=job.id, worker=worker_id) as trace:
+                job.trace = trace
+                try:
+                    job.mark_running()
+                    logger.info(f"ジョブ開始: {job.id} (ワーカー{worker_id}, トレース{trace.trace_id})")
+                    result = await self.handler(job)
+                    job.mark_completed(result)
+                    logger.info(f"ジョブ完了: {job.id} ({job.finished_at - job.created_at:.2f}秒)")
+                except asyncio.CancelledError:
+                    job.mark_failed("サーバー停止によりジョブが中断されました")
+                    raise
+                except Exception as e:
+                    job.mark_failed(str(e))
+                    trace.root.record_error(e)
+                    logger.error(f"ジョブ失敗: {job.id} - {str(e)}")
+        finally:
+            if profiling:
+                job.profiler.stop()
+            elif job.profiler is not None:
+                job.profiler = None
+
+        if self.trace_exporter:
+            # 送信の完了を待たずに次のジョブへ進む（タスクは完了まで参照を保持する）
+            task = asyncio.create_task(asyncio.to_thread(self.trace_exporter.export, job.trace))
+            self._export_tasks.add(task)
+            task.add_done_callback(self._export_tasks.discard)
+
+    def _purge_expired(self):
+        """保持期間を過ぎた完了ジョブを削除"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.is_finished and now - job.finished_at > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        if expired:
+            logger.debug(f"期限切れジョブを削除: {len(expired)}件")
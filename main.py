@@ -1,40 +1,98 @@
 """
 議事録自動生成システム - FastAPI Backend
 """
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, status, Form
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, status, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import Optional
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Dict, List
+from contextlib import asynccontextmanager
+from functools import cached_property
 import os
+import re
+import math
+import json
+import time
+import asyncio
 import tempfile
 import logging
+import threading
+import secrets
 from datetime import datetime, timedelta
 import jwt
 from dotenv import load_dotenv
-from google.cloud import storage
-from google.auth import default
 import uuid
+import zipfile
+from urllib.parse import quote
 
 # .envファイルから環境変数を読み込み
 load_dotenv()
 
-from audio_processor import AudioProcessor
-from gemini_service import GeminiService
+from admission import resource_slot, saturated_resources
+from audio_processor import AudioProcessor, SilenceTrimMap
+
+if TYPE_CHECKING:
+    from gemini_service import GeminiService
 from auth_service import AuthService
-from document_generator import DocumentGenerator
+from export_renderer import RenderQueueFullError, create_export_renderer, format_created_at
+from job_queue import JOBS_SUBMITTED, Job, JobQueue, QueueFullError
+from result_cache import ResultCache, create_result_cache
+from export_cache import ExportCache, create_export_cache
+from signing_identity import SigningIdentity
+from multipart_upload import MissingPartsError, create_multipart_upload_manager
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Gauge, Histogram, render as render_metrics
+from tracing import DEFAULT_SERVICE_NAME, TraceLogFilter, create_trace_exporter, span
 
-# ログ設定
-logging.basicConfig(level=logging.INFO)
+# ログ設定（ジョブの処理中のログにはトレースIDを付け、並行するジョブのログを見分けられるようにする）
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(trace_prefix)s%(message)s")
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(TraceLogFilter())
 logger = logging.getLogger(__name__)
 
+async def warm_up():
+    """
+    起動直後のウォームアップ（サービスの初期化とエクスポート用プロセスの起動）
+    起動処理を待たせないようバックグラウンドで実行し、最初のリクエストより前に済ませておく
+    """
+    # lifespanの起動処理を先に完了させ、ポートの待ち受けを始めてから実行する
+    await asyncio.sleep(0)
+    start_time = time.perf_counter()
+    # いずれかが失敗しても残りは起動する
+    try:
+        await asyncio.to_thread(services.warm_up)
+    except Exception as e:
+        logger.error(f"ウォームアップエラー（サービスの初期化）: {str(e)}")
+    try:
+        await asyncio.to_thread(export_renderer.start)
+    except Exception as e:
+        logger.error(f"ウォームアップエラー（エクスポート用プロセスの起動）: {str(e)}")
+    if GCS_BUCKET_NAME:
+        # 署名付きURL用のサービスアカウントを先に取得し、以降はトークンを期限前に更新し続ける
+        try:
+            signing_identity.start()
+        except Exception as e:
+            logger.error(f"ウォームアップエラー（署名用サービスアカウントの取得）: {str(e)}")
+    logger.info(f"ウォームアップ完了 ({time.perf_counter() - start_time:.2f}秒)")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時にジョブキューを開始してウォームアップを予約し、終了時に停止"""
+    await job_queue.start()
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+    await job_queue.stop()
+    await signing_identity.stop()
+    export_renderer.stop()
+
 # FastAPIアプリケーション初期化
 app = FastAPI(
     title="議事録自動生成システム",
     description="音声ファイルから議事録を自動生成するAPI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ファイルアップロードサイズ制限を200MBに設定
@@ -54,25 +112,162 @@ security = HTTPBearer()
 
 # GCS設定
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
-if GCS_BUCKET_NAME:
-    try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(GCS_BUCKET_NAME)
+
+# GCSから読み込みながら圧縮するか（無効にすると一時ファイルへダウンロードしてから圧縮）
+AUDIO_STREAMING_ENABLED = os.getenv("AUDIO_STREAMING", "true").lower() != "false"
+
+# 長時間の打合せの分割解析設定
+# この長さ（秒）以上の音声は無音区間で分割し、セグメントごとに並列解析してから統合する
+SEGMENT_MODE_MIN_SECONDS = float(os.getenv("SEGMENT_MODE_MIN_SECONDS", "5400"))
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", "1800"))
+SEGMENT_MAX_PARALLEL = int(os.getenv("SEGMENT_MAX_PARALLEL", "4"))
+
+# Gemini解析（アップロードから生成完了まで）の時間。無音除去の有無で比較できるようにする
+MINUTES_ANALYSIS_SECONDS = Histogram(
+    "minutes_analysis_seconds",
+    "Gemini解析の時間（秒、無音除去の有無ごと）",
+    buckets=(5, 10, 30, 60, 120, 180, 300, 600, 900, 1800),
+    labelnames=("silence_trimmed",)
+)
+# 入力・圧縮後の音声のサイズ（インスタンスのディスク・メモリの見積もり用）
+SIZE_BUCKETS = tuple(mb * 1024 * 1024 for mb in (0.25, 1, 4, 16, 32, 64, 128, 256, 512, 1024, 2048))
+MINUTES_INPUT_BYTES = Histogram(
+    "minutes_input_bytes",
+    "入力音声（GCSのオブジェクト）のサイズ（バイト）",
+    buckets=SIZE_BUCKETS
+)
+MINUTES_COMPRESSED_BYTES = Histogram(
+    "minutes_compressed_bytes",
+    "圧縮後の音声のサイズ（バイト）",
+    buckets=SIZE_BUCKETS
+)
+# エクスポートの時間（キャッシュの参照を含む、形式ごと）
+EXPORT_SECONDS = Histogram(
+    "export_seconds",
+    "エクスポートの時間（秒、キャッシュの参照を含む）",
+    labelnames=("format",)
+)
+# 処理中の件数（値は /metrics の取得時に求める）
+JOBS_IN_FLIGHT = Gauge(
+    "jobs_in_flight",
+    "処理待ち・実行中のジョブ数（実行中はステージごと、処理待ちは queued）",
+    labelnames=("stage",)
+)
+JOB_ESTIMATED_WAIT = Gauge(
+    "job_estimated_wait_seconds",
+    "今からジョブを登録した場合に実行が始まるまでの待ち時間の見積もり（秒、Retry-Afterの算出に使用）"
+)
+EXPORTS_IN_FLIGHT = Gauge(
+    "exports_in_flight",
+    "生成中・生成待ちのエクスポート数"
+)
+
+# 429レスポンスのRetry-Afterの上限（秒）
+MAX_RETRY_AFTER_SECONDS = 3600
+
+# /metrics の取得に必要なトークン（未設定の場合は認証なし）
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# ジョブ登録時のプロファイル取得（profile=true）を許可するか / OTLP形式のトレースのサービス名
+JOB_PROFILING_ENABLED = os.getenv("JOB_PROFILING_ENABLED", "false").lower() == "true"
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", DEFAULT_SERVICE_NAME)
+
+# 議事録のセクション見出し（「1. 打合せ概要」や「## 1.」）
+SECTION_HEADING_PATTERN = re.compile(r'^(##\s*)?[1-9]\.\s')
+
+class Services:
+    """
+    外部サービスに接続するコンポーネント（初回アクセス時に初期化し、プロセス内で使い回す）
+    import時には何も接続せず、起動後のウォームアップでまとめて初期化する
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = False
+
+    @cached_property
+    def storage_client(self):
+        if not GCS_BUCKET_NAME:
+            logger.warning("GCS_BUCKET_NAMEが設定されていません。GCS機能は無効です。")
+            return None
+        try:
+            from google.cloud import storage
+            return storage.Client()
+        except Exception as e:
+            logger.warning(f"GCS初期化エラー: {str(e)}")
+            return None
+
+    @cached_property
+    def bucket(self):
+        if self.storage_client is None:
+            return None
+        bucket = self.storage_client.bucket(GCS_BUCKET_NAME)
         logger.info(f"GCS初期化成功: バケット名 = {GCS_BUCKET_NAME}")
-    except Exception as e:
-        logger.warning(f"GCS初期化エラー: {str(e)}")
-        storage_client = None
-        bucket = None
-else:
-    logger.warning("GCS_BUCKET_NAMEが設定されていません。GCS機能は無効です。")
-    storage_client = None
-    bucket = None
-
-# サービスの初期化
-audio_processor = AudioProcessor()
-gemini_service = GeminiService()
+        return bucket
+
+    @cached_property
+    def audio_processor(self) -> AudioProcessor:
+        return AudioProcessor(
+            profile=os.getenv("AUDIO_PROFILE", "auto"),
+            encode_workers=int(os.getenv("AUDIO_ENCODE_WORKERS", "0")),
+            trim_silence=os.getenv("AUDIO_TRIM_SILENCE", "false").lower() == "true",
+        )
+
+    @cached_property
+    def gemini(self) -> "GeminiService":
+        from gemini_service import GeminiService
+        return GeminiService()
+
+    @cached_property
+    def result_cache(self) -> Optional[ResultCache]:
+        return create_result_cache(self.bucket)
+
+    def warm_up(self):
+        """すべてのサービスを初期化（複数スレッドから呼ばれても初期化は1回だけ）"""
+        with self._lock:
+            if self._ready:
+                return
+            start_time = time.perf_counter()
+            self.bucket
+            self.audio_processor
+            self.gemini
+            self.result_cache
+            self._ready = True
+            logger.info(f"サービス初期化完了 ({time.perf_counter() - start_time:.2f}秒)")
+
+    def _get_locked(self, name: str):
+        with self._lock:
+            return getattr(self, name)
+
+    async def get(self, name: str):
+        """
+        サービスを取得（未初期化の場合はスレッドで初期化し、イベントループを止めない）
+
+        Args:
+            name: 属性名（bucket, audio_processor, gemini, result_cache など）
+        """
+        if name in self.__dict__:
+            return self.__dict__[name]
+        return await asyncio.to_thread(self._get_locked, name)
+
+# サービスの初期化（接続を伴うものは Services で遅延初期化）
+services = Services()
 auth_service = AuthService()
-doc_generator = DocumentGenerator()
+export_renderer = create_export_renderer()
+export_cache = create_export_cache()
+signing_identity = SigningIdentity()
+multipart_uploads = create_multipart_upload_manager(signing_identity)
+
+# エクスポート形式ごとの拡張子とMIMEタイプ
+EXPORT_FORMATS = {
+    "word": (".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": (".pdf", "application/pdf"),
+}
+# 一括エクスポートで1回に指定できる議事録の数
+BULK_EXPORT_MAX_ITEMS = int(os.getenv("BULK_EXPORT_MAX_ITEMS", "100"))
+# 一括エクスポートで処理待ちが上限に達していた場合に、再度依頼するまでの待ち時間の範囲（秒）
+BULK_EXPORT_RETRY_MIN_SECONDS = 0.1
+BULK_EXPORT_RETRY_MAX_SECONDS = 5.0
 
 # リクエスト/レスポンスモデル
 class LoginRequest(BaseModel):
@@ -92,11 +287,32 @@ class MinutesResponse(BaseModel):
     summary: str
     dynamic_title: str
 
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # "queued" / "running" / "completed" / "failed"
+    stage: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    queue_wait_seconds: Optional[float] = None
+    elapsed_seconds: float
+    stage_timings: Dict[str, float]
+    result: Optional[MinutesResponse] = None
+    error: Optional[str] = None
+    trace_id: Optional[str] = None
+
 class ExportRequest(BaseModel):
     summary: str
     metadata: MetadataInput
     format: str  # "word" or "pdf"
 
+class BulkExportRequest(BaseModel):
+    items: List[ExportRequest]
+
 # 認証用のデコレータ
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """JWTトークンから現在のユーザーを取得"""
@@ -163,6 +379,17 @@ async def health_check():
     """ヘルスチェック用エンドポイント"""
     return {"status": "healthy", "service": "議事録自動生成システム"}
 
+@app.get("/metrics")
+async def metrics_endpoint(request: Request):
+    """Prometheus形式のメトリクス（METRICS_TOKENを設定した場合はBearerトークンが必要）"""
+    authorization = request.headers.get("authorization", "")
+    if METRICS_TOKEN and not secrets.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なトークンです"
+        )
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/api/auth/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """ログインエンドポイント（パスワードのみ）"""
@@ -200,6 +427,7 @@ async def generate_upload_url(
     GCSへの署名付きアップロードURLを生成（IAM Credentials API使用）
     """
     try:
+        bucket = await services.get("bucket")
         if not bucket:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -215,25 +443,9 @@ async def generate_upload_url(
         # GCSのblobオブジェクトを作成
         blob = bucket.blob(blob_name)
 
-        # サービスアカウント情報を取得
-        from google.auth import default as google_auth_default
-        from google.auth.transport import requests as google_auth_requests
-
-        credentials, _ = google_auth_default()
-        auth_request = google_auth_requests.Request()
-        credentials.refresh(auth_request)
-
-        # メタデータサーバーからサービスアカウントのメールを取得
-        import urllib.request
+        # サービスアカウント情報を取得（メールアドレスとアクセストークンはキャッシュを使う）
         try:
-            metadata_server = "http://metadata.google.internal/computeMetadata/v1/"
-            req = urllib.request.Request(
-                metadata_server + 'instance/service-accounts/default/email',
-                headers={'Metadata-Flavor': 'Google'}
-            )
-            with urllib.request.urlopen(req, timeout=2) as response:
-                service_account_email = response.read().decode('utf-8')
-            logger.info(f"サービスアカウント: {service_account_email}")
+            service_account_email, access_token = await signing_identity.get()
         except Exception as e:
             logger.error(f"サービスアカウント取得エラー: {str(e)}")
             raise HTTPException(
@@ -241,14 +453,15 @@ async def generate_upload_url(
                 detail="サービスアカウントの取得に失敗しました"
             )
 
-        # 署名付きURL生成（IAM Credentials APIを使用）
-        upload_url = blob.generate_signed_url(
+        # 署名付きURL生成（IAM Credentials APIを使用するため、イベントループを止めないようスレッドで実行）
+        upload_url = await asyncio.to_thread(
+            blob.generate_signed_url,
             version="v4",
             expiration=timedelta(minutes=15),
             method="PUT",
             content_type=content_type,
             service_account_email=service_account_email,
-            access_token=credentials.token
+            access_token=access_token
         )
 
         logger.info(f"署名付きURL生成成功: {blob_name}")
@@ -267,119 +480,575 @@ async def generate_upload_url(
             detail=f"署名付きURLの生成中にエラーが発生しました: {str(e)}"
         )
 
-@app.post("/api/upload", response_model=MinutesResponse)
-async def upload_audio(
-    blob_name: str = Form(...),
-    created_date: str = Form(...),
-    creator: str = Form(...),
-    customer_name: str = Form(...),
-    meeting_place: str = Form(...),
+@app.post("/api/uploads/multipart")
+async def create_multipart_upload(
+    filename: str = Form(...),
+    content_type: str = Form(...),
+    file_size: int = Form(...),
+    upload_id: Optional[str] = Form(None),
     current_user: str = Depends(get_current_user)
 ):
     """
-    GCSから音声ファイルを取得して議事録を生成
+    分割アップロードを開始し、パートごとの署名付きURLを発行
+    upload_idを指定すると、未アップロードのパートだけURLを再発行して再開する
     """
+    bucket = await services.get("bucket")
+    if not bucket:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GCSが設定されていません"
+        )
+    if file_size <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ファイルサイズが不正です"
+        )
+
     try:
-        if not bucket:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="GCSが設定されていません"
-            )
+        return await multipart_uploads.create(
+            bucket, current_user, filename, content_type, file_size, upload_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"分割アップロード開始エラー: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"分割アップロードの開始中にエラーが発生しました: {str(e)}"
+        )
+
+@app.post("/api/uploads/multipart/complete")
+async def complete_multipart_upload(
+    upload_id: str = Form(...),
+    filename: str = Form(...),
+    content_type: str = Form(...),
+    part_count: int = Form(...),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    アップロード済みのパートを結合
+    結合後のblob_nameは /api/upload にそのまま渡せる
+    """
+    bucket = await services.get("bucket")
+    if not bucket:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GCSが設定されていません"
+        )
+
+    try:
+        blob_name = await multipart_uploads.complete(
+            bucket, current_user, upload_id, filename, content_type, part_count
+        )
+    except MissingPartsError as e:
+        # クライアントは不足しているパートだけを再送してから再度呼び出す
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "missing_parts": e.missing_parts}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"分割アップロード結合エラー: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"分割アップロードの結合中にエラーが発生しました: {str(e)}"
+        )
 
-        import time
-        start_time = time.time()
+    return {"blob_name": blob_name}
 
-        logger.info(f"=== 音声処理開始 ===")
-        logger.info(f"ユーザー: {current_user}")
-        logger.info(f"ファイル: {blob_name}")
+async def run_minutes_pipeline(job: Job) -> dict:
+    """
+    議事録生成パイプライン（ジョブキューのワーカーから実行）
+    GCSからのダウンロード → 圧縮 → Gemini解析 → クリーンアップ
+    """
+    start_time = time.time()
 
-        # 動的タイトルの生成
-        dynamic_title = f"{created_date}_{creator}_{customer_name}_{meeting_place}_議事録"
+    blob_name = job.params["blob_name"]
+    logger.info(f"=== 音声処理開始 === (ジョブ: {job.id})")
+    logger.info(f"ユーザー: {job.owner}")
+    logger.info(f"ファイル: {blob_name}")
 
-        # 変数の初期化
-        temp_file_path = None
-        processed_file = None
+    # 動的タイトルの生成
+    dynamic_title = job.params["dynamic_title"]
 
-        try:
+    # サービスの取得（ウォームアップ前に実行された場合はここで初期化）
+    bucket = await services.get("bucket")
+    audio_processor = await services.get("audio_processor")
+    gemini_service = await services.get("gemini")
+    result_cache = await services.get("result_cache")
+
+    # 変数の初期化
+    temp_file_path = None
+    processed_files = None
+    processed_file = None
+    trimmed_file = None
+    segment_files = []
+
+    try:
+        # GCSのファイル情報を取得
+        job.set_stage("download")
+        blob = bucket.blob(blob_name)
+
+        # ファイルサイズを確認（GCS呼び出しはスレッドで実行してイベントループをブロックしない）
+        with span("gcs.reload"):
+            await asyncio.to_thread(blob.reload)
+        file_size_mb = blob.size / (1024 * 1024) if blob.size else 0
+        logger.info(f"ファイルサイズ: {file_size_mb:.2f} MB")
+        if blob.size:
+            MINUTES_INPUT_BYTES.observe(blob.size)
+
+        compress_start = time.time()
+
+        # GCSから読み込みながらffmpegで圧縮（一時ファイルなし・ダウンロードと圧縮を並行）
+        if AUDIO_STREAMING_ENABLED and audio_processor.can_stream(blob_name, blob.size or 0):
+            job.set_stage("stream")
+            logger.info("[Step 1-2/4] GCSから読み込みながら音声ファイルを圧縮中...")
+            try:
+                # GCSからの読み込みが続く間はダウンロードの枠を使用する
+                async with resource_slot("gcs_download"):
+                    with span("audio.stream_compress", input_bytes=blob.size or 0):
+                        reader = await asyncio.to_thread(
+                            blob.open, "rb", chunk_size=AudioProcessor.STREAM_CHUNK_SIZE
+                        )
+                        try:
+                            processed_files = await audio_processor.process_stream(reader, blob.size or 0, blob_name)
+                        finally:
+                            await asyncio.to_thread(reader.close)
+            except Exception as e:
+                logger.warning(f"ストリーミング圧縮に失敗したため、ダウンロードしてから圧縮します: {str(e)}")
+
+        if processed_files is None:
             # GCSからファイルをダウンロード
+            job.set_stage("download")
             logger.info("[Step 1/4] GCSからファイルをダウンロード中...")
-            blob = bucket.blob(blob_name)
-
-            # ファイルサイズを確認
-            blob.reload()
-            file_size_mb = blob.size / (1024 * 1024) if blob.size else 0
-            logger.info(f"ファイルサイズ: {file_size_mb:.2f} MB")
+            download_start = time.time()
 
             # 一時ファイルに保存
             file_extension = os.path.splitext(blob_name)[1]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-                blob.download_to_file(temp_file)
-                temp_file_path = temp_file.name
+            async with resource_slot("gcs_download"):
+                with span("gcs.download", bytes=blob.size or 0):
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
+                        temp_file_path = temp_file.name
+                        await asyncio.to_thread(blob.download_to_file, temp_file)
 
-            download_time = time.time() - start_time
+            download_time = time.time() - download_start
             logger.info(f"[Step 1/4] ダウンロード完了 ({download_time:.2f}秒)")
 
             # 音声ファイルの処理（圧縮のみ）
+            job.set_stage("compress")
             logger.info("[Step 2/4] 音声ファイルを圧縮中...")
             compress_start = time.time()
-            processed_files = audio_processor.process_audio(temp_file_path)
-            processed_file = processed_files[0]
+            with span("audio.process"):
+                processed_files = await audio_processor.process_audio(temp_file_path)
+
+        processed_file = processed_files[0]
+
+        # 圧縮後のファイルサイズ
+        compressed_size = os.path.getsize(processed_file)
+        MINUTES_COMPRESSED_BYTES.observe(compressed_size)
+        compressed_size_mb = compressed_size / (1024 * 1024)
+        compress_time = time.time() - compress_start
+        logger.info(f"[Step 2/4] 圧縮完了 ({compress_time:.2f}秒) - 圧縮後サイズ: {compressed_size_mb:.2f} MB")
 
-            # 圧縮後のファイルサイズ
-            compressed_size_mb = os.path.getsize(processed_file) / (1024 * 1024)
-            compress_time = time.time() - compress_start
-            logger.info(f"[Step 2/4] 圧縮完了 ({compress_time:.2f}秒) - 圧縮後サイズ: {compressed_size_mb:.2f} MB")
+        # 同じ録音の解析結果がキャッシュにあれば再利用
+        final_summary = None
+        if result_cache:
+            with span("cache.lookup") as current:
+                cache_key = await asyncio.to_thread(
+                    ResultCache.make_key, processed_file, gemini_service.prompt, gemini_service.model_name
+                )
+                final_summary = await asyncio.to_thread(result_cache.get, cache_key)
+                current.set_attribute("hit", final_summary is not None)
+            if final_summary is not None:
+                logger.info(f"[Step 3/4] 解析結果をキャッシュから取得 - 議事録文字数: {len(final_summary)}")
+
+        if final_summary is None:
+            # 長い無音を除去してGeminiへ送る量を減らす（キャッシュのキーは除去前の音声で計算済み）
+            analysis_file = processed_file
+            trim_map = None
+            if audio_processor.trim_silence_enabled:
+                job.set_stage("trim")
+                try:
+                    with span("audio.trim_silence") as current:
+                        trimmed_file, trim_map = await audio_processor.trim_silence(processed_file)
+                        current.set_attribute("removed_seconds", trim_map.removed_seconds if trim_map else 0.0)
+                    analysis_file = trimmed_file
+                except Exception as e:
+                    logger.warning(f"無音除去に失敗したため、除去せずに解析します: {str(e)}")
+
+            # 長時間の打合せは無音区間で分割し、並列に解析してから統合
+            duration = await audio_processor.get_duration(analysis_file)
+            if duration and duration >= SEGMENT_MODE_MIN_SECONDS:
+                job.set_stage("split")
+                logger.info(f"[Step 2/4] 長時間の音声（{duration / 60:.1f}分）のため分割します")
+                with span("audio.split") as current:
+                    segment_files = await audio_processor.split_at_silence(analysis_file, SEGMENT_SECONDS)
+                    current.set_attribute("segments", len(segment_files))
+                if trim_map and len(segment_files) > 1:
+                    await _log_segment_offsets(audio_processor, segment_files, trim_map)
 
             # Gemini APIで音声解析
+            job.set_stage("analyze")
             logger.info("[Step 3/4] Gemini APIで音声解析中...")
             gemini_start = time.time()
-            final_summary = await gemini_service.analyze_audio(processed_file)
+            with span("gemini.analyze", segments=max(len(segment_files), 1)):
+                if len(segment_files) > 1:
+                    final_summary = await gemini_service.analyze_segments(
+                        segment_files, max_parallel=SEGMENT_MAX_PARALLEL
+                    )
+                else:
+                    # 生成された行を逐次ジョブのイベントとして配信（SSEで画面に表示）
+                    final_summary = await _stream_minutes(job, gemini_service.analyze_audio_stream(analysis_file))
             gemini_time = time.time() - gemini_start
-            logger.info(f"[Step 3/4] 解析完了 ({gemini_time:.2f}秒) - 議事録文字数: {len(final_summary)}")
-
-            # GCSからファイルを削除（処理完了後）
-            logger.info("[Step 4/4] クリーンアップ中...")
-            try:
-                blob.delete()
-                logger.info(f"GCSファイル削除: {blob_name}")
-            except Exception as e:
-                logger.warning(f"GCSファイル削除エラー: {blob_name} - {str(e)}")
+            MINUTES_ANALYSIS_SECONDS.observe(gemini_time, silence_trimmed="true" if trim_map else "false")
+            logger.info(
+                f"[Step 3/4] 解析完了 ({gemini_time:.2f}秒) - 議事録文字数: {len(final_summary)}, "
+                f"解析した音声: {os.path.getsize(analysis_file) / (1024 * 1024):.2f} MB"
+                + (f"（無音 {trim_map.removed_seconds:.0f}秒を除去）" if trim_map else "")
+            )
 
-            total_time = time.time() - start_time
-            logger.info(f"=== 音声処理完了 (合計: {total_time:.2f}秒) ===")
+            if result_cache:
+                with span("cache.store"):
+                    await asyncio.to_thread(result_cache.put, cache_key, final_summary)
 
-            return MinutesResponse(
-                summary=final_summary,
-                dynamic_title=dynamic_title
-            )
+        # GCSからファイルを削除（処理完了後）
+        job.set_stage("cleanup")
+        logger.info("[Step 4/4] クリーンアップ中...")
+        try:
+            with span("gcs.delete"):
+                await asyncio.to_thread(blob.delete)
+            logger.info(f"GCSファイル削除: {blob_name}")
+        except Exception as e:
+            logger.warning(f"GCSファイル削除エラー: {blob_name} - {str(e)}")
 
-        finally:
-            # 一時ファイルのクリーンアップ
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                    logger.debug(f"一時ファイル削除: {temp_file_path}")
-                except Exception as e:
-                    logger.warning(f"一時ファイル削除エラー: {temp_file_path} - {str(e)}")
+        total_time = time.time() - start_time
+        logger.info(f"=== 音声処理完了 (合計: {total_time:.2f}秒) ===")
 
-            if processed_file and os.path.exists(processed_file):
-                try:
-                    os.unlink(processed_file)
-                    logger.debug(f"処理済みファイル削除: {processed_file}")
-                except Exception as e:
-                    logger.warning(f"処理済みファイル削除エラー: {processed_file} - {str(e)}")
+        return MinutesResponse(
+            summary=final_summary,
+            dynamic_title=dynamic_title
+        ).model_dump()
 
-    except HTTPException:
-        raise
     except Exception as e:
         import traceback
         logger.error(f"音声処理エラー: {str(e)}")
         logger.error(f"スタックトレース: {traceback.format_exc()}")
+        raise RuntimeError(f"音声ファイルの処理中にエラーが発生しました: {str(e)}")
+
+    finally:
+        # 一時ファイルのクリーンアップ
+        for segment_file in segment_files:
+            if segment_file not in (processed_file, trimmed_file):
+                _remove_temp_file(segment_file, "分割ファイル")
+        if len(segment_files) > 1:
+            try:
+                os.rmdir(os.path.dirname(segment_files[0]))
+            except OSError:
+                pass
+
+        _remove_temp_file(temp_file_path, "一時ファイル")
+        _remove_temp_file(processed_file, "処理済みファイル")
+        _remove_temp_file(trimmed_file, "無音除去済みファイル")
+        audio_processor.release_temp_files([*segment_files, *(processed_files or []), trimmed_file])
+
+async def _log_segment_offsets(audio_processor: AudioProcessor, segment_files: List[str], trim_map: SilenceTrimMap):
+    """無音除去後に分割したセグメントが、元の録音のどの時刻から始まるかをログに出力"""
+    durations = await asyncio.gather(*(audio_processor.get_duration(path) for path in segment_files))
+    position = 0.0
+    for index, duration in enumerate(durations):
+        original = trim_map.to_original(position)
+        logger.info(
+            f"セグメント{index + 1}: 元の録音の {int(original // 60)}分{original % 60:04.1f}秒 から"
+        )
+        if duration is None:
+            break
+        position += duration
+
+async def _stream_minutes(job: Job, lines: AsyncIterator[str]) -> str:
+    """
+    生成中の議事録を行ごと・セクションごとにジョブのイベントとして配信
+
+    Args:
+        job: 配信先のジョブ
+        lines: 重複削除済みの議事録の行
+
+    Returns:
+        議事録の全文
+    """
+    all_lines = []
+    section_lines = []
+    async for line in lines:
+        # 次のセクション見出しが来たら、直前のセクションは完成している
+        if SECTION_HEADING_PATTERN.match(line.strip()) and section_lines:
+            _publish_section(job, section_lines)
+            section_lines = []
+        section_lines.append(line)
+        all_lines.append(line)
+        job.publish("line", {"text": line})
+
+    if section_lines:
+        _publish_section(job, section_lines)
+
+    return "\n".join(all_lines).strip()
+
+def _publish_section(job: Job, section_lines: List[str]):
+    text = "\n".join(section_lines).strip()
+    if not text:
+        return
+    if "first_section" not in job.stage_timings and job.started_at:
+        job.stage_timings["first_section"] = round(time.time() - job.started_at, 3)
+        logger.info(f"最初のセクションを配信 (ジョブ開始から{job.stage_timings['first_section']:.2f}秒)")
+    job.publish("section", {"text": text})
+
+def _remove_temp_file(path: Optional[str], label: str):
+    """一時ファイルを削除（存在しない場合は何もしない）"""
+    if path and os.path.exists(path):
+        try:
+            os.unlink(path)
+            logger.debug(f"{label}削除: {path}")
+        except Exception as e:
+            logger.warning(f"{label}削除エラー: {path} - {str(e)}")
+
+# ジョブキュー（議事録生成はバックグラウンドのワーカーで実行）
+job_queue = JobQueue(
+    run_minutes_pipeline,
+    max_workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queue_size=int(os.getenv("JOB_QUEUE_SIZE", "20")),
+    retention_seconds=int(os.getenv("JOB_RETENTION_SECONDS", "3600")),
+    trace_exporter=create_trace_exporter(),
+)
+
+def _jobs_in_flight() -> Dict[tuple, int]:
+    counts = {("queued",): job_queue.queued_count}
+    for job in list(job_queue.jobs.values()):
+        if job.status == Job.STATUS_RUNNING:
+            counts[(job.stage,)] = counts.get((job.stage,), 0) + 1
+    return counts
+
+JOBS_IN_FLIGHT.set_function(_jobs_in_flight)
+JOB_ESTIMATED_WAIT.set_function(job_queue.estimate_wait_seconds)
+EXPORTS_IN_FLIGHT.set_function(lambda: export_renderer.pending)
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    """
+    処理待ちが上限に達した場合の429レスポンス
+
+    Args:
+        detail: エラーメッセージ
+        retry_after: 再試行までの秒数の見積もり（Retry-Afterヘッダーに設定）
+    """
+    seconds = min(max(math.ceil(retry_after), 1), MAX_RETRY_AFTER_SECONDS)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(seconds)}
+    )
+
+@app.post("/api/upload", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_audio(
+    blob_name: str = Form(...),
+    created_date: str = Form(...),
+    creator: str = Form(...),
+    customer_name: str = Form(...),
+    meeting_place: str = Form(...),
+    profile: bool = Form(False),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    GCS上の音声ファイルから議事録を生成するジョブを登録
+    処理結果は /api/jobs/{job_id} で取得する
+    profile=true の場合は処理中のプロファイルを取得する（JOB_PROFILING_ENABLED=true の場合のみ）
+    """
+    if profile and not JOB_PROFILING_ENABLED:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"音声ファイルの処理中にエラーが発生しました: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="プロファイルの取得は有効になっていません"
+        )
+
+    if not await services.get("bucket"):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GCSが設定されていません"
+        )
+
+    # ffmpeg・Gemini・GCSのいずれかの待ちが上限に達している間は、新しいジョブを受け付けない
+    busy = saturated_resources()
+    if busy:
+        JOBS_SUBMITTED.inc(result="throttled")
+        logger.warning(f"ジョブ登録拒否: リソースの待ちが上限に達しています ({', '.join(l.name for l in busy)})")
+        raise _too_many_requests(
+            "処理中の議事録が多いため受け付けできません。しばらくしてから再度お試しください。",
+            max(limiter.estimate_wait_seconds() for limiter in busy),
+        )
+
+    try:
+        job = job_queue.submit(current_user, {
+            "blob_name": blob_name,
+            "dynamic_title": f"{created_date}_{creator}_{customer_name}_{meeting_place}_議事録",
+        }, profile=profile)
+    except QueueFullError as e:
+        logger.warning(f"ジョブ登録拒否: {str(e)}")
+        # 先頭の処理待ちジョブが実行を始めれば、待ちに空きができる
+        raise _too_many_requests(
+            "処理待ちの議事録が多いため受け付けできません。しばらくしてから再度お試しください。",
+            job_queue.estimate_wait_seconds(position=0),
+        )
+
+    logger.info(f"ユーザー {current_user} のジョブを登録: {job.id} ({blob_name})")
+    return JobSubmitResponse(job_id=job.id, status=job.status)
+
+def _get_own_job(job_id: str, current_user: str) -> Job:
+    """ログイン中のユーザーのジョブを取得（他のユーザーのジョブは存在しないものとして扱う）"""
+    job = job_queue.get(job_id)
+    if not job or job.owner != current_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ジョブが見つかりません"
+        )
+    return job
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    議事録生成ジョブの状態（ステージ・処理時間・結果）を取得
+    """
+    job = _get_own_job(job_id, current_user)
+    return JobStatusResponse(**job.to_dict())
+
+@app.get("/api/jobs/{job_id}/trace")
+async def get_job_trace(
+    job_id: str,
+    format: str = "timeline",
+    current_user: str = Depends(get_current_user)
+):
+    """
+    議事録生成ジョブのトレース（各処理の開始時刻・所要時間）を取得
+    format=timeline: 入れ子の区間を開始順に並べた一覧 / format=otlp: OTLP/JSON形式
+    """
+    if format not in ("timeline", "otlp"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="formatは timeline または otlp を指定してください"
+        )
+    job = _get_own_job(job_id, current_user)
+    if job.trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ジョブはまだ開始されていません"
+        )
+    if format == "otlp":
+        return job.trace.to_otlp(OTEL_SERVICE_NAME)
+    return job.trace.timeline()
+
+@app.get("/api/jobs/{job_id}/profile")
+async def get_job_profile(
+    job_id: str,
+    format: str = "text",
+    current_user: str = Depends(get_current_user)
+):
+    """
+    議事録生成ジョブのプロファイルを取得（profile=true で登録し、完了したジョブのみ）
+    format=text: 累積時間順の上位関数 / format=pstats: pstatsで読み込めるバイナリ
+
+    cProfileは共有のイベントループのスレッドで動くため、プロファイルはこのジョブだけでなく
+    取得中にプロセスで動いていたジョブ・リクエストをすべて含む
+    （X-Profile-Scope: process、重なったジョブ数は X-Profile-Overlapping-Jobs で返す）
+    """
+    if format not in ("text", "pstats"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="formatは text または pstats を指定してください"
+        )
+    job = _get_own_job(job_id, current_user)
+    if job.profiler is None or job.finished_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="このジョブのプロファイルはありません"
+        )
+    headers = {
+        "X-Profile-Scope": "process",
+        "X-Profile-Overlapping-Jobs": str(job.profiler.overlapping_jobs),
+    }
+    if format == "pstats":
+        return Response(
+            content=job.profiler.dump(),
+            media_type="application/octet-stream",
+            headers={**headers, "Content-Disposition": _content_disposition(f"{job.id}.pstats")}
+        )
+    return Response(content=job.profiler.report(), media_type="text/plain; charset=utf-8", headers=headers)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    議事録生成ジョブの進捗をServer-Sent Eventsで配信
+    stage（ステージ変更）、line / section（生成中の議事録）、done / error（終了）
+    """
+    job = _get_own_job(job_id, current_user)
+
+    # 再接続時は受信済みのイベントの続きから配信
+    last_event_id = request.headers.get("last-event-id")
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        async for index, event, data in job.iter_events(start):
+            yield f"id: {index}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+def _content_disposition(filename: str) -> str:
+    """ダウンロード用のContent-Dispositionヘッダー（日本語のファイル名はRFC 5987形式）"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+def _export_filename(request: ExportRequest) -> str:
+    """エクスポートファイル名（作成日_お客様名_議事録.拡張子）"""
+    extension, _ = EXPORT_FORMATS[request.format.lower()]
+    return f"{request.metadata.created_date}_{request.metadata.customer_name}_議事録{extension}"
+
+def _validate_export_format(request: ExportRequest):
+    if request.format.lower() not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="サポートされていないフォーマットです"
         )
 
+async def _export_document(request: ExportRequest) -> bytes:
+    """
+    Word/PDFを生成（同じ内容のエクスポートはキャッシュから返す）
+
+    Raises:
+        RenderQueueFullError: 処理待ちのエクスポートが上限に達している場合
+    """
+    start_time = time.perf_counter()
+    export_format = request.format.lower()
+    # フッターの作成日時は分単位のため、キーに含めて同じ分の間だけキャッシュを共有する
+    metadata = {**request.metadata.model_dump(), "created_at": format_created_at()}
+    cache_key = ExportCache.make_key(request.summary, metadata, export_format)
+    content = export_cache.get(cache_key) if export_cache else None
+    if content is None:
+        content = await export_renderer.render(export_format, request.summary, metadata)
+        if export_cache:
+            export_cache.put(cache_key, content)
+    EXPORT_SECONDS.observe(time.perf_counter() - start_time, format=export_format)
+    return content
+
 @app.post("/api/export")
 async def export_minutes(
     request: ExportRequest,
@@ -388,38 +1057,25 @@ async def export_minutes(
     """
     議事録をWord/PDF形式でエクスポート
     """
+    _validate_export_format(request)
+    _, media_type = EXPORT_FORMATS[request.format.lower()]
+
     try:
         logger.info(f"ユーザー {current_user} が {request.format} 形式でエクスポート")
+        content = await _export_document(request)
 
-        # ドキュメント生成
-        if request.format.lower() == "word":
-            output_path = doc_generator.generate_word(
-                request.summary,
-                request.metadata.model_dump()
-            )
-            media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            filename = f"{request.metadata.created_date}_{request.metadata.customer_name}_議事録.docx"
-
-        elif request.format.lower() == "pdf":
-            output_path = doc_generator.generate_pdf(
-                request.summary,
-                request.metadata.model_dump()
-            )
-            media_type = "application/pdf"
-            filename = f"{request.metadata.created_date}_{request.metadata.customer_name}_議事録.pdf"
-
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="サポートされていないフォーマットです"
-            )
-
-        return FileResponse(
-            path=output_path,
+        return Response(
+            content=content,
             media_type=media_type,
-            filename=filename
+            headers={"Content-Disposition": _content_disposition(_export_filename(request))}
         )
 
+    except RenderQueueFullError as e:
+        logger.warning(f"エクスポート拒否: {str(e)}")
+        raise _too_many_requests(
+            "エクスポートが混み合っています。しばらくしてから再度お試しください。",
+            export_renderer.estimate_wait_seconds(),
+        )
     except Exception as e:
         import traceback
         logger.error(f"エクスポートエラー: {str(e)}")
@@ -429,6 +1085,112 @@ async def export_minutes(
             detail=f"エクスポート中にエラーが発生しました: {str(e)}"
         )
 
+class _ZipStreamBuffer:
+    """zipfileの書き込み先（書き込まれたバイト列をレスポンスとして順に取り出す）"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+async def _stream_bulk_export(items: List[ExportRequest]) -> AsyncIterator[bytes]:
+    """
+    複数の議事録を並列に生成し、完了した順にZIPのエントリーとして送信
+
+    Args:
+        items: エクスポートする議事録
+
+    Yields:
+        ZIPファイルのデータ
+    """
+    # 1リクエストでプロセスプールの待ち枠を使い切らないよう、同時生成数はワーカー数までにする
+    semaphore = asyncio.Semaphore(max(export_renderer.max_workers, 1))
+
+    async def export_item(index: int, item: ExportRequest):
+        async with semaphore:
+            try:
+                while True:
+                    try:
+                        return index, await _export_document(item), None
+                    except RenderQueueFullError:
+                        # 他のユーザーのエクスポートで待ち枠が埋まっている場合は、空くのを待って再度依頼する
+                        delay = min(
+                            max(export_renderer.estimate_wait_seconds(), BULK_EXPORT_RETRY_MIN_SECONDS),
+                            BULK_EXPORT_RETRY_MAX_SECONDS,
+                        )
+                        logger.info(f"エクスポートの待ち枠が空くのを待機: {_export_filename(item)} ({delay:.1f}秒)")
+                        await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"一括エクスポートエラー: {_export_filename(item)} - {str(e)}")
+                return index, None, str(e)
+
+    tasks = [asyncio.create_task(export_item(i, item)) for i, item in enumerate(items)]
+    buffer = _ZipStreamBuffer()
+    used_names = set()
+    try:
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for next_done in asyncio.as_completed(tasks):
+                index, content, error = await next_done
+                name = _export_filename(items[index])
+                if error is not None:
+                    # 失敗した議事録はエラー内容をテキストで同梱する（送信済みのZIPを壊さないため）
+                    name = f"エラー_{os.path.splitext(name)[0]}.txt"
+                    content = error.encode("utf-8")
+
+                # 同じファイル名は連番を付けて区別
+                stem, extension = os.path.splitext(name)
+                suffix = 2
+                while name in used_names:
+                    name = f"{stem} ({suffix}){extension}"
+                    suffix += 1
+                used_names.add(name)
+
+                archive.writestr(name, content)
+                yield buffer.pop()
+        yield buffer.pop()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@app.post("/api/export/bulk")
+async def export_minutes_bulk(
+    request: BulkExportRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    複数の議事録をWord/PDF形式で一括エクスポート（ZIPで返す）
+    """
+    if not request.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="エクスポートする議事録が指定されていません"
+        )
+    if len(request.items) > BULK_EXPORT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一括エクスポートは{BULK_EXPORT_MAX_ITEMS}件までです"
+        )
+    for item in request.items:
+        _validate_export_format(item)
+
+    logger.info(f"ユーザー {current_user} が {len(request.items)}件を一括エクスポート")
+    filename = f"議事録_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        _stream_bulk_export(request.items),
+        media_type="application/zip",
+        headers={"Content-Disposition": _content_disposition(filename)}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
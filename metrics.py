@@ -0,0 +1,224 @@
+"""
+処理時間などのメトリクスを集計するモジュール
+各モジュールはモジュールレベルでメトリクスを定義し、処理の中で記録する
+render() で登録済みのメトリクスをPrometheusのテキスト形式で出力する
+"""
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# 秒単位の処理時間向けのデフォルトバケット
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+REGISTRY: List = []
+
+
+# Prometheusのテキスト形式のContent-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """累積バケット形式のヒストグラム（ラベルの値の組み合わせごとに集計、スレッドセーフ）"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # ラベルの値の組み合わせ → [バケットごとの件数（最後は+Inf）, 合計, 件数]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        """
+        値を記録
+
+        Args:
+            value: 記録する値
+            **labels: ラベルの値（labelnamesのすべてを指定する）
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        """
+        現在の集計値を取得
+
+        Returns:
+            ラベルの値の組み合わせ → count, sum, buckets（上限値 → その値以下の件数の累積）
+        """
+        with self._lock:
+            result = {}
+            series = dict(self._series)
+            if not self.labelnames and () not in series:
+                # ラベルのないメトリクスは記録前も0として出力する
+                series[()] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for key, (counts, total, count) in series.items():
+                cumulative = 0
+                buckets = {}
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    buckets[bound] = cumulative
+                result[key] = {"count": count, "sum": total, "buckets": buckets}
+            return result
+
+
+class Counter:
+    """単調増加するカウンタ（ラベルの値の組み合わせごとに集計、スレッドセーフ）"""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        値を加算
+
+        Args:
+            amount: 加算する値
+            **labels: ラベルの値（labelnamesのすべてを指定する）
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        """
+        現在の集計値を取得
+
+        Returns:
+            ラベルの値の組み合わせ → 値
+        """
+        with self._lock:
+            if not self.labelnames:
+                return {(): self._values.get((), 0)}
+            return dict(self._values)
+
+
+class Gauge:
+    """
+    増減する現在値（ラベルの値の組み合わせごと、スレッドセーフ）
+    set_function() で関数を登録すると、取得のたびに関数を呼び出して値を求める
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], Union[float, Dict[Tuple[str, ...], float]]]] = None
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set(self, value: float, **labels):
+        """値を設定"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        """値を加算"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        """値を減算"""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], Union[float, Dict[Tuple[str, ...], float]]]):
+        """
+        値を求める関数を登録
+
+        Args:
+            function: 現在値を返す関数（ラベルがある場合は ラベルの値の組み合わせ → 値 の辞書を返す）
+        """
+        self._function = function
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        """
+        現在の値を取得
+
+        Returns:
+            ラベルの値の組み合わせ → 値
+        """
+        if self._function is not None:
+            value = self._function()
+            return dict(value) if isinstance(value, dict) else {(): value}
+        with self._lock:
+            return dict(self._values)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render(registry: Optional[List] = None) -> str:
+    """
+    メトリクスをPrometheusのテキスト形式（version 0.0.4）で出力
+
+    Args:
+        registry: 出力するメトリクス（省略時は登録済みのすべて）
+
+    Returns:
+        /metrics のレスポンス本文
+    """
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        description = metric.description.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {metric.name} {description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for key, value in sorted(metric.snapshot().items()):
+            labels = _format_labels(metric.labelnames, key)
+            if metric.type != "histogram":
+                lines.append(f"{metric.name}{labels} {_format_value(value)}")
+                continue
+            for bound, count in value["buckets"].items():
+                bucket_labels = _format_labels(
+                    metric.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{metric.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{metric.name}_sum{labels} {_format_value(value['sum'])}")
+            lines.append(f"{metric.name}_count{labels} {value['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,274 @@
+"""
+大きな音声ファイルの分割アップロード
+ファイルをパートに分けて署名付きURLで並行アップロードし、最後にGCSのcomposeで1つのオブジェクトに結合する
+失敗したパートだけを再送できるため、回線が不安定でも最初からやり直す必要がない
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import uuid
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# GCSのcomposeで1回に結合できるオブジェクト数の上限
+COMPOSE_MAX_SOURCES = 32
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# パートと同じ場所に保存する、開始時に決めたパートの分け方（パート番号ではないため一覧からは除外される）
+PLAN_BLOB_NAME = "plan.json"
+
+
+class MissingPartsError(Exception):
+    """未アップロードのパートがある状態で結合しようとした場合の例外"""
+
+    def __init__(self, missing_parts: List[int]):
+        super().__init__(f"未アップロードのパートがあります: {missing_parts}")
+        self.missing_parts = missing_parts
+
+
+class MultipartUploadManager:
+    """パートごとの署名付きURLの発行と、アップロード済みパートの結合"""
+
+    def __init__(
+        self,
+        signing_identity,
+        part_size: int = 8 * 1024 * 1024,
+        max_parts: int = COMPOSE_MAX_SOURCES,
+        url_expiration: timedelta = timedelta(minutes=60),
+    ):
+        """
+        Args:
+            signing_identity: 署名に使うサービスアカウント（SigningIdentity）
+            part_size: 1パートの目安サイズ（バイト）
+            max_parts: パート数の上限（composeを1回で済ませるため32以下）
+            url_expiration: パートの署名付きURLの有効期限
+        """
+        self.signing_identity = signing_identity
+        self.part_size = part_size
+        self.max_parts = min(max_parts, COMPOSE_MAX_SOURCES)
+        self.url_expiration = url_expiration
+
+    def plan(self, file_size: int) -> Dict[str, int]:
+        """
+        ファイルサイズからパートの分け方を決める（同じサイズなら常に同じ結果）
+
+        Args:
+            file_size: ファイルサイズ（バイト）
+
+        Returns:
+            {"part_size": 1パートのサイズ, "part_count": パート数}
+        """
+        part_count = min(max(math.ceil(file_size / self.part_size), 1), self.max_parts)
+        part_size = max(math.ceil(file_size / part_count), 1)
+        return {"part_size": part_size, "part_count": part_count}
+
+    @staticmethod
+    def validate_upload_id(upload_id: str):
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise ValueError("アップロードIDが不正です")
+
+    @staticmethod
+    def destination_blob_name(owner: str, upload_id: str, filename: str) -> str:
+        """結合後のオブジェクト名（通常のアップロードと同じ形式）"""
+        return f"{owner}/{upload_id}{os.path.splitext(filename)[1]}"
+
+    @staticmethod
+    def part_prefix(owner: str, upload_id: str) -> str:
+        return f"{owner}/parts/{upload_id}/"
+
+    def part_blob_name(self, owner: str, upload_id: str, part_number: int) -> str:
+        return f"{self.part_prefix(owner, upload_id)}{part_number:05d}"
+
+    def _uploaded_parts(self, bucket, owner: str, upload_id: str) -> Dict[int, int]:
+        """アップロード済みのパート番号 → サイズ（バイト）"""
+        prefix = self.part_prefix(owner, upload_id)
+        return {
+            int(blob.name[len(prefix):]): blob.size
+            for blob in bucket.list_blobs(prefix=prefix)
+            if blob.name[len(prefix):].isdigit()
+        }
+
+    def _save_plan(self, bucket, owner: str, upload_id: str, file_size: int, plan: Dict[str, int]):
+        bucket.blob(self.part_prefix(owner, upload_id) + PLAN_BLOB_NAME).upload_from_string(
+            json.dumps({"file_size": file_size, **plan}), content_type="application/json"
+        )
+
+    def _load_plan(self, bucket, owner: str, upload_id: str) -> Dict[str, int]:
+        """
+        開始時に保存したパートの分け方
+
+        Raises:
+            ValueError: 分割アップロードが見つからない場合
+        """
+        try:
+            data = bucket.blob(self.part_prefix(owner, upload_id) + PLAN_BLOB_NAME).download_as_bytes()
+        except Exception:
+            raise ValueError("分割アップロードが見つかりません。最初からやり直してください")
+        return json.loads(data)
+
+    @staticmethod
+    def expected_part_size(plan: Dict[str, int], part_number: int) -> int:
+        """パートのサイズ（最後のパートは残りのバイト数）"""
+        if part_number < plan["part_count"]:
+            return plan["part_size"]
+        return plan["file_size"] - plan["part_size"] * (plan["part_count"] - 1)
+
+    async def create(
+        self,
+        bucket,
+        owner: str,
+        filename: str,
+        content_type: str,
+        file_size: int,
+        upload_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        分割アップロードを開始（upload_idを指定した場合は未アップロードのパートだけURLを再発行して再開）
+
+        Args:
+            bucket: GCSバケット
+            owner: アップロードするユーザー
+            filename: 元のファイル名
+            content_type: ファイルのContent-Type（各パートのPUTでも同じ値を送る）
+            file_size: ファイルサイズ（バイト）
+            upload_id: 再開するアップロードのID
+
+        Returns:
+            アップロードID、結合後のオブジェクト名、パートの分け方、パートごとの署名付きURL
+        """
+        uploaded_parts: List[int] = []
+        plan = self.plan(file_size)
+        if upload_id is None:
+            upload_id = uuid.uuid4().hex
+            # 結合時にクライアントの申告ではなく、開始時の分け方でパートを確認する
+            await asyncio.to_thread(self._save_plan, bucket, owner, upload_id, file_size, plan)
+        else:
+            self.validate_upload_id(upload_id)
+            saved_plan = await asyncio.to_thread(self._load_plan, bucket, owner, upload_id)
+            if saved_plan["file_size"] != file_size:
+                raise ValueError("ファイルサイズが開始時と異なります")
+            uploaded_parts = sorted(await asyncio.to_thread(self._uploaded_parts, bucket, owner, upload_id))
+
+        missing_parts = [n for n in range(1, plan["part_count"] + 1) if n not in uploaded_parts]
+
+        service_account_email, access_token = await self.signing_identity.get()
+
+        def sign(part_number: int) -> str:
+            return bucket.blob(self.part_blob_name(owner, upload_id, part_number)).generate_signed_url(
+                version="v4",
+                expiration=self.url_expiration,
+                method="PUT",
+                content_type=content_type,
+                service_account_email=service_account_email,
+                access_token=access_token
+            )
+
+        # 署名はIAM APIの呼び出しになるため、パートごとに並行して行う
+        urls = await asyncio.gather(*(asyncio.to_thread(sign, n) for n in missing_parts))
+
+        logger.info(
+            f"分割アップロード{'再開' if uploaded_parts else '開始'}: {upload_id} "
+            f"({file_size / (1024 * 1024):.2f} MB, {plan['part_count']}パート, "
+            f"アップロード済み {len(uploaded_parts)}パート)"
+        )
+        return {
+            "upload_id": upload_id,
+            "blob_name": self.destination_blob_name(owner, upload_id, filename),
+            "part_size": plan["part_size"],
+            "part_count": plan["part_count"],
+            "uploaded_parts": uploaded_parts,
+            "parts": [
+                {"part_number": n, "upload_url": url}
+                for n, url in zip(missing_parts, urls)
+            ],
+        }
+
+    def _compose(self, bucket, owner: str, upload_id: str, filename: str, content_type: str, part_count: int) -> str:
+        plan = self._load_plan(bucket, owner, upload_id)
+        if part_count != plan["part_count"]:
+            raise ValueError(f"パート数が開始時と異なります（{plan['part_count']}パート）")
+
+        uploaded_parts = self._uploaded_parts(bucket, owner, upload_id)
+        # サイズが異なるパート（途中で切れたものなど）は削除して、未アップロードとして再送させる
+        broken_parts = [
+            n for n, size in uploaded_parts.items()
+            if n <= part_count and size != self.expected_part_size(plan, n)
+        ]
+        if broken_parts:
+            logger.warning(f"サイズが異なるパートを削除: {upload_id} {broken_parts}")
+            bucket.delete_blobs(
+                [bucket.blob(self.part_blob_name(owner, upload_id, n)) for n in broken_parts],
+                on_error=lambda blob: None
+            )
+        missing_parts = [n for n in range(1, part_count + 1) if n not in uploaded_parts or n in broken_parts]
+        if missing_parts:
+            raise MissingPartsError(missing_parts)
+
+        blob_name = self.destination_blob_name(owner, upload_id, filename)
+        destination = bucket.blob(blob_name)
+        destination.content_type = content_type
+        sources = [bucket.blob(self.part_blob_name(owner, upload_id, n)) for n in range(1, part_count + 1)]
+        destination.compose(sources)
+        if destination.size != plan["file_size"]:
+            destination.delete()
+            raise RuntimeError(f"結合後のサイズが一致しません（{destination.size} / {plan['file_size']} バイト）")
+
+        # 結合後のパートと分け方は不要（削除に失敗してもバケットのライフサイクルルールで削除される）
+        try:
+            plan_blob = bucket.blob(self.part_prefix(owner, upload_id) + PLAN_BLOB_NAME)
+            bucket.delete_blobs([*sources, plan_blob], on_error=lambda blob: None)
+        except Exception as e:
+            logger.warning(f"パートの削除エラー: {str(e)}")
+        return blob_name
+
+    async def complete(
+        self,
+        bucket,
+        owner: str,
+        upload_id: str,
+        filename: str,
+        content_type: str,
+        part_count: int,
+    ) -> str:
+        """
+        アップロード済みのパートを1つのオブジェクトに結合
+
+        Args:
+            bucket: GCSバケット
+            owner: アップロードしたユーザー
+            upload_id: アップロードID
+            filename: 元のファイル名
+            content_type: 結合後のオブジェクトのContent-Type
+            part_count: パート数（開始時に決めたパート数と一致すること）
+
+        Returns:
+            結合後のオブジェクト名（/api/upload にそのまま渡せる）
+
+        Raises:
+            MissingPartsError: 未アップロードのパート、またはサイズが異なるパートがある場合
+            ValueError: パート数が開始時と異なる場合、分割アップロードが見つからない場合
+        """
+        self.validate_upload_id(upload_id)
+        if not 1 <= part_count <= self.max_parts:
+            raise ValueError(f"パート数は1〜{self.max_parts}で指定してください")
+
+        blob_name = await asyncio.to_thread(
+            self._compose, bucket, owner, upload_id, filename, content_type, part_count
+        )
+        logger.info(f"分割アップロード完了: {blob_name} ({part_count}パートを結合)")
+        return blob_name
+
+
+def create_multipart_upload_manager(signing_identity) -> MultipartUploadManager:
+    """環境変数の設定から分割アップロードの管理を作成"""
+    return MultipartUploadManager(
+        signing_identity,
+        part_size=int(float(os.getenv("MULTIPART_PART_SIZE_MB", "8")) * 1024 * 1024),
+        max_parts=int(os.getenv("MULTIPART_MAX_PARTS", str(COMPOSE_MAX_SOURCES))),
+    )
@@ -0,0 +1,108 @@
+"""
+PDF出力用の日本語フォントを事前に用意するスクリプト（Dockerイメージのbuild時に実行）
+
+fonts-noto-cjk のTTCから日本語フェイスだけを取り出して fonts/ に保存する。
+アプリ起動後はTTCのフェイス一覧を読まずに単体のOTFを解析できる。
+--subset を指定すると、議事録で使う文字（ASCII・かな・記号・JIS第1/第2水準漢字）に絞った小さなフォントにする。
+
+使い方:
+    python prepare_fonts.py [--subset]
+"""
+import argparse
+import logging
+import os
+import sys
+
+from fontTools import subset as ftsubset
+from fontTools import ttLib
+
+from document_generator import BUNDLED_FONT_FILES, FONTS_DIR
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logging.getLogger("fontTools").setLevel(logging.ERROR)
+logger = logging.getLogger(__name__)
+
+# 日本語フェイスを含むTTC
+SOURCE_COLLECTIONS = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/opentype/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/noto/NotoSansCJK.ttc",
+]
+
+OUTPUT_PATH = os.path.join(FONTS_DIR, "NotoSansCJKjp-Regular.otf")
+
+
+def _jis_characters() -> set:
+    """JIS X 0208（第1/第2水準漢字・かな・記号）に含まれる文字"""
+    characters = set()
+    for first in range(0xA1, 0xFF):
+        for second in range(0xA1, 0xFF):
+            try:
+                characters.add(ord(bytes((first, second)).decode("euc_jp")))
+            except UnicodeDecodeError:
+                continue
+    return characters
+
+
+def _subset_unicodes() -> set:
+    unicodes = set(range(0x20, 0x7F))          # ASCII
+    unicodes |= set(range(0x3000, 0x3100))     # CJK記号・ひらがな・カタカナ
+    unicodes |= set(range(0xFF00, 0xFFF0))     # 全角英数・半角カナ
+    unicodes |= {0x25CF, 0x2022}               # 箇条書き記号（●、•）
+    return unicodes | _jis_characters()
+
+
+def _find_japanese_face(collection_path: str) -> int:
+    """TTC内の日本語フェイスの番号を探す（名前に JP を含むもの、なければ先頭）"""
+    collection = ttLib.TTCollection(collection_path, lazy=True)
+    try:
+        for index, font in enumerate(collection.fonts):
+            if " JP" in font["name"].getBestFamilyName():
+                return index
+        return 0
+    finally:
+        collection.close()
+
+
+def prepare(subset: bool) -> bool:
+    """
+    日本語フォントを fonts/ に書き出す
+
+    Returns:
+        書き出した（または既に同梱フォントがある）場合はTrue
+    """
+    for font_file in BUNDLED_FONT_FILES:
+        bundled_path = os.path.join(FONTS_DIR, font_file)
+        if os.path.exists(bundled_path):
+            logger.info(f"同梱フォントがあるため何もしません: {bundled_path}")
+            return True
+
+    source = next((path for path in SOURCE_COLLECTIONS if os.path.exists(path)), None)
+    if source is None:
+        logger.warning("日本語フォントのTTCが見つかりません（実行時にシステムフォントを探索します）")
+        return False
+
+    face_index = _find_japanese_face(source)
+    font = ttLib.TTFont(source, fontNumber=face_index, recalcTimestamp=False)
+    logger.info(f"日本語フェイスを取り出し: {source} (#{face_index} {font['name'].getBestFullName()})")
+
+    if subset:
+        options = ftsubset.Options(notdef_outline=True, recommended_glyphs=True, layout_features=["*"])
+        subsetter = ftsubset.Subsetter(options)
+        subsetter.populate(unicodes=_subset_unicodes())
+        subsetter.subset(font)
+
+    os.makedirs(FONTS_DIR, exist_ok=True)
+    font.save(OUTPUT_PATH)
+    font.close()
+    logger.info(f"保存しました: {OUTPUT_PATH} ({os.path.getsize(OUTPUT_PATH) / (1024 * 1024):.1f} MB)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subset", action="store_true", help="議事録で使う文字に絞ったフォントを作成")
+    args = parser.parse_args()
+    # フォントが用意できなくてもbuildは止めない（実行時にシステムフォントへフォールバックする）
+    prepare(args.subset)
+    sys.exit(0)
@@ -0,0 +1,309 @@
+"""
+解析結果キャッシュ - 同じ録音の再アップロード時に圧縮後の解析を省略
+圧縮後の音声・プロンプト・モデル名のハッシュをキーに議事録を保存する
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+from metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# キャッシュの参照回数（cache: result / export、result: hit / miss）と、起動からのヒット率
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "キャッシュの参照回数（キャッシュ・ヒット/ミスごと）",
+    labelnames=("cache", "result")
+)
+CACHE_HIT_RATIO = Gauge(
+    "cache_hit_ratio",
+    "キャッシュのヒット率（起動からの累計）",
+    labelnames=("cache",)
+)
+
+
+def _hit_ratios() -> Dict[Tuple[str, ...], float]:
+    counts: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.snapshot().items():
+        counts.setdefault(cache, {})[result] = value
+    return {
+        (cache,): values.get("hit", 0) / sum(values.values())
+        for cache, values in counts.items() if sum(values.values())
+    }
+
+
+CACHE_HIT_RATIO.set_function(_hit_ratios)
+
+
+class CacheBackend:
+    """キャッシュの保存先（サイズ上限・有効期限による削除は各実装が行う）"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: str):
+        raise NotImplementedError
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+
+class MemoryCacheBackend(CacheBackend):
+    """プロセス内のLRUキャッシュ（文字列・バイト列のどちらも保存できる）"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_bytes, ttl_seconds)
+        self._entries: "OrderedDict[str, Tuple[Union[str, bytes], float, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at, _ = entry
+            if self._is_expired(stored_at):
+                self._remove(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Union[str, bytes]):
+        size = len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time(), size)
+            self._total_bytes += size
+
+            # 古いものから削除してサイズ上限内に収める
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+
+class DiskCacheBackend(CacheBackend):
+    """ローカルディスクのキャッシュ（1エントリ1ファイル、更新日時の古いものから削除）"""
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_bytes, ttl_seconds)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if self._is_expired(stored_at):
+                os.unlink(path)
+                self.evictions += 1
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            # 参照されたエントリを削除対象の後ろに回す（アクセス日時をLRUの順序に使う）
+            os.utime(path, (time.time(), stored_at))
+            return value
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: str):
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(temp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_mtime, stat.st_size, path))
+
+            total_bytes = sum(size for _, _, size, _ in entries)
+            for atime, mtime, size, path in sorted(entries):
+                if not self._is_expired(mtime) and total_bytes <= self.max_bytes:
+                    continue
+                try:
+                    os.unlink(path)
+                    total_bytes -= size
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+
+
+class GCSCacheBackend(CacheBackend):
+    """GCSのプレフィックス配下のキャッシュ（複数インスタンスで共有）"""
+
+    def __init__(self, bucket, prefix: str, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_bytes, ttl_seconds)
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/") + "/"
+
+    def get(self, key: str) -> Optional[str]:
+        from google.api_core.exceptions import NotFound
+
+        blob = self.bucket.blob(f"{self.prefix}{key}.json")
+        try:
+            entry = json.loads(blob.download_as_text())
+        except NotFound:
+            return None
+
+        if self._is_expired(entry["stored_at"]):
+            try:
+                blob.delete()
+                self.evictions += 1
+            except NotFound:
+                pass
+            return None
+        return entry["summary"]
+
+    def put(self, key: str, value: str):
+        blob = self.bucket.blob(f"{self.prefix}{key}.json")
+        blob.upload_from_string(
+            json.dumps({"summary": value, "stored_at": time.time()}, ensure_ascii=False),
+            content_type="application/json",
+        )
+        self._evict()
+
+    def _evict(self):
+        blobs = sorted(self.bucket.list_blobs(prefix=self.prefix), key=lambda b: b.updated)
+        total_bytes = sum(blob.size or 0 for blob in blobs)
+        for blob in blobs:
+            if not self._is_expired(blob.updated.timestamp()) and total_bytes <= self.max_bytes:
+                continue
+            try:
+                blob.delete()
+                total_bytes -= blob.size or 0
+                self.evictions += 1
+            except Exception as e:
+                logger.warning(f"キャッシュ削除エラー: {blob.name} - {str(e)}")
+
+
+class ResultCache:
+    """解析結果キャッシュ（ヒット・ミスを記録）"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(audio_file_path: str, *parts: str) -> str:
+        """
+        圧縮後の音声ファイルの内容と、プロンプト・モデル名などからキーを生成
+
+        Args:
+            audio_file_path: 圧縮後の音声ファイルのパス
+            parts: 結果に影響する文字列（プロンプト、モデル名など）
+
+        Returns:
+            SHA-256のハッシュ値（16進数）
+        """
+        digest = hashlib.sha256()
+        with open(audio_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(part.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"キャッシュ取得エラー: {str(e)}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="result", result="miss")
+            logger.info(f"解析結果キャッシュ: ミス ({key[:12]})")
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="result", result="hit")
+            logger.info(f"解析結果キャッシュ: ヒット ({key[:12]})")
+        return value
+
+    def put(self, key: str, value: str):
+        try:
+            self.backend.put(key, value)
+        except Exception as e:
+            logger.warning(f"キャッシュ保存エラー: {str(e)}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.backend.evictions,
+        }
+
+
+def create_result_cache(bucket=None) -> Optional[ResultCache]:
+    """
+    環境変数の設定から解析結果キャッシュを作成
+
+    RESULT_CACHE_BACKEND: memory（デフォルト） / disk / gcs / none
+
+    Args:
+        bucket: GCSバックエンドで使用するバケット
+
+    Returns:
+        ResultCache（無効な場合はNone）
+    """
+    backend_name = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+    max_bytes = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+    ttl_seconds = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    if backend_name == "none":
+        logger.info("解析結果キャッシュは無効です")
+        return None
+
+    if backend_name == "disk":
+        directory = os.getenv("RESULT_CACHE_DIR", "/tmp/minutes-result-cache")
+        backend = DiskCacheBackend(directory, max_bytes, ttl_seconds)
+    elif backend_name == "gcs":
+        if bucket is None:
+            logger.warning("GCSが設定されていないため、解析結果キャッシュはメモリを使用します")
+            backend = MemoryCacheBackend(max_bytes, ttl_seconds)
+        else:
+            prefix = os.getenv("RESULT_CACHE_GCS_PREFIX", "_cache/results/")
+            backend = GCSCacheBackend(bucket, prefix, max_bytes, ttl_seconds)
+    else:
+        backend = MemoryCacheBackend(max_bytes, ttl_seconds)
+
+    logger.info(f"解析結果キャッシュ: {type(backend).__name__} (上限 {max_bytes / (1024 * 1024):.0f} MB)")
+    return ResultCache(backend)
@@ -0,0 +1,127 @@
+"""
+署名付きURLの署名に使うサービスアカウントの管理
+メールアドレスは1回だけ取得し、アクセストークンは期限切れ前にバックグラウンドで更新する
+"""
+import asyncio
+import logging
+import os
+import threading
+import urllib.request
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METADATA_EMAIL_PATH = "/computeMetadata/v1/instance/service-accounts/default/email"
+
+
+class SigningIdentity:
+    """サービスアカウントのメールアドレスとアクセストークン（全リクエストで共有）"""
+
+    def __init__(
+        self,
+        credentials=None,
+        metadata_host: Optional[str] = None,
+        refresh_margin_seconds: float = 300,
+        retry_interval_seconds: float = 30,
+    ):
+        """
+        Args:
+            credentials: 使用する認証情報（省略時はgoogle.auth.default()で取得）
+            metadata_host: メタデータサーバーのホスト（省略時は GCE_METADATA_HOST または metadata.google.internal）
+            refresh_margin_seconds: アクセストークンの期限の何秒前に更新するか
+            retry_interval_seconds: 更新に失敗した場合の再試行間隔（秒）
+        """
+        self.metadata_host = metadata_host or os.getenv("GCE_METADATA_HOST", "metadata.google.internal")
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_interval_seconds = retry_interval_seconds
+        self._credentials = credentials
+        self._email: Optional[str] = None
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _seconds_until_expiry(self) -> Optional[float]:
+        """アクセストークンの残り有効秒数（期限が不明な場合はNone）"""
+        expiry = getattr(self._credentials, "expiry", None)
+        if expiry is None:
+            return None
+        # google-authの期限はタイムゾーンなしのUTCのため、タイムゾーン付きにそろえて比較する
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        return (expiry - datetime.now(timezone.utc)).total_seconds()
+
+    def _needs_refresh(self, margin_seconds: float) -> bool:
+        if self._credentials is None or not self._credentials.token:
+            return True
+        remaining = self._seconds_until_expiry()
+        return remaining is not None and remaining <= margin_seconds
+
+    def _lookup_email(self) -> str:
+        """サービスアカウントのメールアドレスを取得（認証情報にない場合はメタデータサーバーに問い合わせる）"""
+        email = getattr(self._credentials, "service_account_email", None)
+        if email and email != "default":
+            return email
+
+        request = urllib.request.Request(
+            f"http://{self.metadata_host}{METADATA_EMAIL_PATH}",
+            headers={"Metadata-Flavor": "Google"}
+        )
+        with urllib.request.urlopen(request, timeout=2) as response:
+            return response.read().decode("utf-8").strip()
+
+    def _refresh(self, margin_seconds: float):
+        """認証情報の取得・アクセストークンの更新・メールアドレスの取得（必要なものだけ実行）"""
+        from google.auth import default as google_auth_default
+        from google.auth.transport import requests as google_auth_requests
+
+        with self._lock:
+            if self._credentials is None:
+                self._credentials, _ = google_auth_default()
+            if self._needs_refresh(margin_seconds):
+                self._credentials.refresh(google_auth_requests.Request())
+                remaining = self._seconds_until_expiry()
+                logger.info(
+                    "署名用アクセストークンを更新しました"
+                    + (f"（残り{remaining:.0f}秒）" if remaining is not None else "")
+                )
+            if self._email is None:
+                self._email = self._lookup_email()
+                logger.info(f"サービスアカウント: {self._email}")
+
+    async def get(self) -> Tuple[str, str]:
+        """
+        署名に使うメールアドレスとアクセストークンを取得
+        通常はキャッシュをそのまま返し、期限切れの場合のみその場で更新する
+
+        Returns:
+            (サービスアカウントのメールアドレス, アクセストークン)
+        """
+        if self._email is None or self._needs_refresh(0):
+            await asyncio.to_thread(self._refresh, 0)
+        return self._email, self._credentials.token
+
+    def start(self):
+        """バックグラウンドでの取得・更新を開始"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """バックグラウンドでの更新を停止"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._refresh, self.refresh_margin_seconds)
+                remaining = self._seconds_until_expiry()
+                if remaining is None:
+                    # 期限のないトークン（テスト用の認証情報など）は更新不要
+                    return
+                wait_seconds = max(remaining - self.refresh_margin_seconds, self.retry_interval_seconds)
+            except Exception as e:
+                logger.warning(f"署名用アクセストークンの更新エラー: {str(e)}")
+                wait_seconds = self.retry_interval_seconds
+            await asyncio.sleep(wait_seconds)
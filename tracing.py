@@ -0,0 +1,403 @@
+"""
+ジョブごとのトレース（処理の区間の入れ子のタイムライン）とプロファイルの取得
+ジョブの開始時に start_trace() でトレースを作り、各処理を span() で囲んで区間を記録する
+区間は contextvars で引き継ぐため、asyncio.to_thread やタスクの中でも親子関係が保たれる
+記録したトレースはOpenTelemetry（OTLP/JSON）形式で取得・送信できる
+"""
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 1トレースに記録する区間数の上限（ファイル処理待ちの確認が長引いた場合などに際限なく増やさない）
+MAX_SPANS_PER_TRACE = 1000
+
+# OTEL_SERVICE_NAME が未設定の場合のサービス名
+DEFAULT_SERVICE_NAME = "onsei-gijiroku"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """処理の1区間（名前・開始/終了時刻・属性・エラー）"""
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        """属性を追加（サイズ・件数など、処理の後で分かる値）"""
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        """区間をエラーとして記録"""
+        self.error = str(error) or type(error).__name__
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_dict(self, origin_ns: int, depth: int) -> Dict[str, Any]:
+        """タイムライン表示用の辞書（トレース開始からのミリ秒）"""
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "depth": depth,
+            "start_ms": round((self.start_ns - origin_ns) / 1e6, 3),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+            "in_progress": self.end_ns is None,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSONのSpan"""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """トレース外で span() を使った場合の区間（何も記録しない）"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """1回のジョブの区間の集まり（スレッドセーフ）"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+        self.root = self._add(name, None, attributes)
+
+    def _add(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> Optional[Span]:
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped_spans += 1
+                return None
+            span = Span(self, name, parent_id, attributes)
+            self.spans.append(span)
+            return span
+
+    def timeline(self) -> Dict[str, Any]:
+        """
+        タイムライン（区間を開始順に並べ、入れ子の深さを付けたもの）
+
+        Returns:
+            trace_id, duration_ms, dropped_spans, spans
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        depths: Dict[str, int] = {}
+        items = []
+        for span in spans:
+            depth = depths.get(span.parent_id, -1) + 1 if span.parent_id else 0
+            depths[span.span_id] = depth
+            items.append(span.to_dict(self.root.start_ns, depth))
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": items[0]["duration_ms"] if items else 0,
+            "dropped_spans": self.dropped_spans,
+            "spans": items,
+        }
+
+    def to_otlp(self, service_name: str) -> Dict[str, Any]:
+        """
+        OTLP/JSON形式（ExportTraceServiceRequest）に変換
+
+        Args:
+            service_name: リソース属性 service.name の値
+        """
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """
+    トレースを開始し、ブロック内の span() をこのトレースの区間として記録する
+
+    Args:
+        name: 最上位の区間の名前
+        **attributes: 最上位の区間の属性
+    """
+    trace = Trace(name, attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.record_error(e)
+        raise
+    finally:
+        trace.root.end()
+        _reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    処理の区間を記録（トレース外では何もしない）
+
+    Args:
+        name: 区間の名前（gcs.download, ffmpeg, gemini.generate_content など）
+        **attributes: 区間の属性
+
+    Yields:
+        区間（set_attributeで処理後に属性を追加できる）
+    """
+    parent = _current_span.get()
+    current = parent.trace._add(name, parent.span_id, attributes) if parent is not None else None
+    if current is None:
+        yield _NOOP_SPAN
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        current.end()
+        _reset(token)
+
+
+def start_span(name: str, **attributes) -> Any:
+    """
+    実行中の区間の子として区間を開始（span()と違い、以降の区間の親にはしない）
+    非同期ジェネレーターのように、区間の途中で呼び出し側へ制御を返す処理で使う。終了時に end() を呼ぶ
+
+    Args:
+        name: 区間の名前
+        **attributes: 区間の属性
+
+    Returns:
+        区間（トレース外では何も記録しない区間）
+    """
+    parent = _current_span.get()
+    current = parent.trace._add(name, parent.span_id, attributes) if parent is not None else None
+    return current if current is not None else _NOOP_SPAN
+
+
+def _reset(token: contextvars.Token):
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # 非同期ジェネレーターが別のコンテキストで終了処理された場合
+        pass
+
+
+def current_trace_id() -> Optional[str]:
+    """実行中のトレースのID（トレース外ではNone）"""
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
+
+
+class TraceLogFilter(logging.Filter):
+    """ログにトレースIDを付ける（並行するジョブのログを見分けるため。書式で %(trace_prefix)s を使う）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace_id = current_trace_id()
+        record.trace_prefix = f"[{trace_id[:8]}] " if trace_id else ""
+        return True
+
+
+class OtlpTraceExporter:
+    """トレースをOTLP/HTTP（JSON）でコレクターへ送信"""
+
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10):
+        """
+        Args:
+            endpoint: 送信先のURL（例: http://collector:4318/v1/traces）
+            service_name: リソース属性 service.name の値
+            headers: 追加のHTTPヘッダー（認証など）
+            timeout: 送信のタイムアウト秒数
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def export(self, trace: Trace):
+        """トレースを送信（ブロッキングI/Oのためスレッドから呼び出す。失敗してもジョブには影響させない）"""
+        body = json.dumps(trace.to_otlp(self.service_name)).encode("utf-8")
+        request = urllib.request.Request(
+            self.endpoint,
+            data=body,
+            headers={"Content-Type": "application/json", **self.headers},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except Exception as e:
+            logger.warning(f"トレースの送信に失敗しました: {trace.trace_id} - {str(e)}")
+
+
+def create_trace_exporter() -> Optional[OtlpTraceExporter]:
+    """
+    OpenTelemetryの標準の環境変数からトレースの送信先を作成
+
+    OTEL_EXPORTER_OTLP_TRACES_ENDPOINT: 送信先のURL（そのまま使う）
+    OTEL_EXPORTER_OTLP_ENDPOINT: 送信先のベースURL（/v1/traces を付ける）
+    OTEL_EXPORTER_OTLP_HEADERS: 追加のヘッダー（key1=value1,key2=value2）
+    OTEL_SERVICE_NAME: サービス名
+
+    Returns:
+        OtlpTraceExporter（送信先が未設定の場合はNone）
+    """
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+    if not endpoint and os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT").rstrip("/") + "/v1/traces"
+    if not endpoint:
+        return None
+
+    headers = {}
+    for item in os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            headers[key.strip()] = value.strip()
+    service_name = os.getenv("OTEL_SERVICE_NAME", DEFAULT_SERVICE_NAME)
+    logger.info(f"トレースの送信先: {endpoint} (service.name={service_name})")
+    return OtlpTraceExporter(endpoint, service_name, headers)
+
+
+class JobProfiler:
+    """
+    1ジョブの実行中のcProfileによるプロファイル（イベントループのスレッドのみが対象）
+    同じスレッドで同時に有効にできるプロファイラは1つのため、取得中は他のジョブのプロファイルを取らない
+
+    イベントループは全ジョブ・全リクエストで共有しているため、結果はそのジョブだけでなく
+    取得中にプロセスで動いていた処理すべてを含む（重なったジョブ数を overlapping_jobs に記録する）
+    """
+
+    _active_lock = threading.Lock()
+    _active: Optional["JobProfiler"] = None
+
+    def __init__(self):
+        self._profile: Optional[cProfile.Profile] = None
+        self.stats: Optional[pstats.Stats] = None
+        self.overlapping_jobs = 0
+
+    @classmethod
+    def record_overlapping_job(cls):
+        """他のジョブが開始したことを取得中のプロファイルに記録"""
+        active = cls._active
+        if active is not None:
+            active.overlapping_jobs += 1
+
+    def start(self, running_jobs: int = 0) -> bool:
+        """
+        プロファイルを開始
+
+        Args:
+            running_jobs: 開始時点で実行中の他のジョブ数
+
+        Returns:
+            開始できたかどうか（他のジョブのプロファイル中はFalse）
+        """
+        if not self._active_lock.acquire(blocking=False):
+            logger.warning("他のジョブのプロファイルを取得中のため、プロファイルを取得しません")
+            return False
+        try:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        except (RuntimeError, ValueError) as e:
+            # 他のプロファイラ（デバッガなど）が有効な場合
+            logger.warning(f"プロファイルを開始できませんでした: {str(e)}")
+            self._profile = None
+            self._active_lock.release()
+            return False
+        self.overlapping_jobs = running_jobs
+        JobProfiler._active = self
+        return True
+
+    def stop(self):
+        """プロファイルを終了して集計"""
+        if self._profile is None:
+            return
+        self._profile.disable()
+        self.stats = pstats.Stats(self._profile)
+        self._profile = None
+        JobProfiler._active = None
+        self._active_lock.release()
+
+    def report(self, limit: int = 50) -> str:
+        """累積時間の長い順の関数の一覧（テキスト）"""
+        if self.stats is None:
+            return ""
+        output = io.StringIO()
+        output.write(
+            "対象: プロセス全体（イベントループのスレッド）。このジョブ以外に、"
+            f"取得中に実行されたジョブ{self.overlapping_jobs}件とHTTPリクエストの処理も含みます\n\n"
+        )
+        self.stats.stream = output
+        self.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return output.getvalue()
+
+    def dump(self) -> bytes:
+        """pstats形式のデータ（snakevizなどで開ける）"""
+        if self.stats is None:
+            return b""
+        return marshal.dumps(self.stats.stats)